@@ -1,91 +1,323 @@
+import time
+
+# Start of the --startup-time measurement, taken before the other imports
+STARTED = time.perf_counter()
+
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import os
+import sys
 from datetime import datetime
-import barcode
-from barcode.writer import ImageWriter
-import subprocess
-import platform
-import win32print
-import re
+
+from barcode_core import (
+    DEFAULT_CODES_FOLDER,
+    DEFAULT_DB_FILE,
+    DEFAULT_SETTINGS_FILE,
+    DEFAULT_SYNC_PORT,
+)
+from barcode_core.batch import import_codes, iter_codes
+from barcode_core.cleanup import collect_garbage, delete_files, diff_images, format_bytes
+from barcode_core.export import export
+from barcode_core.imagecache import get_render_cache
+from barcode_core.imagestore import FLAT, PACK_FILE, SHARDED, get_image_store
+from barcode_core.jobs import JobQueue
+from barcode_core.lazyrender import PrerenderQueue
+from barcode_core.metrics import Profiler, StartupTimer, metrics
+from barcode_core.plans import PrintPlan, parse_plan_lines
+from barcode_core.printing import printers
+from barcode_core.rendering import clean_code, make_filename, render_png
+from barcode_core.scanner import (
+    SCAN_ACTIONS,
+    SCAN_GENERATE,
+    SCAN_PRINT,
+    SCAN_VERIFY,
+    ScanBuffer,
+)
+from barcode_core.search import CodeIndex
+from barcode_core.settings import (
+    DEFAULT_PROFILE,
+    DOTS_PER_MM,
+    PrinterProfile,
+    Settings,
+    validate_profiles,
+)
+from barcode_core.spooler import PrintSpooler
+from barcode_core.storage import TextFileStorage, open_storage
+from barcode_core.symbology import SYMBOLOGIES, describe_errors, get_symbology
+from barcode_core.zpl import build_label
+from virtual_treeview import VirtualTreeview
+
+# Most codes whose records are listed for a search
+SEARCH_RESULT_CODES = 500
+# Seconds --startup-time waits for the database to load
+STARTUP_TIMEOUT = 120.0
+
+
+def format_metric(value):
+    return "" if value is None else f"{value:.1f}"
 
 
 class BarcodeApp:
+    LAYOUT_NAMES = {FLAT: "Carpeta única", SHARDED: "Subcarpetas (256)"}
+    # Options kept in the settings file: (name, Tk variable attribute)
+    PERSISTED_OPTIONS = (
+        ("lazy_render", "lazy_render_var"),
+        ("scanner_mode", "scanner_mode_var"),
+        ("scan_action", "scan_action_var"),
+        ("scan_gap_ms", "scan_gap_var"),
+        ("pack_days", "pack_days_var"),
+        ("sync_server", "sync_server_var"),
+    )
+
     def __init__(self, root):
         self.root = root
         self.root.title("Generador de códigos de barras")
         self.root.geometry("650x550")
         self.root.resizable(True, True)
 
-        # Database file
-        self.db_file = "barcode_database.txt"
+        # Database file; a .db/.sqlite3 name selects the SQLite backend and
+        # imports the legacy text database on first start
+        self.db_file = DEFAULT_DB_FILE
+        self.legacy_db_file = DEFAULT_DB_FILE
+        self.storage = None
 
         # Create codes folder
-        self.codes_folder = "codes"
+        self.codes_folder = DEFAULT_CODES_FOLDER
         self.ensure_codes_folder()
 
+        # Rendering, printing and imports run on worker threads; results are
+        # delivered on the Tk thread by pump_jobs
+        self.jobs = JobQueue(workers=3)
+
+        # Search index over the distinct codes, built once the database is
+        # loaded; codes added before it is ready are queued in index_backlog
+        self.code_index = None
+        self.index_backlog = []
+        self.search_after = None
+        # Codes matched by the active search (None without one)
+        self.filter_codes = None
+
         self.load_database()
+        self.batch_job = None
+        # Codes submitted for rendering but not yet stored
+        self.pending_codes = set()
+
+        # Lazy mode: store codes immediately and render images on demand or
+        # in the background while the station is idle
+        self.lazy_render_var = tk.BooleanVar(value=False)
+        self.prerender = PrerenderQueue(
+            self.codes_folder,
+            on_rendered=lambda filename: self.jobs.call_soon(self.schedule_redraw),
+        )
+        self.redraw_scheduled = False
 
-        # Printer name
-        self.printer_name_var = tk.StringVar(value="SAT TT448-2 USE (ZPL)")
+        # Printer profiles and options kept between sessions
+        self.settings = Settings(DEFAULT_SETTINGS_FILE)
+
+        # Symbology of new codes, by label (see barcode_core/symbology.py);
+        # those missing an optional package (QR without qrcode) are not offered
+        self.symbology_labels = {
+            s.label: s.name for s in SYMBOLOGIES.values() if s.available()
+        }
+        symbology = self.settings.get("symbology")
+        if symbology not in self.symbology_labels.values():
+            symbology = None
+        self.symbology_var = tk.StringVar(value=get_symbology(symbology).label)
+
+        # Printer profile shown in Configuración (see barcode_core/settings.py):
+        # the printer (Windows printer, tcp://host:9100 or file://path) and
+        # the label geometry. Printing uses these fields as edited.
+        self.profile_var = tk.StringVar()
+        self.printer_name_var = tk.StringVar()
+        self.dpi_var = tk.IntVar()
+        self.label_width_var = tk.DoubleVar()
+        self.columns_var = tk.IntVar()
+        self.darkness_var = tk.StringVar()
+        self.speed_var = tk.StringVar()
+        self.profile_status_var = tk.StringVar()
+        # Result of the printer lookup of each profile (None when it passed)
+        self.profile_errors = {}
+        self.show_profile(self.settings.active)
+        # Keeps the printer connection open and batches queued labels
+        self.spooler = None
+
+        # Scanner mode: keystrokes are coalesced into one event per scan,
+        # ended by Enter or by an idle gap after scanner-speed input
+        self.scanner_mode_var = tk.BooleanVar(value=False)
+        self.scan_action_var = tk.StringVar(value=SCAN_GENERATE)
+        self.scan_gap_var = tk.IntVar(value=50)
+        self.scan_buffer = ScanBuffer()
+        self.scan_after = None
+        self.scan_count = 0
+
+        # Image folder layout (see barcode_core/imagestore.py)
+        self.images = get_image_store(self.codes_folder)
+        self.layout_var = tk.StringVar(value=self.LAYOUT_NAMES[self.images.layout])
+        self.pack_days_var = tk.IntVar(value=30)
+
+        # Performance tab: timings and counters from barcode_core.metrics,
+        # and an opt-in cProfile capture of the Tk thread
+        self.profiler = Profiler()
+        self.metrics_after = None
+
+        # Shared mode: duplicates are also looked up among the codes of the
+        # other stations, pulled into a local cache by barcode_core.sync
+        self.sync = None
+        self.shared_mode_var = tk.BooleanVar(value=False)
+        self.sync_server_var = tk.StringVar(value=f"127.0.0.1:{DEFAULT_SYNC_PORT}")
+        self.sync_status_var = tk.StringVar(value="Desactivado")
+        self.sync_after = None
+
+        self.restore_options()
 
         # Create GUI
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(50, self.pump_jobs)
+        # Enumerate printers and check the profiles now, not on the first print
+        self.validate_profiles()
+        if self.settings.load_error:
+            messagebox.showwarning(
+                "Advertencia",
+                f"No se pudo leer {DEFAULT_SETTINGS_FILE} ({self.settings.load_error}); "
+                "se usan los valores por defecto",
+            )
+        if self.images.pack.load_error:
+            messagebox.showwarning(
+                "Advertencia",
+                f"No se pudo leer el archivo de imágenes {PACK_FILE} "
+                f"({self.images.pack.load_error}); se apartó como "
+                f"{self.images.pack.quarantined} y se empieza uno nuevo",
+            )
+
+    def restore_options(self):
+        for name, attribute in self.PERSISTED_OPTIONS:
+            value = self.settings.get(name)
+            if value is not None:
+                getattr(self, attribute).set(value)
+
+    def save_settings(self):
+        """Keep the options and the active profile for the next session."""
+        for name, attribute in self.PERSISTED_OPTIONS:
+            try:
+                self.settings.set(name, getattr(self, attribute).get())
+            except tk.TclError:
+                # e.g. a spinbox left empty: keep the stored value
+                pass
+        self.settings.set("symbology", self.current_symbology().name)
+        return self.write_settings()
+
+    def write_settings(self):
+        try:
+            self.settings.save()
+        except OSError as e:
+            messagebox.showerror("Error", f"No se pudo guardar la configuración: {e}")
+            return False
+        return True
 
-    def sanitize_filename(self, text):
-        return re.sub(r'[\\/:*?"<>|]', "_", text)
+    def on_close(self):
+        self.save_settings()
+        self.root.destroy()
 
     def ensure_codes_folder(self):
         if not os.path.exists(self.codes_folder):
             os.makedirs(self.codes_folder)
 
     def load_database(self):
-        self.barcode_list = []
-        if os.path.exists(self.db_file):
-            try:
-                with open(self.db_file, "r", encoding="utf-8") as file:
-                    for line in file:
-                        line = line.strip()
-                        if line:
-                            parts = line.split("|")
-                            if len(parts) >= 3:
-                                self.barcode_list.append(
-                                    {
-                                        "code": parts[0],
-                                        "timestamp": parts[1],
-                                        "filename": parts[2],
-                                        "full_line": line,
-                                    }
-                                )
-                            elif len(parts) >= 2:
-                                self.barcode_list.append(
-                                    {
-                                        "code": parts[0],
-                                        "timestamp": parts[1],
-                                        "filename": "",
-                                        "full_line": line,
-                                    }
-                                )
-            except Exception as e:
-                messagebox.showerror("Error", f"Error cargando la base de datos: {e}")
-
-    def save_to_database(self, code, filename):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        entry = f"{code}|{timestamp}|{filename}"
+        self.load_started = time.perf_counter()
+        self.database_loaded = False
         try:
-            with open(self.db_file, "a", encoding="utf-8") as file:
-                file.write(entry + "\n")
-
-            self.barcode_list.append(
-                {
-                    "code": code,
-                    "timestamp": timestamp,
-                    "filename": filename,
-                    "full_line": entry,
-                }
+            # The text database finishes loading in the background; the first
+            # page is shown right away
+            self.storage = open_storage(
+                self.db_file,
+                migrate_from=self.legacy_db_file,
+                background=True,
+                on_progress=lambda count, finished: self.jobs.call_soon(
+                    self.on_load_progress, count, finished
+                ),
             )
+        except Exception as e:
+            messagebox.showerror("Error", f"Error cargando la base de datos: {e}")
+            # Keep the app usable: start empty and append to the text database
+            self.storage = TextFileStorage(self.legacy_db_file)
+            # Nothing more will load; finish as a load would (search index etc.)
+            self.jobs.call_soon(self.on_load_progress, 0, True)
+
+    def on_load_progress(self, count, finished):
+        self.tree_view.grow()
+        if not finished:
+            self.status_var.set(f"Cargando base de datos... {count} registros")
+            return
+        metrics.observe("load_ms", (time.perf_counter() - self.load_started) * 1000)
+        metrics.observe("load_rows", count)
+        error = getattr(self.storage, "load_error", None)
+        if error:
+            metrics.incr("load_errors")
+            messagebox.showerror("Error", f"Error cargando la base de datos: {error}")
+        self.status_var.set(f"{count} registros cargados")
+        self.database_loaded = True
+        self.build_code_index()
+
+    def build_code_index(self):
+        def run(job):
+            codes = self.storage.codes()
+            return CodeIndex(codes, ngrams=True)
+
+        def done(index):
+            index.add_many(self.index_backlog)
+            self.index_backlog = []
+            self.code_index = index
+            if self.search_var.get().strip():
+                self.apply_filter()
+
+        self.jobs.submit("Índice de búsqueda", run, on_done=done)
+
+    def index_codes(self, codes):
+        if self.code_index is None:
+            self.index_backlog.extend(codes)
+        else:
+            self.code_index.add_many(codes)
+
+    def suggest_codes(self, text, limit=20):
+        """Autocomplete candidates for ``text`` (prefix, substring, then fuzzy)."""
+        text = text.strip()
+        if self.code_index is not None:
+            if not text:
+                return self.code_index.codes[:limit]
+            return self.code_index.search(text, limit)
+        # Index still being built: scanning every code here would stall typing
+        return []
+
+    def current_symbology(self):
+        return get_symbology(self.symbology_labels.get(self.symbology_var.get()))
+
+    def symbology_of(self, code):
+        """Symbology ``code`` was last registered with (the selected one if
+        it is not registered)."""
+        records = self.storage.find(code)
+        return records[-1]["symbology"] if records else self.current_symbology().name
+
+    def save_to_database(self, code, filename, symbology=None):
+        try:
+            record = self.storage.add(code, filename, symbology=symbology)
         except Exception as e:
             messagebox.showerror("Error", f"Error guardando en la base de datos: {e}")
+            return None
+        if self.sync is not None:
+            self.sync.push([record])
+        return record
+
+    def duplicate_of(self, code):
+        """Where ``code`` is already registered ("la base de datos" or another
+        station in shared mode), or None if it is new."""
+        if code in self.pending_codes or self.storage.exists(code):
+            return "la base de datos"
+        if self.sync is not None:
+            station = self.sync.station_of(code)
+            if station is not None:
+                return f"la estación '{station}'"
+        return None
 
     def create_widgets(self):
         notebook = ttk.Notebook(self.root)
@@ -100,7 +332,7 @@ class BarcodeApp:
 
         title_label = ttk.Label(
             main_frame,
-            text="Generador de Códigos de Barras - Code128",
+            text="Generador de Códigos de Barras",
             font=("Arial", 16, "bold"),
         )
         title_label.grid(row=0, column=0, columnspan=2, pady=(0, 20))
@@ -124,12 +356,23 @@ class BarcodeApp:
             row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 10)
         )
         self.input_var.trace("w", self.on_input_change)
+        self.input_entry.bind("<Return>", self.on_input_return)
 
         self.generate_btn = ttk.Button(
             input_frame, text="Generar Código", command=self.generate_barcode
         )
         self.generate_btn.grid(row=0, column=2)
 
+        ttk.Label(input_frame, text="Simbología:").grid(
+            row=1, column=0, sticky=tk.W, padx=(0, 10), pady=(5, 0)
+        )
+        symbology_cb = ttk.Combobox(
+            input_frame, textvariable=self.symbology_var,
+            values=list(self.symbology_labels), state="readonly", width=15,
+        )
+        symbology_cb.grid(row=1, column=1, sticky=tk.W, pady=(5, 0))
+        symbology_cb.bind("<<ComboboxSelected>>", self.on_input_change)
+
         # Database table
         db_frame = ttk.LabelFrame(main_frame, text="Base de Datos", padding="10")
         db_frame.grid(
@@ -140,9 +383,19 @@ class BarcodeApp:
             pady=(0, 10),
         )
         db_frame.columnconfigure(0, weight=1)
-        db_frame.rowconfigure(0, weight=1)
+        db_frame.rowconfigure(1, weight=1)
 
-        columns = ("Código", "Fecha/Hora", "Estado", "Imagen")
+        search_frame = ttk.Frame(db_frame)
+        search_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 5))
+        search_frame.columnconfigure(1, weight=1)
+        ttk.Label(search_frame, text="Buscar:").grid(row=0, column=0, padx=(0, 10))
+        self.search_var = tk.StringVar()
+        ttk.Entry(search_frame, textvariable=self.search_var).grid(
+            row=0, column=1, sticky=(tk.W, tk.E)
+        )
+        self.search_var.trace("w", self.on_search_change)
+
+        columns = ("Código", "Tipo", "Fecha/Hora", "Estado", "Imagen")
         self.tree = ttk.Treeview(
             db_frame,
             columns=columns,
@@ -151,26 +404,33 @@ class BarcodeApp:
             selectmode="extended",
         )
         self.tree.heading("Código", text="Código")
+        self.tree.heading("Tipo", text="Tipo")
         self.tree.heading("Fecha/Hora", text="Fecha/Hora")
         self.tree.heading("Estado", text="Estado")
         self.tree.heading("Imagen", text="Imagen")
 
         self.tree.column("Código", width=200)
+        self.tree.column("Tipo", width=90)
         self.tree.column("Fecha/Hora", width=150)
         self.tree.column("Estado", width=100)
         self.tree.column("Imagen", width=100)
 
-        scrollbar = ttk.Scrollbar(
-            db_frame, orient=tk.VERTICAL, command=self.tree.yview
+        scrollbar = ttk.Scrollbar(db_frame, orient=tk.VERTICAL)
+        # Only the visible window of rows is kept in the Treeview
+        self.tree_view = VirtualTreeview(
+            self.tree,
+            scrollbar,
+            count=self.storage.count,
+            fetch=self.storage.page,
+            row_values=self.row_values,
         )
-        self.tree.configure(yscrollcommand=scrollbar.set)
 
-        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
 
         # Buttons
         buttons_frame = ttk.Frame(db_frame)
-        buttons_frame.grid(row=1, column=0, columnspan=2, pady=(10, 0))
+        buttons_frame.grid(row=2, column=0, columnspan=2, pady=(10, 0))
 
         self.view_image_btn = ttk.Button(
             buttons_frame, text="Ver Imagen", command=self.view_selected_image
@@ -187,6 +447,36 @@ class BarcodeApp:
         )
         self.print_btn.grid(row=0, column=2, padx=(0, 10))
 
+        self.plan_btn = ttk.Button(
+            buttons_frame, text="Plan de Impresión", command=self.print_plan_popup
+        )
+        self.plan_btn.grid(row=0, column=3)
+
+        self.import_btn = ttk.Button(
+            buttons_frame, text="Importar Lote", command=self.import_batch
+        )
+        self.import_btn.grid(row=1, column=0, padx=(0, 10), pady=(5, 0))
+
+        self.cancel_jobs_btn = ttk.Button(
+            buttons_frame, text="Cancelar Trabajos", command=self.cancel_jobs
+        )
+        self.cancel_jobs_btn.grid(row=1, column=1, padx=(0, 10), pady=(5, 0))
+
+        self.delete_btn = ttk.Button(
+            buttons_frame, text="Eliminar Código", command=self.delete_selected
+        )
+        self.delete_btn.grid(row=1, column=2, padx=(0, 10), pady=(5, 0))
+
+        self.gc_btn = ttk.Button(
+            buttons_frame, text="Limpiar Imágenes", command=self.cleanup_popup
+        )
+        self.gc_btn.grid(row=1, column=3, pady=(5, 0))
+
+        self.export_btn = ttk.Button(
+            buttons_frame, text="Exportar", command=self.export_records
+        )
+        self.export_btn.grid(row=2, column=0, padx=(0, 10), pady=(5, 0))
+
         self.update_treeview()
 
         self.status_var = tk.StringVar()
@@ -202,20 +492,319 @@ class BarcodeApp:
         settings_frame = ttk.Frame(notebook, padding="10")
         notebook.add(settings_frame, text="Configuración")
 
-        ttk.Label(settings_frame, text="Nombre de la impresora:").grid(
-            row=0, column=0, sticky=tk.W, padx=5, pady=5
+        printer_frame = ttk.LabelFrame(settings_frame, text="Impresora", padding="5")
+        printer_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), padx=5, pady=5)
+        printer_frame.columnconfigure(1, weight=1)
+
+        ttk.Label(printer_frame, text="Perfil:").grid(
+            row=0, column=0, sticky=tk.W, padx=5, pady=3
+        )
+        profile_frame = ttk.Frame(printer_frame)
+        profile_frame.grid(row=0, column=1, sticky=tk.W, padx=5, pady=3)
+        # Editable: typing a new name and saving creates a profile
+        self.profile_cb = ttk.Combobox(
+            profile_frame, textvariable=self.profile_var,
+            values=list(self.settings.profiles), width=20,
+        )
+        self.profile_cb.grid(row=0, column=0)
+        self.profile_cb.bind("<<ComboboxSelected>>", self.on_profile_selected)
+        ttk.Button(
+            profile_frame, text="Guardar perfil", command=self.save_profile
+        ).grid(row=0, column=1, padx=(10, 0))
+        ttk.Button(
+            profile_frame, text="Eliminar", command=self.delete_profile
+        ).grid(row=0, column=2, padx=(5, 0))
+
+        ttk.Label(printer_frame, text="Nombre de la impresora:").grid(
+            row=1, column=0, sticky=tk.W, padx=5, pady=3
+        )
+        printer_name_frame = ttk.Frame(printer_frame)
+        printer_name_frame.grid(row=1, column=1, sticky=(tk.W, tk.E), padx=5, pady=3)
+        printer_name_frame.columnconfigure(0, weight=1)
+        self.printer_cb = ttk.Combobox(
+            printer_name_frame, textvariable=self.printer_name_var, width=40
+        )
+        self.printer_cb.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        ttk.Button(
+            printer_name_frame, text="Buscar",
+            command=lambda: self.validate_profiles(refresh=True),
+        ).grid(row=0, column=1, padx=(10, 0))
+
+        ttk.Label(printer_frame, text="Resolución (dpi):").grid(
+            row=2, column=0, sticky=tk.W, padx=5, pady=3
+        )
+        ttk.Combobox(
+            printer_frame, textvariable=self.dpi_var,
+            values=list(DOTS_PER_MM), state="readonly", width=10,
+        ).grid(row=2, column=1, sticky=tk.W, padx=5, pady=3)
+
+        ttk.Label(printer_frame, text="Ancho de etiqueta (mm):").grid(
+            row=3, column=0, sticky=tk.W, padx=5, pady=3
+        )
+        ttk.Spinbox(
+            printer_frame, from_=10, to=300, increment=0.5,
+            textvariable=self.label_width_var, width=10,
+        ).grid(row=3, column=1, sticky=tk.W, padx=5, pady=3)
+
+        ttk.Label(printer_frame, text="Columnas por etiqueta:").grid(
+            row=4, column=0, sticky=tk.W, padx=5, pady=3
+        )
+        ttk.Spinbox(
+            printer_frame, from_=1, to=6, textvariable=self.columns_var, width=10
+        ).grid(row=4, column=1, sticky=tk.W, padx=5, pady=3)
+
+        ttk.Label(printer_frame, text="Oscuridad (0-30, vacío = la de la impresora):").grid(
+            row=5, column=0, sticky=tk.W, padx=5, pady=3
+        )
+        ttk.Entry(printer_frame, textvariable=self.darkness_var, width=10).grid(
+            row=5, column=1, sticky=tk.W, padx=5, pady=3
+        )
+
+        ttk.Label(printer_frame, text="Velocidad (pulg/s, vacío = la de la impresora):").grid(
+            row=6, column=0, sticky=tk.W, padx=5, pady=3
+        )
+        ttk.Entry(printer_frame, textvariable=self.speed_var, width=10).grid(
+            row=6, column=1, sticky=tk.W, padx=5, pady=3
+        )
+
+        ttk.Label(printer_frame, text="Estado:").grid(
+            row=7, column=0, sticky=tk.W, padx=5, pady=3
+        )
+        ttk.Label(
+            printer_frame, textvariable=self.profile_status_var, wraplength=400
+        ).grid(row=7, column=1, sticky=tk.W, padx=5, pady=3)
+
+        ttk.Checkbutton(
+            settings_frame,
+            text="Generar imágenes bajo demanda (registrar primero, dibujar después)",
+            variable=self.lazy_render_var,
+        ).grid(row=3, column=0, columnspan=2, sticky=tk.W, padx=5, pady=5)
+
+        ttk.Checkbutton(
+            settings_frame,
+            text="Modo escáner (una lectura por código, terminada en Enter o pausa)",
+            variable=self.scanner_mode_var,
+        ).grid(row=4, column=0, columnspan=2, sticky=tk.W, padx=5, pady=5)
+
+        ttk.Label(settings_frame, text="Al escanear:").grid(
+            row=5, column=0, sticky=tk.W, padx=5, pady=5
+        )
+        ttk.Combobox(
+            settings_frame, textvariable=self.scan_action_var,
+            values=SCAN_ACTIONS, state="readonly", width=25,
+        ).grid(row=5, column=1, sticky=tk.W, padx=5, pady=5)
+
+        ttk.Label(settings_frame, text="Pausa de fin de lectura (ms):").grid(
+            row=6, column=0, sticky=tk.W, padx=5, pady=5
         )
-        printer_entry = ttk.Entry(
-            settings_frame, textvariable=self.printer_name_var, width=40
+        ttk.Spinbox(
+            settings_frame, from_=10, to=1000, increment=10,
+            textvariable=self.scan_gap_var, width=10,
+        ).grid(row=6, column=1, sticky=tk.W, padx=5, pady=5)
+
+        ttk.Label(settings_frame, text="Organización de imágenes:").grid(
+            row=7, column=0, sticky=tk.W, padx=5, pady=5
         )
-        printer_entry.grid(
-            row=0, column=1, sticky=(tk.W, tk.E), padx=5, pady=5
+        layout_frame = ttk.Frame(settings_frame)
+        layout_frame.grid(row=7, column=1, sticky=tk.W, padx=5, pady=5)
+        ttk.Combobox(
+            layout_frame, textvariable=self.layout_var,
+            values=list(self.LAYOUT_NAMES.values()), state="readonly", width=20,
+        ).grid(row=0, column=0)
+        ttk.Button(
+            layout_frame, text="Aplicar y migrar", command=self.migrate_images
+        ).grid(row=0, column=1, padx=(10, 0))
+
+        ttk.Label(settings_frame, text="Archivar imágenes con más días que:").grid(
+            row=8, column=0, sticky=tk.W, padx=5, pady=5
+        )
+        pack_frame = ttk.Frame(settings_frame)
+        pack_frame.grid(row=8, column=1, sticky=tk.W, padx=5, pady=5)
+        ttk.Spinbox(
+            pack_frame, from_=1, to=3650, textvariable=self.pack_days_var, width=10,
+        ).grid(row=0, column=0)
+        ttk.Button(
+            pack_frame, text="Archivar", command=self.pack_images
+        ).grid(row=0, column=1, padx=(10, 0))
+
+        ttk.Checkbutton(
+            settings_frame,
+            text="Modo compartido (detectar duplicados de todas las estaciones)",
+            variable=self.shared_mode_var,
+            command=self.toggle_shared_mode,
+        ).grid(row=9, column=0, columnspan=2, sticky=tk.W, padx=5, pady=5)
+
+        ttk.Label(settings_frame, text="Servidor de sincronización:").grid(
+            row=10, column=0, sticky=tk.W, padx=5, pady=5
+        )
+        sync_frame = ttk.Frame(settings_frame)
+        sync_frame.grid(row=10, column=1, sticky=tk.W, padx=5, pady=5)
+        ttk.Entry(sync_frame, textvariable=self.sync_server_var, width=25).grid(row=0, column=0)
+        ttk.Label(sync_frame, textvariable=self.sync_status_var).grid(
+            row=0, column=1, padx=(10, 0)
         )
         settings_frame.columnconfigure(1, weight=1)
 
+        # --- Performance tab ---
+        perf_frame = ttk.Frame(notebook, padding="10")
+        notebook.add(perf_frame, text="Rendimiento")
+        perf_frame.columnconfigure(0, weight=1)
+        perf_frame.rowconfigure(0, weight=1)
+
+        columns = ("count", "mean", "p50", "p95", "max")
+        self.metrics_tree = ttk.Treeview(perf_frame, columns=columns, height=12)
+        self.metrics_tree.heading("#0", text="Métrica")
+        self.metrics_tree.column("#0", width=170)
+        for column, heading in zip(columns, ("N", "Media", "p50", "p95", "Máx")):
+            self.metrics_tree.heading(column, text=heading)
+            self.metrics_tree.column(column, width=80, anchor=tk.E)
+        self.metrics_tree.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
+        metrics_scroll = ttk.Scrollbar(
+            perf_frame, orient=tk.VERTICAL, command=self.metrics_tree.yview
+        )
+        self.metrics_tree.configure(yscrollcommand=metrics_scroll.set)
+        metrics_scroll.grid(row=0, column=2, sticky=(tk.N, tk.S))
+
+        perf_buttons = ttk.Frame(perf_frame)
+        perf_buttons.grid(row=1, column=0, columnspan=3, sticky=tk.W, pady=(10, 0))
+        self.profile_btn = ttk.Button(
+            perf_buttons, text="Iniciar perfil (cProfile)", command=self.toggle_profile
+        )
+        self.profile_btn.grid(row=0, column=0, padx=(0, 10))
+        ttk.Button(
+            perf_buttons, text="Guardar métricas (JSON)", command=self.save_metrics
+        ).grid(row=0, column=1, padx=(0, 10))
+        ttk.Button(
+            perf_buttons, text="Reiniciar", command=self.reset_metrics
+        ).grid(row=0, column=2)
+
+        self.refresh_metrics()
+
+    def toggle_shared_mode(self):
+        """Join or leave the sync service of the station line."""
+        if self.sync is not None:
+            self.sync.close(wait=False)
+            self.sync = None
+        if self.sync_after is not None:
+            self.root.after_cancel(self.sync_after)
+            self.sync_after = None
+        if not self.shared_mode_var.get():
+            self.sync_status_var.set("Desactivado")
+            return
+        from barcode_core.sync import SyncClient
+
+        try:
+            client = SyncClient(
+                self.sync_server_var.get(),
+                folder=os.path.dirname(os.path.abspath(self.db_file)),
+            )
+        except ValueError as e:
+            messagebox.showerror("Error", f"Servidor de sincronización no válido: {e}")
+            self.shared_mode_var.set(False)
+            return
+        if client.first_run:
+            # Share the codes registered before this station joined
+            self.jobs.submit("Compartiendo registros", lambda job: client.push(self.storage))
+        self.sync = client
+        client.start()
+        self.refresh_sync_status()
+
+    def refresh_sync_status(self):
+        if self.sync is None:
+            return
+        status = self.sync.status()
+        if status["connected"]:
+            text = f"Conectado: {status['remote_codes']} códigos compartidos"
+        else:
+            text = f"Sin conexión ({status['error'] or 'conectando'})"
+        if status["pending"]:
+            text += f", {status['pending']} por enviar"
+        self.sync_status_var.set(text)
+        self.sync_after = self.root.after(1000, self.refresh_sync_status)
+
+    def refresh_metrics(self):
+        """Redraw the performance tab once a second."""
+        try:
+            snapshot = metrics.snapshot()
+            if self.spooler is not None:
+                stats = self.spooler.stats()
+                snapshot["counters"]["print_queue_depth"] = stats["queue_depth"]
+            rows = [
+                (name, [histogram["count"]] + [
+                    format_metric(histogram[key]) for key in ("mean", "p50", "p95", "max")
+                ])
+                for name, histogram in snapshot["histograms"].items()
+            ]
+            rows += [
+                (name, [value, "", "", "", ""])
+                for name, value in sorted(snapshot["counters"].items())
+            ]
+            tree = self.metrics_tree
+            existing = tree.get_children()
+            for i, (name, values) in enumerate(rows):
+                if i < len(existing):
+                    tree.item(existing[i], text=name, values=values)
+                else:
+                    tree.insert("", tk.END, text=name, values=values)
+            if len(existing) > len(rows):
+                tree.delete(*existing[len(rows):])
+        finally:
+            self.metrics_after = self.root.after(1000, self.refresh_metrics)
+
+    def toggle_profile(self):
+        """Start or stop a cProfile capture of the Tk thread."""
+        if not self.profiler.running:
+            self.profiler.start()
+            self.profile_btn.config(text="Detener perfil")
+            self.status_var.set("Perfil en curso: use la aplicación y pulse 'Detener perfil'")
+            return
+        self.profile_btn.config(text="Iniciar perfil (cProfile)")
+        path = filedialog.asksaveasfilename(
+            title="Guardar perfil",
+            defaultextension=".prof",
+            initialfile=f"perfil_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof",
+            filetypes=[("cProfile", "*.prof"), ("Todos", "*.*")],
+        )
+        try:
+            summary = self.profiler.stop(path or None)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo guardar el perfil: {e}")
+            return
+        self.status_var.set(f"Perfil guardado en {path}" if path else "Perfil descartado")
+
+        popup = tk.Toplevel(self.root)
+        popup.title("Perfil: funciones más costosas")
+        popup.geometry("800x450")
+        text = tk.Text(popup, wrap=tk.NONE, font=("Courier", 9))
+        text.pack(fill="both", expand=True)
+        text.insert("1.0", summary)
+        text.configure(state=tk.DISABLED)
+
+    def save_metrics(self):
+        path = filedialog.asksaveasfilename(
+            title="Guardar métricas",
+            defaultextension=".json",
+            initialfile=f"metricas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            filetypes=[("JSON", "*.json"), ("Todos", "*.*")],
+        )
+        if not path:
+            return
+        try:
+            metrics.dump(path)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudieron guardar las métricas: {e}")
+            return
+        self.status_var.set(f"Métricas guardadas en {path}")
+
+    def reset_metrics(self):
+        metrics.reset()
+        if self.metrics_after is not None:
+            self.root.after_cancel(self.metrics_after)
+        self.refresh_metrics()
+
     def choose_codes_popup(self):
         """Popup with two dropdowns and a quantity to choose codes before printing."""
-        if not self.barcode_list:
+        if not self.storage.count():
             messagebox.showwarning("Advertencia", "La base de datos está vacía")
             return
 
@@ -227,17 +816,26 @@ class BarcodeApp:
         ttk.Label(popup, text="Código derecha:").grid(row=1, column=0, padx=10, pady=10, sticky=tk.W)
         ttk.Label(popup, text="Cantidad de filas:").grid(row=2, column=0, padx=10, pady=10, sticky=tk.W)
 
-        codes = [item["code"] for item in self.barcode_list]
-
         left_var = tk.StringVar()
         right_var = tk.StringVar()
         qty_var = tk.IntVar(value=1)
 
-        left_cb = ttk.Combobox(popup, textvariable=left_var, values=codes, state="readonly")
+        # Editable comboboxes whose list follows what is typed, instead of
+        # loading every code into the widget
+        def autocomplete(combobox, var):
+            def update(event=None):
+                combobox["values"] = self.suggest_codes(var.get())
+
+            combobox.configure(postcommand=update)
+            combobox.bind("<KeyRelease>", update)
+
+        left_cb = ttk.Combobox(popup, textvariable=left_var)
         left_cb.grid(row=0, column=1, padx=10, pady=10, sticky=(tk.W, tk.E))
+        autocomplete(left_cb, left_var)
 
-        right_cb = ttk.Combobox(popup, textvariable=right_var, values=codes, state="readonly")
+        right_cb = ttk.Combobox(popup, textvariable=right_var)
         right_cb.grid(row=1, column=1, padx=10, pady=10, sticky=(tk.W, tk.E))
+        autocomplete(right_cb, right_var)
 
         qty_spin = ttk.Spinbox(popup, from_=1, to=500, textvariable=qty_var, width=10)
         qty_spin.grid(row=2, column=1, padx=10, pady=10, sticky=tk.W)
@@ -250,6 +848,12 @@ class BarcodeApp:
             if not left_code and not right_code:
                 messagebox.showwarning("Advertencia", "Debe seleccionar al menos un código")
                 return
+            for code in (left_code, right_code):
+                if code and not self.storage.exists(code):
+                    messagebox.showwarning(
+                        "Advertencia", f"El código '{code}' no existe en la base de datos"
+                    )
+                    return
 
             self.print_barcode(left_code, right_code, qty)
             popup.destroy()
@@ -257,89 +861,459 @@ class BarcodeApp:
         btn = ttk.Button(popup, text="Imprimir", command=confirm)
         btn.grid(row=3, column=0, columnspan=2, pady=20)
 
+    def show_profile(self, name):
+        """Fill the printer fields with the stored profile ``name``."""
+        profile = self.settings.profiles[name]
+        self.profile_var.set(name)
+        self.printer_name_var.set(profile.target)
+        self.dpi_var.set(profile.dpi)
+        self.label_width_var.set(profile.label_width_mm)
+        self.columns_var.set(profile.columns)
+        self.darkness_var.set("" if profile.darkness is None else profile.darkness)
+        self.speed_var.set("" if profile.speed is None else profile.speed)
+        self.show_profile_status(name)
+
+    def show_profile_status(self, name):
+        if name not in self.profile_errors:
+            self.profile_status_var.set("Sin comprobar")
+        else:
+            self.profile_status_var.set(self.profile_errors[name] or "Impresora encontrada")
+
+    def edited_profile(self):
+        """Profile with the values of the printer fields. Raises ``ValueError``."""
+
+        def optional_int(var, label):
+            text = var.get().strip()
+            if not text:
+                return None
+            if not text.isdigit():
+                raise ValueError(f"La {label} debe ser un número entero")
+            return int(text)
+
+        try:
+            profile = PrinterProfile(
+                self.profile_var.get().strip() or DEFAULT_PROFILE,
+                target=self.printer_name_var.get().strip(),
+                dpi=self.dpi_var.get(),
+                label_width_mm=self.label_width_var.get(),
+                columns=self.columns_var.get(),
+                darkness=optional_int(self.darkness_var, "oscuridad"),
+                speed=optional_int(self.speed_var, "velocidad"),
+            )
+        except tk.TclError as e:
+            raise ValueError(f"Valor no válido en la configuración de la impresora: {e}") from None
+        profile.validate(lookup=False)
+        return profile
+
+    def on_profile_selected(self, event=None):
+        name = self.profile_var.get()
+        self.show_profile(name)
+        self.settings.active = name
+        self.write_settings()
+
+    def save_profile(self):
+        try:
+            profile = self.edited_profile()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.settings.put_profile(profile)
+        if not self.write_settings():
+            return
+        self.profile_cb.configure(values=list(self.settings.profiles))
+        self.status_var.set(f"Perfil '{profile.name}' guardado")
+        self.validate_profiles([profile])
+
+    def delete_profile(self):
+        name = self.profile_var.get().strip()
+        if name not in self.settings.profiles:
+            messagebox.showwarning("Advertencia", f"El perfil '{name}' no está guardado")
+            return
+        if not messagebox.askyesno("Confirmar", f"¿Eliminar el perfil de impresora '{name}'?"):
+            return
+        try:
+            self.settings.remove_profile(name)
+        except ValueError as e:
+            messagebox.showwarning("Advertencia", str(e))
+            return
+        self.profile_errors.pop(name, None)
+        self.write_settings()
+        self.profile_cb.configure(values=list(self.settings.profiles))
+        self.show_profile(self.settings.active)
+
+    def validate_profiles(self, profiles=None, refresh=False):
+        """Look up the printers of ``profiles`` (all by default) on a worker.
+
+        The printer list stays cached (``printing.printers``) and, when the
+        active profile is fine, its spooler connects right away, so the first
+        print does not pay for either lookup.
+        """
+        if profiles is None:
+            profiles = list(self.settings.profiles.values())
+
+        def run(job):
+            if refresh:
+                printers.refresh()
+            return printers.names(), validate_profiles(profiles)
+
+        def done(result):
+            names, errors = result
+            self.profile_errors.update(errors)
+            if names:
+                self.printer_cb.configure(values=names)
+            self.show_profile_status(self.profile_var.get())
+            active = self.settings.profile
+            if active.name not in errors:
+                return
+            if errors[active.name]:
+                self.status_var.set(errors[active.name])
+            else:
+                self.get_spooler(active)
+
+        self.jobs.submit("Impresoras", run, on_done=done)
+
+    def label_layout(self, profile=None):
+        """Layout of the edited printer profile. Raises ``ValueError``."""
+        profile = profile or self.edited_profile()
+        return profile.layout(self.current_symbology().name)
+
+    def print_plan_popup(self):
+        """Popup to print many codes at once, one 'CODE, copies' per line."""
+        popup = tk.Toplevel(self.root)
+        popup.title("Plan de impresión")
+        popup.geometry("450x400")
+        popup.columnconfigure(0, weight=1)
+        popup.rowconfigure(1, weight=1)
+
+        ttk.Label(
+            popup, text="Un código por línea, opcionalmente con copias (ABC123, 10):"
+        ).grid(row=0, column=0, columnspan=2, padx=10, pady=(10, 5), sticky=tk.W)
+
+        text = tk.Text(popup, height=12, width=40)
+        text.grid(row=1, column=0, padx=(10, 0), pady=5, sticky=(tk.W, tk.E, tk.N, tk.S))
+        text_scroll = ttk.Scrollbar(popup, orient=tk.VERTICAL, command=text.yview)
+        text.configure(yscrollcommand=text_scroll.set)
+        text_scroll.grid(row=1, column=1, padx=(0, 10), pady=5, sticky=(tk.N, tk.S))
+
+        summary_var = tk.StringVar(value="")
+        ttk.Label(popup, textvariable=summary_var).grid(
+            row=2, column=0, columnspan=2, padx=10, pady=5, sticky=tk.W
+        )
+
+        def make_plan():
+            try:
+                entries = parse_plan_lines(text.get("1.0", tk.END).splitlines())
+                layout = self.label_layout()
+            except (ValueError, tk.TclError) as e:
+                messagebox.showwarning("Advertencia", str(e), parent=popup)
+                return None
+            if not entries:
+                messagebox.showwarning(
+                    "Advertencia", "Debe ingresar al menos un código", parent=popup
+                )
+                return None
+            try:
+                plan = PrintPlan(entries, layout)
+            except ValueError as e:
+                messagebox.showwarning("Advertencia", str(e), parent=popup)
+                return None
+            summary_var.set(plan.summary())
+            return plan
+
+        def confirm():
+            plan = make_plan()
+            if plan:
+                self.print_plan(plan)
+                popup.destroy()
+
+        buttons = ttk.Frame(popup)
+        buttons.grid(row=3, column=0, columnspan=2, pady=10)
+        ttk.Button(buttons, text="Calcular", command=make_plan).grid(row=0, column=0, padx=5)
+        ttk.Button(buttons, text="Imprimir", command=confirm).grid(row=0, column=1, padx=5)
+
     def on_input_change(self, *args):
+        # Typing pauses the background pre-rendering
+        self.prerender.touch()
+        if self.scanner_mode_var.get():
+            self.on_scan_input()
+            return
         current_input = self.input_var.get().strip()
         if current_input:
-            exists = any(item["code"] == current_input for item in self.barcode_list)
-            if exists:
-                self.status_var.set(f"El código '{current_input}' ya existe en la base de datos")
+            symbology = self.current_symbology()
+            try:
+                current_input = symbology.normalize(current_input)
+            except ValueError as e:
+                self.status_var.set(
+                    f"'{current_input}' no es válido para {symbology.label}: {e}"
+                )
+                return
+            where = self.duplicate_of(current_input)
+            if where:
+                self.status_var.set(f"El código '{current_input}' ya existe en {where}")
             else:
                 self.status_var.set(f"El código '{current_input}' es nuevo")
         else:
             self.status_var.set("Listo")
 
+    def on_scan_input(self):
+        # No lookups per keystroke: only note the timing and wait for the end
+        self.scan_buffer.update(len(self.input_var.get()))
+        if self.scan_after is not None:
+            self.root.after_cancel(self.scan_after)
+            self.scan_after = None
+        if self.scan_buffer.length:
+            self.scan_after = self.root.after(self.scan_gap(), self.on_scan_idle)
+
+    def scan_gap(self):
+        try:
+            return max(10, int(self.scan_gap_var.get()))
+        except (tk.TclError, ValueError):
+            return 50
+
+    def on_scan_idle(self):
+        self.scan_after = None
+        # Typed by hand: wait for Enter instead of cutting the code short
+        if self.scan_buffer.is_burst():
+            self.finish_scan()
+
+    def on_input_return(self, event=None):
+        if self.scanner_mode_var.get():
+            self.finish_scan()
+            return "break"
+
+    def finish_scan(self):
+        """Handle the entry's content as one completed scan."""
+        if self.scan_after is not None:
+            self.root.after_cancel(self.scan_after)
+            self.scan_after = None
+        text = clean_code(self.input_var.get())
+        # Clearing the entry triggers on_input_change, which resets the buffer
+        self.input_var.set("")
+        if not text:
+            return
+        self.scan_count += 1
+        symbology = self.current_symbology()
+        try:
+            text = symbology.normalize(text)
+        except ValueError as e:
+            self.root.bell()
+            self.status_var.set(
+                f"[{self.scan_count}] '{text}' no es válido para {symbology.label}: {e}"
+            )
+            return
+        action = self.scan_action_var.get()
+        where = self.duplicate_of(text)
+        if action == SCAN_VERIFY:
+            state = f"ya existe en {where}" if where else "es nuevo"
+            self.status_var.set(f"[{self.scan_count}] El código '{text}' {state}")
+            return
+        if action == SCAN_PRINT:
+            # The label is ZPL built from the code, so it does not wait for the image
+            self.print_barcode(text, None, 1, symbologies=(symbology.name, None))
+        if where:
+            if action == SCAN_GENERATE:
+                # No dialog: it would block the station while scanning continues
+                self.root.bell()
+                self.status_var.set(
+                    f"[{self.scan_count}] El código '{text}' ya existe en {where} (no se generó)"
+                )
+            return
+        self.register_code(text, symbology.name)
+
     def generate_barcode(self):
-        text = self.input_var.get().strip().replace(" ", "").replace("\n", "").replace("/", "")
+        text = clean_code(self.input_var.get())
         if not text:
             messagebox.showwarning(
                 "Advertencia", "Ingrese un texto para generar código"
             )
             return
-        if any(item["code"] == text for item in self.barcode_list):
+        symbology = self.current_symbology()
+        try:
+            text = symbology.normalize(text)
+        except ValueError as e:
+            messagebox.showwarning(
+                "Advertencia", f"El código '{text}' no es válido para {symbology.label}: {e}"
+            )
+            return
+        where = self.duplicate_of(text)
+        if where:
             result = messagebox.askyesno(
                 "Código existente",
-                f"El código '{text}' ya existe en la base de datos. ¿Generar de todas formas?",
+                f"El código '{text}' ya existe en {where}. ¿Generar de todas formas?",
             )
             if not result:
                 return
-        try:
-            code128_barcode = barcode.get("code128", text, writer=ImageWriter())
-            safe_text = self.sanitize_filename(text)
-            filename = (
-                f"barcode_{safe_text}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            )
-            filepath = os.path.join(self.codes_folder, filename)
-            code128_barcode.save(filepath, options={"write_text": False})
-
-            self.save_to_database(text, filename)
-            self.update_treeview()
-            self.input_var.set("")
-            messagebox.showinfo(
-                "Éxito",
-                f"Código generado y guardado como '{filename}.png' en la carpeta codes",
+        # Free the entry right away so the next code can be typed or scanned
+        self.input_var.set("")
+        self.register_code(text, symbology.name)
+
+    def register_code(self, text, symbology=None):
+        """Render ``text`` (already normalized for ``symbology``) in the
+        background (or defer it) and store it."""
+        if self.lazy_render_var.get():
+            filename = make_filename(text)
+            record = self.save_to_database(text, filename, symbology)
+            if record:
+                self.prerender.add(text, filename, symbology)
+                self.show_new_records([record])
+                self.status_var.set(f"Código '{text}' registrado (imagen pendiente)")
+            return
+
+        def render(job):
+            with metrics.timer("render_ms"):
+                return render_png(text, self.codes_folder, symbology=symbology)
+
+        def done(filename):
+            self.pending_codes.discard(text)
+            metrics.incr("codes_generated")
+            record = self.save_to_database(text, filename, symbology)
+            if record:
+                self.show_new_records([record])
+            self.status_var.set(
+                f"Código generado y guardado como '{filename}.png' en la carpeta codes"
             )
-            self.status_var.set("Código generado con éxito")
-        except Exception as e:
+
+        def failed(e):
+            self.pending_codes.discard(text)
+            metrics.incr("render_errors")
             messagebox.showerror("Error", f"Error generando código: {e}")
             self.status_var.set("Error generando código")
 
+        self.pending_codes.add(text)
+        self.jobs.submit(
+            f"Generar '{text}'",
+            render,
+            on_done=done,
+            on_error=failed,
+            on_cancel=lambda: self.pending_codes.discard(text),
+        )
+
+    def import_batch(self):
+        """Import a CSV/text file of codes without blocking the window."""
+        if self.batch_job is not None:
+            self.batch_job.cancel()
+            self.status_var.set("Cancelando importación...")
+            return
+        path = filedialog.askopenfilename(
+            title="Seleccionar archivo de códigos",
+            filetypes=[("CSV o texto", "*.csv *.tsv *.txt"), ("Todos", "*.*")],
+        )
+        if not path:
+            return
+
+        lazy = self.lazy_render_var.get()
+        symbology = self.current_symbology().name
+
+        def run(job):
+            return import_codes(
+                iter_codes(path),
+                self.storage,
+                self.codes_folder,
+                progress=lambda state: job.report(state.summary()),
+                cancel=job.cancel_event,
+                render=not lazy,
+                symbology=symbology,
+            )
+
+        def finish():
+            self.batch_job = None
+            self.import_btn.config(text="Importar Lote")
+
+        def done(state):
+            finish()
+            if lazy:
+                self.prerender.add_many(state.records)
+            if self.sync is not None:
+                self.sync.push(state.records)
+            self.show_new_records(state.records)
+            self.status_var.set(f"Importación terminada: {state.summary()}")
+            summary = state.summary()
+            if state.errors:
+                summary += "\n\n" + describe_errors(state.errors)
+            messagebox.showinfo("Importar Lote", summary)
+
+        def failed(e):
+            finish()
+            messagebox.showerror("Error", f"Error importando lote: {e}")
+            self.status_var.set("Error importando lote")
+
+        self.batch_job = self.jobs.submit(
+            "Importando",
+            run,
+            on_done=done,
+            on_error=failed,
+            on_cancel=finish,
+        )
+        self.import_btn.config(text="Cancelar Importación")
+        self.status_var.set("Importando...")
+
+    def pump_jobs(self):
+        """Deliver background job results on the Tk thread."""
+        try:
+            self.jobs.pump()
+            active = self.jobs.active()
+            if active:
+                job = active[0]
+                msg = f"{job.name}: {job.progress}" if job.progress else f"{job.name}..."
+                if len(active) > 1:
+                    msg += f" (+{len(active) - 1} en cola)"
+                self.status_var.set(msg)
+        finally:
+            self.root.after(50, self.pump_jobs)
+
+    def cancel_jobs(self):
+        active = self.jobs.active()
+        if not active:
+            self.status_var.set("No hay trabajos en curso")
+            return
+        self.jobs.cancel_all()
+        self.status_var.set(f"Cancelando {len(active)} trabajo(s)...")
+
     def view_selected_image(self):
         selected_item = self.tree.selection()
         if not selected_item:
             messagebox.showwarning("Advertencia", "Seleccione un código para ver la imagen")
             return
-        item_values = self.tree.item(selected_item[0])["values"]
-        if len(item_values) >= 4:
-            code = item_values[0]
-            for item in self.barcode_list:
-                if item["code"] == code:
-                    self.open_image(item["filename"])
-                    return
+        record = self.tree_view.record_for(selected_item[0])
+        if record:
+            self.open_image(record["filename"], record["code"], record["symbology"])
+            return
         messagebox.showwarning("Advertencia", "No hay imagen asociada a esta entrada")
 
-    def open_image(self, filename):
+    def open_image(self, filename, code=None, symbology=None):
         if not filename:
             messagebox.showwarning("Advertencia", "No hay imagen asociada a esta entrada")
             return
-        filepath = os.path.join(self.codes_folder, filename + ".png")
+        filepath = self.images.materialize(filename)
+        if code and filepath is None:
+            # Deferred image (lazy mode or deleted file): render it now
+            try:
+                filepath = self.prerender.ensure(code, filename, symbology)
+            except Exception as e:
+                messagebox.showerror("Error", f"Error generando código: {e}")
+                return
+            self.tree_view.redraw()
+        if filepath is None:
+            filepath = self.images.path(filename)
         if not os.path.exists(filepath):
             messagebox.showerror("Error", f"No se encontró la imagen: {filepath}")
             return
         try:
-            if platform.system() == "Windows":
+            if sys.platform == "win32":
                 os.startfile(filepath)
-            elif platform.system() == "Darwin":
-                subprocess.run(["open", filepath])
             else:
-                subprocess.run(["xdg-open", filepath])
+                import subprocess
+
+                opener = "open" if sys.platform == "darwin" else "xdg-open"
+                subprocess.run([opener, filepath])
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo abrir la imagen: {e}")
 
     def clean_database(self):
-        if not self.barcode_list:
+        if not self.storage.count():
             messagebox.showinfo("Info", "La base de datos ya está vacía")
             return
-        count = len(self.barcode_list)
+        count = self.storage.count()
         result = messagebox.askyesno(
             "Confirmar limpieza",
             f"Esto eliminará permanentemente:\n"
@@ -350,86 +1324,513 @@ class BarcodeApp:
         if not result:
             return
         try:
-            deleted_images = 0
-            for item in self.barcode_list:
-                if item["filename"]:
-                    filepath = os.path.join(
-                        self.codes_folder, item["filename"] + ".png"
-                    )
-                    if os.path.exists(filepath):
-                        os.remove(filepath)
-                        deleted_images += 1
-            if os.path.exists(self.db_file):
-                os.remove(self.db_file)
-            self.barcode_list = []
-            self.update_treeview()
-            messagebox.showinfo(
-                "Base de datos limpiada",
-                f"Se eliminaron:\n"
-                f"• {count} entradas de la base de datos\n"
-                f"• {deleted_images} imágenes",
-            )
-            self.status_var.set("Base de datos limpiada")
+            self.storage.clear()
+            cleared_at = time.time()
         except Exception as e:
             messagebox.showerror("Error", f"Error limpiando base de datos: {e}")
             self.status_var.set("Error limpiando base de datos")
+            return
+        if self.code_index is not None:
+            self.code_index = CodeIndex()
+        self.index_backlog = []
+        self.update_treeview()
+        self.status_var.set("Base de datos limpiada; eliminando imágenes...")
 
-    def update_treeview(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        for item in self.barcode_list:
-            status = "Existe"
-            has_image = "Sí" if item["filename"] else "No"
-            self.tree.insert(
-                "", "end", values=(item["code"], item["timestamp"], status, has_image)
+        # The records are gone, so the images go too; the files are removed
+        # in parallel off the Tk thread. Images written after the clear, or
+        # used by codes registered since, are kept
+        def run(job):
+            get_render_cache(self.codes_folder).clear()
+            self.images.clear()
+            images, _, _ = diff_images(
+                self.storage, self.images.scan(), min_age=0, now=cleared_at
             )
+            return delete_files(images, cancelled=lambda: job.cancelled)
+
+        def done(result):
+            files, _, errors = result
+            message = f"Se eliminaron:\n• {count} entradas de la base de datos\n• {files} imágenes"
+            if errors:
+                message += f"\n• {len(errors)} imágenes no se pudieron eliminar"
+            messagebox.showinfo("Base de datos limpiada", message)
+            self.status_var.set("Base de datos limpiada")
+
+        def failed(e):
+            messagebox.showerror("Error", f"Error eliminando imágenes: {e}")
+            self.status_var.set("Error eliminando imágenes")
+
+        self.jobs.submit("Limpiar imágenes", run, on_done=done, on_error=failed)
 
-    def print_barcode(self, left_text=None, right_text=None, qty=1):
-        """Send ZPL barcode(s) to printer with quantity support."""
+    def export_records(self):
+        """Export the records shown (all, or the search results) to a file."""
+        path = filedialog.asksaveasfilename(
+            title="Exportar",
+            defaultextension=".csv",
+            filetypes=[
+                ("CSV", "*.csv"),
+                ("JSON Lines", "*.jsonl"),
+                ("Imágenes en ZIP", "*.zip"),
+                ("Hoja de etiquetas PDF", "*.pdf"),
+            ],
+        )
+        if not path:
+            return
+        codes = self.filter_codes if self.search_var.get().strip() else None
+
+        def run(job):
+            errors = []
+            count = export(
+                self.storage,
+                path,
+                codes=codes,
+                folder=self.codes_folder,
+                cancelled=lambda: job.cancelled,
+                on_progress=lambda count: job.report(f"Exportando: {count} registros"),
+                on_error=lambda name, error: errors.append((name, error)),
+            )
+            return count, errors
+
+        def done(result):
+            count, errors = result
+            self.status_var.set(f"{count} registros exportados a {os.path.basename(path)}")
+            if errors:
+                messagebox.showwarning(
+                    "Exportar",
+                    f"{len(errors)} registros no se exportaron:\n" + describe_errors(errors),
+                )
+
+        def failed(e):
+            messagebox.showerror("Error", f"Error exportando: {e}")
+            self.status_var.set("Error exportando")
+
+        self.status_var.set("Exportando...")
+        self.jobs.submit(
+            "Exportar", run, on_done=done, on_error=failed, on_progress=self.status_var.set
+        )
+
+    def migrate_images(self):
+        """Move the images to the chosen layout while the app keeps working."""
+        names = {name: layout for layout, name in self.LAYOUT_NAMES.items()}
+        layout = names[self.layout_var.get()]
+        if layout == self.images.layout:
+            self.status_var.set("Las imágenes ya usan esa organización")
+            return
+
+        def run(job):
+            return self.images.migrate(
+                layout,
+                cancelled=lambda: job.cancelled,
+                on_progress=lambda done, total: job.report(
+                    f"Migrando imágenes: {done}/{total}"
+                ),
+            )
+
+        def done(moved):
+            self.status_var.set(f"Migración terminada: {moved} imágenes movidas")
+
+        def failed(e):
+            messagebox.showerror("Error", f"Error migrando imágenes: {e}")
+            self.status_var.set("Error migrando imágenes")
+
+        self.jobs.submit(
+            "Migrar imágenes", run,
+            on_done=done, on_error=failed, on_progress=self.status_var.set,
+        )
+
+    def pack_images(self):
+        """Move old images into the archive pack in the background."""
         try:
-            zpl = "^XA\n"
-            if left_text:
-                zpl += f"^FO50,50^BY2.5,2,80^BCN,80,Y,N,N^FD{left_text}^FS\n"
-            if right_text:
-                zpl += f"^FO500,50^BY2.5,2,80^BCN,80,Y,N,N^FD{right_text}^FS\n"
-            zpl += f"^PQ{qty}\n"
-            zpl += "^XZ"
-
-            printer_name = self.printer_name_var.get().strip()
-            if not printer_name:
-                messagebox.showerror("Error", "El nombre de la impresora está vacío. Configúrelo en la pestaña Configuración.")
+            days = max(1, int(self.pack_days_var.get()))
+        except (tk.TclError, ValueError):
+            messagebox.showwarning("Advertencia", "Ingrese un número de días válido")
+            return
+
+        def run(job):
+            return self.images.pack_images(
+                older_than_days=days,
+                cancelled=lambda: job.cancelled,
+                on_progress=lambda done, total: job.report(
+                    f"Archivando imágenes: {done}/{total}"
+                ),
+            )
+
+        def done(result):
+            files, size = result
+            self.status_var.set(
+                f"{files} imágenes archivadas ({format_bytes(size)}) en {self.images.pack.path}"
+            )
+
+        def failed(e):
+            messagebox.showerror("Error", f"Error archivando imágenes: {e}")
+            self.status_var.set("Error archivando imágenes")
+
+        self.jobs.submit(
+            "Archivar imágenes", run,
+            on_done=done, on_error=failed, on_progress=self.status_var.set,
+        )
+
+    def cleanup_popup(self):
+        """Delete orphan images and apply retention policies in the background."""
+        popup = tk.Toplevel(self.root)
+        popup.title("Limpiar imágenes")
+
+        days_var = tk.StringVar()
+        latest_var = tk.BooleanVar(value=False)
+        dry_run_var = tk.BooleanVar(value=False)
+
+        ttk.Label(popup, text="Conservar últimos N días (vacío = todos):").grid(
+            row=0, column=0, padx=10, pady=10, sticky=tk.W
+        )
+        ttk.Entry(popup, textvariable=days_var, width=10).grid(
+            row=0, column=1, padx=10, pady=10, sticky=tk.W
+        )
+        ttk.Checkbutton(
+            popup, text="Conservar solo la entrada más reciente de cada código",
+            variable=latest_var,
+        ).grid(row=1, column=0, columnspan=2, padx=10, pady=5, sticky=tk.W)
+        ttk.Checkbutton(
+            popup, text="Solo simular (no eliminar nada)", variable=dry_run_var,
+        ).grid(row=2, column=0, columnspan=2, padx=10, pady=5, sticky=tk.W)
+        ttk.Label(
+            popup,
+            text="Las imágenes sin entrada en la base de datos siempre se eliminan.",
+        ).grid(row=3, column=0, columnspan=2, padx=10, pady=5, sticky=tk.W)
+
+        def confirm():
+            days = days_var.get().strip()
+            try:
+                keep_days = int(days) if days else None
+            except ValueError:
+                keep_days = -1
+            if keep_days is not None and keep_days < 0:
+                messagebox.showwarning("Advertencia", "Ingrese un número de días válido")
                 return
+            keep_latest = latest_var.get()
+            dry_run = dry_run_var.get()
+            if not dry_run and (keep_days is not None or keep_latest):
+                if not messagebox.askyesno(
+                    "Confirmar limpieza",
+                    "Se eliminarán permanentemente las entradas fuera de la política "
+                    "de retención y sus imágenes.\n\n¿Está seguro de continuar?",
+                    parent=popup,
+                ):
+                    return
+            popup.destroy()
+            self.run_cleanup(keep_days, keep_latest, dry_run)
+
+        ttk.Button(popup, text="Limpiar", command=confirm).grid(
+            row=4, column=0, columnspan=2, pady=15
+        )
+
+    def run_cleanup(self, keep_days, keep_latest, dry_run):
+        def run(job):
+            return collect_garbage(
+                self.storage,
+                self.codes_folder,
+                keep_days=keep_days,
+                keep_latest=keep_latest,
+                dry_run=dry_run,
+                cancelled=lambda: job.cancelled,
+                on_progress=lambda done, total: job.report(
+                    f"Eliminando imágenes: {done}/{total}"
+                ),
+            )
+
+        def done(report):
+            if report.pruned:
+                if self.code_index is not None:
+                    for code in {record["code"] for record in report.pruned}:
+                        if not self.storage.exists(code):
+                            self.code_index.remove(code)
+                self.update_treeview()
+            if report.missing and not dry_run:
+                # Records whose image is gone are drawn again when idle
+                self.prerender.add_many(report.missing)
+                self.schedule_redraw()
+            summary = report.summary()
+            self.status_var.set(summary)
+            messagebox.showinfo("Limpiar imágenes", summary)
+
+        def failed(e):
+            messagebox.showerror("Error", f"Error limpiando imágenes: {e}")
+            self.status_var.set("Error limpiando imágenes")
+
+        self.status_var.set("Buscando imágenes huérfanas...")
+        self.jobs.submit(
+            "Limpiar imágenes",
+            run,
+            on_done=done,
+            on_error=failed,
+            on_progress=self.status_var.set,
+        )
+
+    def delete_selected(self):
+        """Delete every record of the selected codes, keeping the rest of the history."""
+        records = [self.tree_view.record_for(iid) for iid in self.tree.selection()]
+        codes = list(dict.fromkeys(record["code"] for record in records if record))
+        if not codes:
+            messagebox.showwarning("Advertencia", "Por favor seleccione un código")
+            return
+        shown = "\n".join(f"• {code}" for code in codes[:10])
+        if len(codes) > 10:
+            shown += f"\n• ... y {len(codes) - 10} más"
+        if not messagebox.askyesno(
+            "Confirmar eliminación",
+            f"Se eliminarán todas las entradas e imágenes de:\n{shown}\n\n"
+            f"¿Está seguro de continuar?",
+        ):
+            return
+        try:
+            removed = self.storage.delete(codes)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error eliminando códigos: {e}")
+            return
+        if self.code_index is not None:
+            for code in codes:
+                self.code_index.remove(code)
+        deleted_images = 0
+        try:
+            deleted_images, _ = self.images.remove_many(
+                record["filename"] for record in removed if record["filename"]
+            )
+        except OSError as e:
+            messagebox.showwarning("Advertencia", f"Error eliminando imágenes: {e}")
+        # The selected rows are gone and their ids may now belong to others
+        self.tree.selection_remove(self.tree.selection())
+        self.update_treeview()
+        self.status_var.set(
+            f"Se eliminaron {len(removed)} entradas y {deleted_images} imágenes"
+        )
+
+    def row_values(self, item):
+        status = "Existe"
+        if not item["filename"]:
+            has_image = "No"
+        elif self.prerender.is_pending(item["filename"]):
+            has_image = "Pendiente"
+        elif self.images.exists(item["filename"]):
+            has_image = "Sí"
+        else:
+            # E.g. lazy records whose image was never rendered last session
+            has_image = "No"
+        label = get_symbology(item["symbology"]).label
+        return (item["code"], label, item["timestamp"], status, has_image)
+
+    def schedule_redraw(self):
+        """Refresh the Imagen column soon, batching background renders."""
+        if not self.redraw_scheduled:
+            self.redraw_scheduled = True
+            self.root.after(250, self.redraw_tree)
+
+    def redraw_tree(self):
+        self.redraw_scheduled = False
+        self.tree_view.redraw()
+
+    def show_new_records(self, records):
+        self.index_codes(record["code"] for record in records)
+        if self.search_var.get().strip():
+            # New rows may or may not match the active search
+            self.apply_filter()
+        else:
+            self.tree_view.append(records)
 
-            hPrinter = win32print.OpenPrinter(printer_name)
-            hJob = win32print.StartDocPrinter(hPrinter, 1, ("ZPL Label", None, "RAW"))
-            win32print.StartPagePrinter(hPrinter)
-            win32print.WritePrinter(hPrinter, zpl.encode("utf-8"))
-            win32print.EndPagePrinter(hPrinter)
-            win32print.EndDocPrinter(hPrinter)
-            win32print.ClosePrinter(hPrinter)
-
-            msg = f"Impreso {qty} fila(s): "
-            if left_text and right_text:
-                msg += f"'{left_text}' (izq) y '{right_text}' (der)"
-            elif left_text:
-                msg += f"'{left_text}' en columna izquierda"
-            elif right_text:
-                msg += f"'{right_text}' en columna derecha"
+    def on_search_change(self, *args):
+        # Wait for a pause in typing before filtering
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+        self.search_after = self.root.after(150, self.apply_filter)
+
+    def apply_filter(self):
+        self.search_after = None
+        text = self.search_var.get().strip()
+        if not text:
+            self.filter_codes = None
+            self.tree_view.set_source(self.storage.count, self.storage.page)
+            return
+        if self.code_index is None:
+            self.status_var.set("Preparando la búsqueda...")
+            return
+        codes = self.code_index.search(text, SEARCH_RESULT_CODES)
+        self.filter_codes = codes
+        view = self.storage.filtered(codes)
+        self.tree_view.set_source(view.count, view.page)
+        status = f"{view.count()} registros de {len(codes)} códigos coinciden con '{text}'"
+        if len(codes) >= SEARCH_RESULT_CODES:
+            status += f" (se muestran los primeros {SEARCH_RESULT_CODES} códigos)"
+        self.status_var.set(status)
+
+    def update_treeview(self):
+        with metrics.timer("treeview_ms"):
+            if self.search_var.get().strip():
+                self.apply_filter()
             else:
-                msg = "Nada para imprimir"
+                self.tree_view.refresh()
 
-            self.status_var.set(msg)
-            messagebox.showinfo("Imprimir", msg)
+    def print_barcode(self, left_text=None, right_text=None, qty=1, symbologies=None):
+        """Send ZPL barcode(s) to printer with quantity support.
 
+        Each code is printed with the symbology it was registered with
+        unless ``symbologies`` gives the ``(left, right)`` pair.
+        """
+        if symbologies is None:
+            symbologies = tuple(
+                self.symbology_of(text) if text else None
+                for text in (left_text, right_text)
+            )
+        try:
+            profile = self.edited_profile()
+        except ValueError as e:
+            messagebox.showerror("Error", f"{e}. Revise la pestaña Configuración.")
+            return
+        try:
+            zpl = build_label(
+                left_text, right_text, qty,
+                symbologies=symbologies, layout=self.label_layout(profile),
+            )
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo imprimir: {e}")
             self.status_var.set("Error al imprimir")
+            return
+
+        msg = f"Impreso {qty} fila(s): "
+        if left_text and right_text:
+            msg += f"'{left_text}' (izq) y '{right_text}' (der)"
+        elif left_text:
+            msg += f"'{left_text}' en columna izquierda"
+        elif right_text:
+            msg += f"'{right_text}' en columna derecha"
+        else:
+            msg = "Nada para imprimir"
+
+        def finished(item):
+            if item.error:
+                self.show_print_error(item)
+                return
+            stats = self.spooler.stats() if self.spooler else {}
+            self.status_var.set(
+                f"{msg} (cola: {stats.get('queue_depth', 0)}, "
+                f"{stats.get('labels_per_second', 0):.1f} etiquetas/s)"
+            )
+
+        # The spooler thread does the blocking I/O; the result comes back to
+        # the Tk thread through the job queue
+        self.get_spooler(profile).submit(
+            zpl,
+            labels=qty,
+            callback=lambda item: self.jobs.call_soon(finished, item),
+        )
+        self.status_var.set(f"Enviado a la cola de impresión ({self.spooler.queue_depth()} en cola)")
+
+    def show_print_error(self, item):
+        """Report a failed spool item, warning when part of it was printed."""
+        message = f"No se pudo imprimir: {item.error}"
+        if item.sent:
+            message += (
+                f"\n\nYa se enviaron {item.sent} de {len(item.formats)} formatos a la "
+                "impresora; revise lo impreso antes de volver a imprimir."
+            )
+        messagebox.showerror("Error", message)
+        self.status_var.set("Error al imprimir")
+
+    def print_plan(self, plan):
+        """Send a whole print plan to the spooler as one batch of formats."""
+        try:
+            profile = self.edited_profile()
+        except ValueError as e:
+            messagebox.showerror("Error", f"{e}. Revise la pestaña Configuración.")
+            return
+        msg = f"Plan impreso: {plan.summary()}"
+
+        def finished(item):
+            if item.error:
+                self.show_print_error(item)
+                return
+            self.status_var.set(msg)
+
+        # The label layout is stored on the printer once per connection and
+        # each row only sends its codes
+        self.get_spooler(profile).submit(
+            plan.to_zpl(stored=True),
+            labels=plan.rows,
+            callback=lambda item: self.jobs.call_soon(finished, item),
+            templates=[plan.template],
+        )
+        self.status_var.set(f"Plan enviado a la cola de impresión: {plan.summary()}")
+
+    def get_spooler(self, profile):
+        """Spooler for ``profile``, reopened when the printer or its settings
+        change. The connection is opened before the first label arrives."""
+        setup = profile.setup_zpl().encode("utf-8")
+        if (
+            self.spooler is None
+            or self.spooler.target != profile.target
+            or self.spooler.setup != setup
+        ):
+            if self.spooler is not None:
+                self.spooler.close(wait=False)
+            self.spooler = PrintSpooler(profile.target, setup=setup, preconnect=True)
+        return self.spooler
+
+
+def startup_timing_path(argv):
+    """Output file of ``--startup-time [FILE]``, or None without the flag."""
+    if "--startup-time" not in argv:
+        return None
+    i = argv.index("--startup-time") + 1
+    return argv[i] if i < len(argv) else "startup_time.json"
+
+
+def time_startup(app, startup, path, timeout=STARTUP_TIMEOUT):
+    """Record the first paint and the end of the database load, write the
+    timings to ``path`` and close the application.
+
+    If the load has not finished after ``timeout`` seconds a ``timeout``
+    mark is written instead.
+    """
+    root = app.root
+    root.wait_visibility(root)
+    root.update_idletasks()
+    startup.mark("first_paint")
+    deadline = time.perf_counter() + timeout
+
+    def wait_loaded():
+        if app.database_loaded:
+            startup.mark("database_loaded")
+        elif time.perf_counter() < deadline:
+            root.after(10, wait_loaded)
+            return
+        else:
+            startup.mark("timeout")
+        startup.dump(path)
+        root.destroy()
+
+    wait_loaded()
 
 
 def main():
+    if getattr(sys, "frozen", False):
+        # Required for the process pools in the frozen executable
+        import multiprocessing
+
+        multiprocessing.freeze_support()
+    startup = StartupTimer(STARTED)
+    startup.mark("imports")
+    timing_path = startup_timing_path(sys.argv[1:])
     root = tk.Tk()
+    startup.mark("tk")
     app = BarcodeApp(root)
+    startup.mark("window")
+    if timing_path:
+        time_startup(app, startup, timing_path)
     root.mainloop()
+    app.jobs.shutdown()
+    app.prerender.close()
+    if app.spooler is not None:
+        app.spooler.close()
+    if app.sync is not None:
+        app.sync.close()
+    if app.storage is not None:
+        app.storage.close()
 
 
 if __name__ == "__main__":
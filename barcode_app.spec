@@ -6,29 +6,35 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    # barcode_core imports Pillow lazily
+    hiddenimports=['PIL.Image', 'PIL.PngImagePlugin', 'qrcode'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=[
+        'unittest', 'test', 'tkinter.test', 'lib2to3', 'pydoc_data', 'asyncio',
+        'distutils', 'setuptools', 'email', 'http', 'urllib', 'xml', 'pydoc',
+        'doctest', 'difflib', 'pdb', 'shelve', 'barcode', 'numpy',
+        'PIL.ImageQt', 'PIL.ImageTk', 'PIL.ImageShow',
+    ],
     noarchive=False,
-    optimize=0,
+    optimize=2,
 )
 pyz = PYZ(a.pure)
 
+# One-folder build: a one-file executable unpacks itself to a temporary
+# folder on every launch, and UPX-compressed DLLs are decompressed on every
+# load, both of which cost most of a second at startup
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
-    name='barcode_app',
+    exclude_binaries=True,
+    name='BarcodeGenerator',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -36,3 +42,11 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    name='BarcodeGenerator',
+)
@@ -0,0 +1,8 @@
+"""Console entry point, e.g. ``python barcode_cli.py stats``."""
+
+import sys
+
+from barcode_core.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+"""GUI-free core of the barcode generator.
+
+Submodules are imported on demand so that lightweight callers (such as the
+command line interface) do not pay for tkinter, Pillow or win32print unless
+they need them.
+"""
+
+DEFAULT_DB_FILE = "barcode_database.txt"
+DEFAULT_CODES_FOLDER = "codes"
+DEFAULT_PRINTER = "SAT TT448-2 USE (ZPL)"
+DEFAULT_SETTINGS_FILE = "barcode_settings.json"
+DEFAULT_SYNC_PORT = 8765
+DEFAULT_SYMBOLOGY = "code128"
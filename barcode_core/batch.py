@@ -0,0 +1,197 @@
+"""Batch import of barcodes from CSV or plain text files.
+
+Codes are streamed from the input file, validated a chunk at a time for the
+chosen symbology, rendered to PNG on a process pool and written to the
+database with one bulk insert per chunk. Used by the GUI and by ``barcode-app import``.
+"""
+
+import contextlib
+import csv
+import os
+import time
+from datetime import datetime
+from itertools import islice
+
+from .rendering import clean_code, make_filename, render_png
+from .symbology import get_symbology
+
+CSV_EXTENSIONS = (".csv", ".tsv")
+
+
+def iter_codes(path, column=0, encoding="utf-8-sig"):
+    """Yield cleaned codes from ``path`` one at a time.
+
+    ``.csv``/``.tsv`` files are read with the csv module; ``column`` is either
+    a zero-based index or a header name. Any other file is read as one code per
+    line.
+    """
+    with open(path, "r", encoding=encoding, newline="") as file:
+        if path.lower().endswith(CSV_EXTENSIONS):
+            delimiter = "\t" if path.lower().endswith(".tsv") else ","
+            if isinstance(column, str) and not column.isdigit():
+                values = (
+                    row.get(column) or ""
+                    for row in csv.DictReader(file, delimiter=delimiter)
+                )
+            else:
+                index = int(column)
+                values = (
+                    row[index] if len(row) > index else ""
+                    for row in csv.reader(file, delimiter=delimiter)
+                )
+        else:
+            values = file
+        for value in values:
+            code = clean_code(value)
+            if code:
+                yield code
+
+
+def _render_job(job):
+    """Worker entry point; must stay top-level so it can be pickled."""
+    code, folder, filename, symbology = job
+    try:
+        return code, render_png(code, folder, filename, symbology=symbology), None
+    except Exception as e:
+        return code, None, str(e)
+
+
+class BatchProgress:
+    """Counters reported to the progress callback after every chunk."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rendered = 0
+        self.skipped = 0
+        # Codes the symbology cannot encode; also counted in ``failed``
+        self.rejected = 0
+        self.failed = 0
+        self.errors = []
+        self.records = []
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        """Rendered codes per second."""
+        elapsed = self.elapsed
+        return self.rendered / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        rejected = f" ({self.rejected} no válidos)" if self.rejected else ""
+        return (
+            f"{self.rendered} generados, {self.skipped} omitidos, "
+            f"{self.failed} con error{rejected} en {self.elapsed:.1f}s "
+            f"({self.rate:.0f} códigos/s)"
+        )
+
+
+def import_codes(
+    codes,
+    storage,
+    codes_folder,
+    workers=None,
+    chunk_size=256,
+    skip_existing=False,
+    progress=None,
+    cancel=None,
+    render=True,
+    symbology=None,
+    keep_records=True,
+):
+    """Render ``codes`` in parallel and store them one chunk at a time.
+
+    ``codes`` may be any iterable (e.g. ``iter_codes``); it is consumed in
+    chunks of ``chunk_size`` and each chunk is stored with one bulk insert as
+    soon as it is rendered, so an interrupted import leaves at most one
+    chunk of images without records. The new records are collected in
+    ``records``; pass ``keep_records=False`` when they are not needed to keep
+    memory bounded on very large inputs. Each chunk is first
+    validated as a whole for ``symbology`` (Code128 by default): codes it
+    cannot encode are reported in ``errors`` and never reach the render pool,
+    and the others are stored normalized (e.g. with their EAN-13 check
+    digit). ``progress`` is called
+    with the ``BatchProgress`` after each chunk and ``cancel`` is an optional
+    ``threading.Event`` checked between chunks. Codes rendered before a
+    cancellation or an error are still stored. With ``render=False`` (lazy mode) only the
+    records are created; their images are rendered later on demand.
+    """
+    os.makedirs(codes_folder, exist_ok=True)
+    symbology = get_symbology(symbology)
+    state = BatchProgress()
+    rows = []
+    used_filenames = set()
+    second = None
+    codes = iter(codes)
+
+    def flush():
+        pending = rows[:]
+        rows.clear()
+        records = storage.add_many(pending)
+        if keep_records:
+            state.records.extend(records)
+
+    if render:
+        # Imported here: concurrent.futures and multiprocessing cost the GUI
+        # several milliseconds at startup
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=workers)
+    else:
+        executor = contextlib.nullcontext()
+    try:
+        with executor as pool:
+            while not (cancel and cancel.is_set()):
+                chunk = list(islice(codes, chunk_size))
+                if not chunk:
+                    break
+                chunk, rejected = symbology.validate_many(chunk)
+                state.rejected += len(rejected)
+                state.failed += len(rejected)
+                state.errors.extend(rejected)
+                jobs = []
+                # Earlier chunks are already stored, so only repeats inside
+                # this chunk need tracking
+                seen = set()
+                for code in chunk:
+                    if skip_existing and (code in seen or storage.exists(code)):
+                        state.skipped += 1
+                        continue
+                    seen.add(code)
+                    when = datetime.now().replace(microsecond=0)
+                    if when != second:
+                        # Names carry the second, so older ones cannot collide
+                        second = when
+                        used_filenames.clear()
+                    filename = make_filename(code, when)
+                    # Same code twice in the same second would overwrite the image
+                    suffix = 2
+                    base = filename
+                    while filename in used_filenames:
+                        filename = f"{base}_{suffix}"
+                        suffix += 1
+                    used_filenames.add(filename)
+                    jobs.append((code, codes_folder, filename, symbology.name))
+
+                if not render:
+                    state.rendered += len(jobs)
+                    rows.extend(
+                        (code, filename, None, symbology.name) for code, _, filename, _ in jobs
+                    )
+                else:
+                    for code, filename, error in pool.map(_render_job, jobs, chunksize=16):
+                        if error:
+                            state.failed += 1
+                            state.errors.append((code, error))
+                        else:
+                            state.rendered += 1
+                            rows.append((code, filename, None, symbology.name))
+                flush()
+                if progress:
+                    progress(state)
+    finally:
+        # Images rendered before an error still get their records
+        flush()
+    return state
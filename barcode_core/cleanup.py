@@ -0,0 +1,160 @@
+"""Reconciling the image folder with the database.
+
+``collect_garbage`` lists the codes folder once with ``os.scandir`` (see
+``ImageStore.scan``) and diffs it against the filenames in the database:
+images without a record (orphans) are deleted, loose or packed, and records
+without an image are reported so they can be rendered again. Retention policies (``keep_days``, ``keep_latest``) first prune old
+records through ``storage.prune``, which turns their images into orphans.
+
+Files are removed by a pool of threads; ``os.remove`` releases the GIL, so
+deletions overlap on slow disks and network shares.
+"""
+
+import itertools
+import os
+import time
+
+from .imagestore import get_image_store
+
+DEFAULT_WORKERS = 8
+# Files younger than this are left alone: a render job may not have stored
+# its record yet
+DEFAULT_MIN_AGE = 60.0
+
+
+class CleanupReport:
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        # Records removed by the retention policies
+        self.pruned = []
+        self.files = 0
+        self.bytes = 0
+        # Records whose image does not exist
+        self.missing = []
+        self.errors = []
+
+    def summary(self):
+        if self.dry_run:
+            return (
+                f"Simulación: se eliminarían {self.files} imágenes huérfanas "
+                f"({format_bytes(self.bytes)}), {len(self.missing)} entradas sin imagen"
+            )
+        text = (
+            f"{len(self.pruned)} entradas y {self.files} imágenes eliminadas, "
+            f"{format_bytes(self.bytes)} liberados, "
+            f"{len(self.missing)} entradas sin imagen"
+        )
+        if self.errors:
+            text += f", {len(self.errors)} imágenes no se pudieron eliminar"
+        return text
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def diff_images(storage, images, packed=(), min_age=DEFAULT_MIN_AGE, now=None):
+    """Compare the database with the loose ``images`` and ``packed`` names.
+
+    Returns ``(orphans, packed_orphans, missing)``: loose orphan images as
+    ``[(path, size)]``, the names of packed orphans and the records that have
+    no image at all.
+    """
+    now = time.time() if now is None else now
+    referenced = set()
+    missing = []
+    for record in storage:
+        filename = record["filename"]
+        if not filename:
+            continue
+        referenced.add(filename)
+        if filename not in images and filename not in packed:
+            missing.append(record)
+    orphans = [
+        (path, size)
+        for filename, (path, size, mtime) in images.items()
+        if filename not in referenced and now - mtime >= min_age
+    ]
+    packed_orphans = [filename for filename in packed if filename not in referenced]
+    return orphans, packed_orphans, missing
+
+
+def delete_files(paths, workers=DEFAULT_WORKERS, cancelled=None, on_progress=None):
+    """Remove ``[(path, size)]`` in parallel. Returns ``(files, bytes, errors)``.
+
+    ``cancelled()`` is polled between files; ``on_progress(done, total)`` is
+    called from the worker threads.
+    """
+    total = len(paths)
+    counter = itertools.count(1)
+
+    def remove(item):
+        path, size = item
+        if cancelled and cancelled():
+            return None, None
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            size = None
+        except OSError as e:
+            return None, (path, e)
+        done = next(counter)
+        if on_progress and done % 500 == 0:
+            on_progress(done, total)
+        return size, None
+
+    files = freed = 0
+    errors = []
+    if not paths:
+        return files, freed, errors
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for size, error in pool.map(remove, paths):
+            if error:
+                errors.append(error)
+            elif size is not None:
+                files += 1
+                freed += size
+    if on_progress:
+        on_progress(total, total)
+    return files, freed, errors
+
+
+def collect_garbage(
+    storage,
+    folder,
+    keep_days=None,
+    keep_latest=False,
+    dry_run=False,
+    workers=DEFAULT_WORKERS,
+    min_age=DEFAULT_MIN_AGE,
+    cancelled=None,
+    on_progress=None,
+):
+    """Apply the retention policies and delete orphan images.
+
+    With ``dry_run`` nothing is changed and the report only counts the
+    current orphans; the retention policies are not simulated.
+    """
+    report = CleanupReport(dry_run)
+    if not dry_run and (keep_days is not None or keep_latest):
+        report.pruned = storage.prune(keep_days, keep_latest)
+    store = get_image_store(folder)
+    orphans, packed_orphans, report.missing = diff_images(
+        storage, store.scan(), set(store.pack.names), min_age
+    )
+    if dry_run:
+        report.files = len(orphans) + len(packed_orphans)
+        report.bytes = sum(size for _, size in orphans)
+        return report
+    report.files, report.bytes, report.errors = delete_files(
+        orphans, workers, cancelled, on_progress
+    )
+    if packed_orphans:
+        report.bytes += store.pack.remove(packed_orphans)
+        report.files += len(packed_orphans)
+    return report
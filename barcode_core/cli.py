@@ -0,0 +1,576 @@
+"""Command line interface: ``barcode-app generate|import|prerender|delete|compact|gc|images|print|printers|render|export|stats|sync|sync-server``.
+
+Only argparse is imported up front; each subcommand imports what it needs, so
+``stats`` or ``print --dry-run`` never load Pillow, tkinter or win32print, and
+commands that do not read the database (``render``, ``print``, ``printers``,
+``images``, ``sync-server``) do not load it either.
+"""
+
+import os
+import sys
+
+from . import (
+    DEFAULT_CODES_FOLDER,
+    DEFAULT_DB_FILE,
+    DEFAULT_SETTINGS_FILE,
+    DEFAULT_SYMBOLOGY,
+    DEFAULT_SYNC_PORT,
+)
+
+
+def cmd_generate(args, storage):
+    from .rendering import clean_code, make_filename, render_png
+    from .symbology import get_symbology
+
+    symbology = get_symbology(args.symbology)
+    os.makedirs(args.codes, exist_ok=True)
+    status = 0
+    for text in args.codes_to_generate:
+        code = clean_code(text)
+        if not code:
+            continue
+        try:
+            code = symbology.normalize(code)
+        except ValueError as e:
+            print(f"{code}: no es válido para {symbology.label}: {e}", file=sys.stderr)
+            status = 1
+            continue
+        if storage.exists(code) and not args.force:
+            print(f"{code}: ya existe en la base de datos (use --force)", file=sys.stderr)
+            status = 1
+            continue
+        if args.lazy:
+            filename = make_filename(code)
+            storage.add(code, filename, symbology=symbology.name)
+            print(f"{code}\t{filename}.png (pendiente)")
+            continue
+        try:
+            filename = render_png(code, args.codes, symbology=symbology.name)
+        except Exception as e:
+            print(f"{code}: error generando código: {e}", file=sys.stderr)
+            status = 1
+            continue
+        storage.add(code, filename, symbology=symbology.name)
+        print(f"{code}\t{filename}.png")
+    return status
+
+
+def cmd_import(args, storage):
+    from .batch import import_codes, iter_codes
+
+    def report(state):
+        print(
+            f"\r{state.rendered} generados, {state.failed} errores, "
+            f"{state.rate:.0f} códigos/s",
+            end="",
+            file=sys.stderr,
+        )
+
+    state = import_codes(
+        iter_codes(args.input, column=args.column),
+        storage,
+        args.codes,
+        workers=args.workers,
+        skip_existing=args.skip_existing,
+        keep_records=False,
+        progress=report,
+        render=not args.lazy,
+        symbology=args.symbology,
+    )
+    print(file=sys.stderr)
+    for code, error in state.errors:
+        print(f"{code}: {error}", file=sys.stderr)
+    print(state.summary())
+    return 1 if state.failed else 0
+
+
+def cmd_prerender(args, storage):
+    """Render the images of lazily registered codes that are still missing."""
+    from .lazyrender import ensure_image, image_exists
+
+    os.makedirs(args.codes, exist_ok=True)
+    rendered = failed = 0
+    for record in storage:
+        filename = record["filename"]
+        if not filename or image_exists(args.codes, filename):
+            continue
+        try:
+            ensure_image(record["code"], args.codes, filename, record["symbology"])
+            rendered += 1
+        except Exception as e:
+            print(f"{record['code']}: error generando código: {e}", file=sys.stderr)
+            failed += 1
+    print(f"{rendered} imágenes generadas, {failed} con error")
+    return 1 if failed else 0
+
+
+def cmd_delete(args, storage):
+    from .imagestore import get_image_store
+
+    removed = storage.delete(args.codes_to_delete)
+    deleted_images = 0
+    if not args.keep_images:
+        images = get_image_store(args.codes)
+        try:
+            deleted_images, _ = images.remove_many(
+                record["filename"] for record in removed if record["filename"]
+            )
+        except OSError as e:
+            print(f"Error eliminando imágenes: {e}", file=sys.stderr)
+    print(f"{len(removed)} entradas y {deleted_images} imágenes eliminadas")
+    return 0 if removed else 1
+
+
+def cmd_compact(args, storage):
+    before = os.path.getsize(args.db) if os.path.exists(args.db) else 0
+    if not storage.compact():
+        print("La base de datos cambió durante la compactación; intente de nuevo", file=sys.stderr)
+        return 1
+    after = os.path.getsize(args.db) if os.path.exists(args.db) else 0
+    print(f"{before} -> {after} bytes")
+    return 0
+
+
+def cmd_gc(args, storage):
+    """Delete orphan images and records outside the retention policy."""
+    from .cleanup import collect_garbage
+
+    report = collect_garbage(
+        storage,
+        args.codes,
+        keep_days=args.keep_days,
+        keep_latest=args.keep_latest,
+        dry_run=args.dry_run,
+        workers=args.workers,
+        min_age=args.min_age,
+    )
+    for path, error in report.errors:
+        print(f"{path}: {error}", file=sys.stderr)
+    print(report.summary())
+    if report.missing:
+        print("Use 'prerender' para generar las imágenes que faltan", file=sys.stderr)
+    return 1 if report.errors else 0
+
+
+def cmd_images(args, storage):
+    """Show, migrate or pack the layout of the image folder."""
+    from .cleanup import format_bytes
+    from .imagestore import get_image_store
+
+    images = get_image_store(args.codes)
+    if images.pack.load_error:
+        print(
+            f"No se pudo leer {images.pack.path} ({images.pack.load_error}); "
+            f"apartado como {images.pack.quarantined}",
+            file=sys.stderr,
+        )
+
+    def report(done, total):
+        print(f"\r{done}/{total}", end="", file=sys.stderr)
+
+    if args.layout:
+        moved = images.migrate(args.layout, on_progress=report)
+        print(file=sys.stderr)
+        print(f"{moved} imágenes movidas a la organización '{args.layout}'")
+    if args.pack is not None:
+        files, size = images.pack_images(older_than_days=args.pack, on_progress=report)
+        print(file=sys.stderr)
+        print(f"{files} imágenes archivadas ({format_bytes(size)}) en {images.pack.path}")
+    if not args.layout and args.pack is None:
+        loose = images.scan()
+        print(f"organización:     {images.layout}")
+        print(f"imágenes sueltas: {len(loose)} ({format_bytes(sum(i[1] for i in loose.values()))})")
+        print(f"imágenes en pack: {len(images.pack)}")
+    return 0
+
+
+def load_profile(args):
+    """Printer profile of ``--profile`` (the active one by default), with
+    ``--printer`` and ``--columns`` applied on top."""
+    from .settings import Settings
+
+    settings = Settings(args.settings)
+    name = args.profile or settings.active
+    if name not in settings.profiles:
+        raise ValueError(
+            f"No existe el perfil '{name}' (perfiles: {', '.join(settings.profiles)})"
+        )
+    profile = settings.profiles[name]
+    if args.printer:
+        profile.target = args.printer
+    if args.columns:
+        profile.columns = args.columns
+    profile.validate(lookup=False)
+    return profile
+
+
+def cmd_print(args, storage):
+    from .symbology import get_symbology
+    from .zpl import build_label
+
+    symbology = get_symbology(args.symbology)
+    try:
+        profile = load_profile(args)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    layout = profile.layout(symbology.name)
+    if args.plan:
+        from .plans import PrintPlan, parse_plan_lines
+
+        try:
+            with open(args.plan, "r", encoding="utf-8-sig") as file:
+                entries = parse_plan_lines(file)
+        except OSError as e:
+            print(f"No se pudo leer {args.plan}: {e}", file=sys.stderr)
+            return 2
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        try:
+            plan = PrintPlan(entries, layout)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(plan.summary(), file=sys.stderr)
+        zpl = plan.to_zpl(stored=args.stored)
+        if args.stored:
+            zpl = plan.template.download() + "\n" + zpl
+    elif args.left or args.right:
+        try:
+            left, right = (
+                symbology.normalize(code) if code else None for code in (args.left, args.right)
+            )
+        except ValueError as e:
+            print(f"Código no válido para {symbology.label}: {e}", file=sys.stderr)
+            return 1
+        zpl = build_label(
+            left, right, args.qty, symbologies=(symbology.name, symbology.name), layout=layout
+        )
+    else:
+        print("Debe indicar --left, --right o --plan", file=sys.stderr)
+        return 2
+    zpl = profile.setup_zpl() + "\n" + zpl
+    if args.dry_run:
+        print(zpl)
+        return 0
+
+    from .printing import send_raw
+
+    try:
+        send_raw(profile.target, zpl)
+    except Exception as e:
+        print(f"No se pudo imprimir: {e}", file=sys.stderr)
+        return 1
+    print(f"Impreso en '{profile.target}' (perfil '{profile.name}')")
+    return 0
+
+
+def cmd_printers(args, storage):
+    from .printing import printers
+    from .settings import Settings
+
+    names = printers.names()
+    if names is None:
+        print("impresoras de Windows: no disponibles (requiere pywin32)")
+    else:
+        print(f"impresoras de Windows ({len(names)}):")
+        for name in names:
+            print(f"  {name}")
+    settings = Settings(args.settings)
+    if settings.load_error:
+        print(f"No se pudo leer {args.settings}: {settings.load_error}", file=sys.stderr)
+    status = 0
+    print(f"perfiles ({args.settings}):")
+    for name, error in settings.validate_all().items():
+        profile = settings.profiles[name]
+        active = "*" if name == settings.active else " "
+        print(
+            f" {active}{name}: {profile.target}, {profile.dpi} dpi, "
+            f"{profile.label_width_mm} mm, {profile.columns} columna(s)"
+        )
+        if error:
+            print(f"    {error}")
+            status = 1
+    return status
+
+
+def cmd_render(args, storage):
+    from .symbology import get_symbology
+
+    symbology = get_symbology(args.symbology)
+    try:
+        code = symbology.normalize(args.code)
+        if args.format == "svg":
+            output = symbology.to_svg(code, args.module_width, args.height).encode("utf-8")
+        elif args.format == "zpl":
+            output = ("^XA\n" + symbology.to_zpl_graphic(
+                code, module_width=args.module_width, height=args.height
+            ) + "\n^XZ\n").encode("ascii")
+        elif args.format == "pbm":
+            output = symbology.to_pbm(code, args.module_width, args.height)
+        else:
+            if not args.output:
+                print("El formato png requiere -o/--output", file=sys.stderr)
+                return 2
+            symbology.to_png(code, args.output, args.module_width, args.height)
+            return 0
+    except (ValueError, RuntimeError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.output:
+        with open(args.output, "wb") as file:
+            file.write(output)
+    else:
+        sys.stdout.buffer.write(output)
+    return 0
+
+
+def cmd_export(args, storage):
+    from .export import export, format_for, iter_records, write_csv, write_jsonl
+
+    codes = args.only or None
+    if not args.output:
+        # Records only; images need a file
+        writer = write_jsonl if args.format == "jsonl" else write_csv
+        if args.format in ("zip", "pdf"):
+            print(f"El formato {args.format} requiere -o ARCHIVO", file=sys.stderr)
+            return 2
+        writer(iter_records(storage, codes), sys.stdout)
+        return 0
+    try:
+        fmt = args.format or format_for(args.output)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    def report(count):
+        print(f"\r{count} registros", end="", file=sys.stderr)
+
+    errors = []
+    count = export(
+        storage,
+        args.output,
+        fmt,
+        codes=codes,
+        folder=args.codes,
+        workers=args.workers,
+        columns=args.columns,
+        rows=args.rows,
+        on_progress=report,
+        on_error=lambda name, error: errors.append((name, error)),
+    )
+    print(file=sys.stderr)
+    print(f"{count} registros exportados a {args.output}")
+    if errors:
+        from .symbology import describe_errors
+
+        print(f"{len(errors)} registros omitidos:", file=sys.stderr)
+        print(describe_errors(errors), file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_stats(args, storage):
+    total = storage.count()
+    first = storage.page(0, 1)
+    last = storage.page(total - 1, 1) if total else []
+    print(f"registros:        {total}")
+    print(f"códigos únicos:   {len(storage.codes())}")
+    if hasattr(storage, "garbage"):
+        print(f"líneas obsoletas: {storage.garbage}")
+        print(f"líneas dañadas:   {storage.corrupt_lines + storage.torn_lines}")
+    if first:
+        print(f"primer registro:  {first[0]['timestamp']}")
+        print(f"último registro:  {last[0]['timestamp']}")
+    return 0
+
+
+def cmd_sync(args, storage):
+    from .sync import SyncClient
+
+    try:
+        client = SyncClient(
+            args.server, args.station, folder=os.path.dirname(os.path.abspath(args.db))
+        )
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    client.remote.load()
+    if args.push_all:
+        client.push(storage)
+    try:
+        pulled = client.sync_once()
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"No se pudo sincronizar con {args.server}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+    status = client.status()
+    print(
+        f"{pulled} registros recibidos; {status['remote_codes']} códigos compartidos, "
+        f"{status['pending']} pendientes de enviar"
+    )
+    return 0
+
+
+def cmd_sync_server(args, storage):
+    from .sync import SyncLog, SyncServer
+
+    log = SyncLog(args.log)
+    server = SyncServer(log, args.host, args.port)
+    print(f"Sincronización en {args.host}:{args.port} ({args.log}, {log.cursor()} registros)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        log.close()
+    return 0
+
+
+def build_parser():
+    import argparse
+
+    from .symbology import symbology_names
+
+    def add_symbology(p):
+        p.add_argument(
+            "--symbology", choices=symbology_names(), default=DEFAULT_SYMBOLOGY,
+            help=f"tipo de código (por defecto {DEFAULT_SYMBOLOGY})",
+        )
+
+    parser = argparse.ArgumentParser(
+        prog="barcode-app", description="Generador de códigos de barras sin interfaz gráfica."
+    )
+    parser.add_argument("--db", default=DEFAULT_DB_FILE, help="base de datos (.txt o .sqlite3)")
+    parser.add_argument("--codes", default=DEFAULT_CODES_FOLDER, help="carpeta de imágenes")
+    parser.add_argument(
+        "--settings", default=DEFAULT_SETTINGS_FILE, help="configuración y perfiles de impresora"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("generate", help="generar uno o más códigos")
+    p.add_argument("codes_to_generate", nargs="+", metavar="CODE")
+    p.add_argument("--force", action="store_true", help="generar aunque ya exista")
+    p.add_argument("--lazy", action="store_true", help="registrar sin generar la imagen")
+    add_symbology(p)
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("import", help="importar códigos desde CSV o texto")
+    p.add_argument("input")
+    p.add_argument("--column", default="0", help="índice o nombre de columna CSV")
+    p.add_argument("--workers", type=int, default=None, help="procesos de render")
+    p.add_argument("--skip-existing", action="store_true", help="omitir códigos ya registrados")
+    p.add_argument("--lazy", action="store_true", help="registrar sin generar las imágenes")
+    add_symbology(p)
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("prerender", help="generar las imágenes pendientes")
+    p.set_defaults(func=cmd_prerender)
+
+    p = sub.add_parser("delete", help="eliminar todas las entradas de uno o más códigos")
+    p.add_argument("codes_to_delete", nargs="+", metavar="CODE")
+    p.add_argument("--keep-images", action="store_true", help="no borrar las imágenes")
+    p.set_defaults(func=cmd_delete)
+
+    p = sub.add_parser("compact", help="reescribir la base de datos sin entradas eliminadas")
+    p.set_defaults(func=cmd_compact)
+
+    p = sub.add_parser("gc", help="eliminar imágenes huérfanas y entradas antiguas")
+    p.add_argument("--keep-days", type=int, help="conservar solo las entradas de los últimos N días")
+    p.add_argument(
+        "--keep-latest", action="store_true", help="conservar solo la última entrada de cada código"
+    )
+    p.add_argument("--dry-run", action="store_true", help="informar sin eliminar nada")
+    p.add_argument("--workers", type=int, default=8, help="hilos de borrado")
+    p.add_argument(
+        "--min-age", type=float, default=60.0, help="no borrar imágenes más nuevas (segundos)"
+    )
+    p.set_defaults(func=cmd_gc)
+
+    p = sub.add_parser("images", help="organización de la carpeta de imágenes")
+    p.add_argument(
+        "--layout", choices=("flat", "sharded"), help="migrar a carpeta única o subcarpetas"
+    )
+    p.add_argument(
+        "--pack", type=int, metavar="DIAS", help="archivar las imágenes con más de DIAS días"
+    )
+    p.set_defaults(func=cmd_images, uses_storage=False)
+
+    p = sub.add_parser("print", help="imprimir una fila de etiquetas ZPL")
+    p.add_argument("--left", help="código de la columna izquierda")
+    p.add_argument("--right", help="código de la columna derecha")
+    p.add_argument("--qty", type=int, default=1, help="cantidad de filas")
+    p.add_argument("--plan", help="archivo con 'CODIGO, copias' por línea")
+    p.add_argument("--columns", type=int, help="columnas por etiqueta (--plan; por defecto las del perfil)")
+    p.add_argument(
+        "--stored", action="store_true", help="usar formato almacenado ^DF/^XF (--plan)"
+    )
+    p.add_argument("--profile", help="perfil de impresora (por defecto el activo)")
+    p.add_argument(
+        "--printer", help="impresora: nombre, tcp://host:9100 o file://ruta (por defecto la del perfil)"
+    )
+    p.add_argument("--dry-run", action="store_true", help="mostrar el ZPL sin imprimir")
+    add_symbology(p)
+    p.set_defaults(func=cmd_print, uses_storage=False)
+
+    p = sub.add_parser("printers", help="impresoras instaladas y validación de los perfiles")
+    p.set_defaults(func=cmd_printers, uses_storage=False)
+
+    p = sub.add_parser("render", help="dibujar un código sin registrarlo")
+    p.add_argument("code")
+    p.add_argument("--format", choices=("svg", "png", "pbm", "zpl"), default="svg")
+    p.add_argument("--module-width", type=int, default=2, help="ancho de módulo en puntos")
+    p.add_argument("--height", type=int, default=80, help="alto de las barras en puntos")
+    p.add_argument("-o", "--output", help="archivo de salida (por defecto stdout)")
+    add_symbology(p)
+    p.set_defaults(func=cmd_render, uses_storage=False)
+
+    p = sub.add_parser("export", help="exportar registros (CSV/JSONL) o imágenes (ZIP/PDF)")
+    p.add_argument(
+        "-o", "--output", help="archivo .csv, .jsonl, .zip o .pdf (por defecto CSV a stdout)"
+    )
+    p.add_argument("--format", choices=("csv", "jsonl", "zip", "pdf"), help="según la extensión")
+    p.add_argument("--only", nargs="+", metavar="CODE", help="exportar solo estos códigos")
+    p.add_argument("--workers", type=int, default=None, help="procesos de render (ZIP/PDF)")
+    p.add_argument("--columns", type=int, default=3, help="etiquetas por fila en el PDF")
+    p.add_argument("--rows", type=int, default=10, help="filas de etiquetas por página del PDF")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("stats", help="estadísticas de la base de datos")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("sync", help="enviar y recibir registros del servidor compartido")
+    p.add_argument("--server", required=True, help="servidor de sincronización host[:puerto]")
+    p.add_argument("--station", help="nombre de esta estación (por defecto el del equipo)")
+    p.add_argument(
+        "--push-all", action="store_true", help="enviar también todos los registros locales"
+    )
+    p.set_defaults(func=cmd_sync)
+
+    p = sub.add_parser("sync-server", help="servicio de sincronización entre estaciones")
+    p.add_argument("--host", default="127.0.0.1", help="dirección de escucha (0.0.0.0 para la red)")
+    p.add_argument("--port", type=int, default=DEFAULT_SYNC_PORT)
+    p.add_argument("--log", default="sync_server.sqlite3", help="base de datos del servicio")
+    p.set_defaults(func=cmd_sync_server, uses_storage=False)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not getattr(args, "uses_storage", True):
+        return args.func(args, None)
+
+    from .storage import open_storage
+
+    storage = open_storage(args.db)
+    try:
+        return args.func(args, storage)
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Built-in Code128 encoder.
+
+``encode`` picks code sets A/B/C with a shortest-path search over the input,
+so the symbol is as short as Code128 allows. The result is turned into bar
+widths or a string of modules, which the ``code128`` and ``gs1-128`` entries
+of the symbology registry render. With ``gs1=True`` the symbol is GS1-128:
+it starts with FNC1 and every ``GS`` in the data is sent as FNC1.
+"""
+
+# Bar/space widths of every symbol value (bar first); 106 is the stop pattern
+PATTERNS = (
+    "212222", "222122", "222221", "121223", "121322", "131222", "122213",
+    "122312", "132212", "221213", "221312", "231212", "112232", "122132",
+    "122231", "113222", "123122", "123221", "223211", "221132", "221231",
+    "213212", "223112", "312131", "311222", "321122", "321221", "312212",
+    "322112", "322211", "212123", "212321", "232121", "111323", "131123",
+    "131321", "112313", "132113", "132311", "211313", "231113", "231311",
+    "112133", "112331", "132131", "113123", "113321", "133121", "313121",
+    "211331", "231131", "213113", "213311", "213131", "311123", "311321",
+    "331121", "312113", "312311", "332111", "314111", "221411", "431111",
+    "111224", "111422", "121124", "121421", "141122", "141221", "112214",
+    "112412", "122114", "122411", "142112", "142211", "241211", "221114",
+    "413111", "241112", "134111", "111242", "121142", "121241", "114212",
+    "124112", "124211", "411212", "421112", "421211", "212141", "214121",
+    "412121", "111143", "111341", "131141", "114113", "114311", "411113",
+    "411311", "113141", "114131", "311141", "411131", "211412", "211214",
+    "211232", "2331112",
+)
+
+START = {"A": 103, "B": 104, "C": 105}
+# Value of the "switch to <set>" symbol, by current set
+SWITCH = {
+    "A": {"B": 100, "C": 99},
+    "B": {"A": 101, "C": 99},
+    "C": {"A": 101, "B": 100},
+}
+STOP = 106
+# Function code 1, the same value in all three sets
+FNC1 = 102
+GS = "\x1d"
+QUIET_ZONE_MODULES = 10
+
+
+def _char_value(code_set, char):
+    """Symbol value of ``char`` in set A or B, or None if not encodable."""
+    o = ord(char)
+    if code_set == "A":
+        if 32 <= o <= 95:
+            return o - 32
+        if 0 <= o < 32:
+            return o + 64
+        return None
+    if 32 <= o <= 127:
+        return o - 32
+    return None
+
+
+def _is_digit_pair(data, i):
+    return i + 1 < len(data) and "0" <= data[i] <= "9" and "0" <= data[i + 1] <= "9"
+
+
+def encode(data, gs1=False):
+    """Symbol values for ``data`` (start code through check digit, no stop).
+
+    Raises ``ValueError`` for characters Code128 cannot represent.
+    """
+    if not data:
+        raise ValueError("Code128 necesita al menos un carácter")
+    n = len(data)
+    sets = ("A", "B", "C")
+    inf = float("inf")
+    # cost[i][s]: symbols needed for data[i:] when already in set s
+    cost = [dict.fromkeys(sets, inf) for _ in range(n + 1)]
+    step = [dict.fromkeys(sets) for _ in range(n)]
+    for s in sets:
+        cost[n][s] = 0
+    for i in range(n - 1, -1, -1):
+        # Cost of consuming the next chunk without leaving the current set
+        stay = {}
+        for s in sets:
+            if gs1 and data[i] == GS:
+                stay[s] = 1 + cost[i + 1][s]
+            elif s == "C":
+                if _is_digit_pair(data, i):
+                    stay[s] = 1 + cost[i + 2]["C"]
+                else:
+                    stay[s] = inf
+            elif _char_value(s, data[i]) is not None:
+                stay[s] = 1 + cost[i + 1][s]
+            else:
+                stay[s] = inf
+        for s in sets:
+            best, choice = stay[s], s
+            for t in sets:
+                if t != s and 1 + stay[t] < best:
+                    best, choice = 1 + stay[t], t
+            cost[i][s] = best
+            step[i][s] = choice
+        if all(cost[i][s] == inf for s in sets):
+            raise ValueError(f"Carácter no válido para Code128: {data[i]!r}")
+
+    # Starting directly in the best set never costs more than a switch
+    current = min(sets, key=lambda s: (cost[0][s], "BCA".index(s)))
+    values = [START[current]]
+    if gs1:
+        values.append(FNC1)
+    i = 0
+    while i < n:
+        target = step[i][current]
+        if target != current:
+            values.append(SWITCH[current][target])
+            current = target
+        if gs1 and data[i] == GS:
+            values.append(FNC1)
+            i += 1
+        elif current == "C":
+            values.append(int(data[i:i + 2]))
+            i += 2
+        else:
+            values.append(_char_value(current, data[i]))
+            i += 1
+    checksum = values[0] + sum(position * value for position, value in enumerate(values[1:], 1))
+    values.append(checksum % 103)
+    return values
+
+
+def bar_widths(data, gs1=False):
+    """Alternating bar/space widths in modules, starting and ending with a bar.
+
+    The quiet zone is not included; renderers add it.
+    """
+    widths = []
+    for value in encode(data, gs1) + [STOP]:
+        widths.extend(int(width) for width in PATTERNS[value])
+    return widths
+
+
+def modules(data, gs1=False):
+    """The symbol as a string of ``1`` (bar) and ``0`` (space) modules."""
+    return "".join(
+        ("1" if i % 2 == 0 else "0") * width for i, width in enumerate(bar_widths(data, gs1))
+    )
+
@@ -0,0 +1,247 @@
+"""Built-in DataMatrix (ECC 200) encoder.
+
+Data is encoded in ASCII mode (digit pairs packed into one codeword, Latin-1
+characters above 127 through Upper Shift), padded to the smallest square
+symbol that holds it and protected with Reed-Solomon codes over GF(256).
+Codewords are placed with the diagonal "utah" pattern of ISO/IEC 16022
+Annex F. ``matrix`` returns the symbol as rows of ``1`` (dark) and ``0``
+modules, finder and timing patterns included; the quiet zone is left to the
+renderers.
+"""
+
+# Square ECC 200 sizes: (symbol size, data region size, data codewords,
+# error correction codewords, interleaved blocks)
+SIZES = (
+    (10, 8, 3, 5, 1),
+    (12, 10, 5, 7, 1),
+    (14, 12, 8, 10, 1),
+    (16, 14, 12, 12, 1),
+    (18, 16, 18, 14, 1),
+    (20, 18, 22, 18, 1),
+    (22, 20, 30, 20, 1),
+    (24, 22, 36, 24, 1),
+    (26, 24, 44, 28, 1),
+    (32, 14, 62, 36, 1),
+    (36, 16, 86, 42, 1),
+    (40, 18, 114, 48, 1),
+    (44, 20, 144, 56, 1),
+    (48, 22, 174, 68, 1),
+    (52, 24, 204, 84, 2),
+    (64, 14, 280, 112, 2),
+    (72, 16, 368, 144, 4),
+    (80, 18, 456, 192, 4),
+    (88, 20, 576, 224, 4),
+    (96, 22, 696, 272, 4),
+    (104, 24, 816, 336, 6),
+)
+MAX_DATA_CODEWORDS = SIZES[-1][2]
+PAD = 129
+UPPER_SHIFT = 235
+DIGITS = "0123456789"
+QUIET_ZONE_MODULES = 1
+
+# GF(256) with the DataMatrix polynomial x^8 + x^5 + x^3 + x^2 + 1
+_EXP = [0] * 512
+_LOG = [0] * 256
+_value = 1
+for _power in range(255):
+    _EXP[_power] = _value
+    _LOG[_value] = _power
+    _value <<= 1
+    if _value & 0x100:
+        _value ^= 0x12D
+for _power in range(255, 512):
+    _EXP[_power] = _EXP[_power - 255]
+
+
+def _multiply(a, b):
+    if not a or not b:
+        return 0
+    return _EXP[_LOG[a] + _LOG[b]]
+
+
+_GENERATORS = {}
+
+
+def _generator(degree):
+    """Coefficients of (x - 2^1)...(x - 2^degree), highest power first."""
+    poly = _GENERATORS.get(degree)
+    if poly is None:
+        poly = [1]
+        for root in range(1, degree + 1):
+            shifted = poly + [0]
+            for i, coefficient in enumerate(poly):
+                shifted[i + 1] ^= _multiply(coefficient, _EXP[root])
+            poly = shifted
+        _GENERATORS[degree] = poly
+    return poly
+
+
+def reed_solomon(data, count):
+    """``count`` error correction codewords for the ``data`` codewords."""
+    generator = _generator(count)
+    remainder = [0] * count
+    for codeword in data:
+        factor = codeword ^ remainder[0]
+        remainder = remainder[1:] + [0]
+        for i in range(count):
+            remainder[i] ^= _multiply(generator[i + 1], factor)
+    return remainder
+
+
+def encode_ascii(text):
+    """ASCII-mode data codewords of ``text``. Raises ``ValueError``."""
+    codewords = []
+    i = 0
+    n = len(text)
+    while i < n:
+        char = text[i]
+        if char in DIGITS and i + 1 < n and text[i + 1] in DIGITS:
+            codewords.append(130 + int(text[i:i + 2]))
+            i += 2
+            continue
+        o = ord(char)
+        if o < 128:
+            codewords.append(o + 1)
+        elif o < 256:
+            codewords.extend((UPPER_SHIFT, o - 127))
+        else:
+            raise ValueError(f"Carácter no válido para DataMatrix: {char!r}")
+        i += 1
+    return codewords
+
+
+def symbol_size(count):
+    """Row of ``SIZES`` of the smallest symbol for ``count`` data codewords."""
+    for size in SIZES:
+        if size[2] >= count:
+            return size
+    raise ValueError(
+        f"DataMatrix admite hasta {MAX_DATA_CODEWORDS} palabras de datos "
+        f"(unos {MAX_DATA_CODEWORDS} caracteres)"
+    )
+
+
+def codewords(text):
+    """Data and error correction codewords of ``text``, interleaved.
+
+    Returns ``(size row, codewords)``.
+    """
+    data = encode_ascii(text)
+    size = symbol_size(len(data))
+    _, _, capacity, ecc_count, blocks = size
+    if len(data) < capacity:
+        data.append(PAD)
+    while len(data) < capacity:
+        # Later pad codewords are scrambled with their 1-based position
+        pad = PAD + (149 * (len(data) + 1)) % 253 + 1
+        data.append(pad - 254 if pad > 254 else pad)
+    result = data + [0] * ecc_count
+    ecc_per_block = ecc_count // blocks
+    for block in range(blocks):
+        ecc = reed_solomon(data[block::blocks], ecc_per_block)
+        result[capacity + block::blocks] = ecc
+    return size, result
+
+
+def _placement(rows, columns):
+    """Annex F placement: each cell holds ``codeword * 8 + bit`` (bit 0 is
+    the most significant), or -1/-2 for the fixed dark/light corner."""
+    grid = [[None] * columns for _ in range(rows)]
+
+    def module(row, column, codeword, bit):
+        if row < 0:
+            row += rows
+            column += 4 - (rows + 4) % 8
+        if column < 0:
+            column += columns
+            row += 4 - (columns + 4) % 8
+        grid[row][column] = codeword * 8 + bit
+
+    def utah(row, column, codeword):
+        for bit, (dr, dc) in enumerate(
+            ((-2, -2), (-2, -1), (-1, -2), (-1, -1), (-1, 0), (0, -2), (0, -1), (0, 0))
+        ):
+            module(row + dr, column + dc, codeword, bit)
+
+    def corner(cells, codeword):
+        for bit, (row, column) in enumerate(cells):
+            module(row % rows, column % columns, codeword, bit)
+
+    corners = (
+        ((-1, 0), (-1, 1), (-1, 2), (0, -2), (0, -1), (1, -1), (2, -1), (3, -1)),
+        ((-3, 0), (-2, 0), (-1, 0), (0, -4), (0, -3), (0, -2), (0, -1), (1, -1)),
+        ((-3, 0), (-2, 0), (-1, 0), (0, -2), (0, -1), (1, -1), (2, -1), (3, -1)),
+        ((-1, 0), (-1, -1), (0, -3), (0, -2), (0, -1), (1, -3), (1, -2), (1, -1)),
+    )
+    codeword = 0
+    row, column = 4, 0
+    while True:
+        if row == rows and column == 0:
+            corner(corners[0], codeword)
+            codeword += 1
+        if row == rows - 2 and column == 0 and columns % 4:
+            corner(corners[1], codeword)
+            codeword += 1
+        if row == rows - 2 and column == 0 and columns % 8 == 4:
+            corner(corners[2], codeword)
+            codeword += 1
+        if row == rows + 4 and column == 2 and not columns % 8:
+            corner(corners[3], codeword)
+            codeword += 1
+        # Sweep up and to the right
+        while True:
+            if row < rows and column >= 0 and grid[row][column] is None:
+                utah(row, column, codeword)
+                codeword += 1
+            row -= 2
+            column += 2
+            if not (row >= 0 and column < columns):
+                break
+        row += 1
+        column += 3
+        # Sweep down and to the left
+        while True:
+            if row >= 0 and column < columns and grid[row][column] is None:
+                utah(row, column, codeword)
+                codeword += 1
+            row += 2
+            column -= 2
+            if not (row < rows and column >= 0):
+                break
+        row += 3
+        column += 1
+        if not (row < rows or column < columns):
+            break
+    if grid[rows - 1][columns - 1] is None:
+        grid[rows - 1][columns - 1] = grid[rows - 2][columns - 2] = -1
+        grid[rows - 1][columns - 2] = grid[rows - 2][columns - 1] = -2
+    return grid
+
+
+def matrix(text):
+    """The DataMatrix symbol of ``text`` as rows of ``1``/``0`` modules."""
+    (size, region, _, _, _), words = codewords(text)
+    regions = size // (region + 2)
+    mapping = regions * region
+    grid = _placement(mapping, mapping)
+    symbol = []
+    for block_row in range(regions):
+        # Top timing pattern, alternating from a dark module on the left
+        symbol.append(("10" * (size // 2)))
+        for r in range(region):
+            cells = grid[block_row * region + r]
+            line = []
+            for block_column in range(regions):
+                line.append("1")
+                for cell in cells[block_column * region:(block_column + 1) * region]:
+                    if cell < 0:
+                        line.append("1" if cell == -1 else "0")
+                    else:
+                        line.append(str(words[cell >> 3] >> (7 - (cell & 7)) & 1))
+                # Right timing pattern: dark on the odd rows of the region block
+                line.append("1" if r % 2 == 0 else "0")
+            symbol.append("".join(line))
+        # Solid bottom edge
+        symbol.append("1" * size)
+    return symbol
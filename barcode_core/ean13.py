@@ -0,0 +1,35 @@
+"""Built-in EAN-13 encoder.
+
+The 13 digits are encoded as 95 modules: the first digit is not drawn but
+selects the L/G parity of the six digits on the left, the right six use the
+R patterns, and guard bars separate the halves. Check digits are those of
+``gs1``.
+"""
+
+# L-code modules of each digit; R is its complement and G the reversed R
+L_CODES = (
+    "0001101", "0011001", "0010011", "0111101", "0100011",
+    "0110001", "0101111", "0111011", "0110111", "0001011",
+)
+R_CODES = tuple(code.translate(str.maketrans("01", "10")) for code in L_CODES)
+G_CODES = tuple(code[::-1] for code in R_CODES)
+# Parity of the left-hand digits for each first digit
+PARITY = (
+    "LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG",
+    "LGGLLG", "LGGGLL", "LGLGLG", "LGLGGL", "LGGLGL",
+)
+# EAN-13 asks for at least 11 modules of quiet zone on the left (7 on the right)
+QUIET_ZONE_MODULES = 11
+
+
+def modules(code):
+    """The 13-digit ``code`` as a string of 95 ``1`` (bar) and ``0`` modules."""
+    if len(code) != 13 or not code.isdigit():
+        raise ValueError("EAN-13 necesita 13 dígitos")
+    digits = [int(char) for char in code]
+    left = "".join(
+        (L_CODES if parity == "L" else G_CODES)[digit]
+        for parity, digit in zip(PARITY[digits[0]], digits[1:7])
+    )
+    right = "".join(R_CODES[digit] for digit in digits[7:])
+    return "101" + left + "01010" + right + "101"
@@ -0,0 +1,371 @@
+"""Streaming export of the database and its barcode images.
+
+Records go out as CSV or JSON Lines; images as a ZIP of PNGs or as a PDF of
+label sheets. Everything is a pipeline of generators: records are read page
+by page, work is done in small chunks on a pool and at most ``buffer`` chunks
+are in flight, so memory stays flat however many codes are exported (the
+one exception is the ZIP central directory, about 0.5 KB per image, which
+``zipfile`` keeps until the archive is closed).
+
+The PDF is drawn with vector bars (or modules, for 2D symbols) straight from
+the built-in encoders of each record's symbology (no Pillow, no image files)
+and written page by page by ``PdfSheetWriter``.
+"""
+
+import csv
+import io
+import json
+import os
+import re
+import zlib
+from collections import deque
+from itertools import islice
+
+from .rendering import sanitize_filename
+
+FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".zip": "zip",
+    ".pdf": "pdf",
+}
+CHUNK_SIZE = 64
+# Points (1/72 inch); A4 portrait
+PAGE_SIZE = (595.0, 842.0)
+# Runs of dark modules, drawn as one rectangle each
+_RUN_RE = re.compile("1+")
+
+
+def format_for(path):
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"formato de exportación desconocido: {path}")
+    return fmt
+
+
+def iter_records(storage, codes=None, page_size=1000):
+    """Records of ``storage`` (only those of ``codes`` if given), page by page."""
+    if codes is None:
+        yield from storage
+        return
+    view = storage.filtered(codes)
+    offset = 0
+    while True:
+        page = view.page(offset, page_size)
+        if not page:
+            return
+        yield from page
+        offset += len(page)
+
+
+def chunked(items, size=CHUNK_SIZE):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bounded_map(func, items, pool, buffer):
+    """``pool.map(func, items)`` with at most ``buffer`` items in flight.
+
+    ``Executor.map`` submits the whole input at once; this keeps both the
+    input and the finished results bounded, in order.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(func, item))
+        if len(pending) >= buffer:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def write_csv(records, out):
+    writer = csv.writer(out)
+    writer.writerow(["code", "timestamp", "filename", "symbology"])
+    count = 0
+    for record in records:
+        writer.writerow(
+            [record["code"], record["timestamp"], record["filename"], record["symbology"]]
+        )
+        count += 1
+    return count
+
+
+def write_jsonl(records, out):
+    count = 0
+    for record in records:
+        out.write(json.dumps(record.as_dict(), ensure_ascii=False))
+        out.write("\n")
+        count += 1
+    return count
+
+
+def _png_chunk(job):
+    """Worker entry point: ``[(arcname, png bytes or error)]`` for a chunk.
+
+    Existing images are read (loose or packed); missing ones are rendered in
+    memory without being added to the codes folder.
+    """
+    from .imagestore import get_image_store
+    from .symbology import get_symbology
+
+    folder, items = job
+    store = get_image_store(folder)
+    result = []
+    for code, filename, symbology in items:
+        name = (filename or sanitize_filename(code)) + ".png"
+        try:
+            data = None
+            path = store.locate(filename) if filename else None
+            if path is not None:
+                with open(path, "rb") as file:
+                    data = file.read()
+            elif filename:
+                data = store.pack.read(filename)
+            if data is None:
+                buffer = io.BytesIO()
+                symbology = get_symbology(symbology)
+                symbology.to_png(code, buffer, **symbology.png_options)
+                data = buffer.getvalue()
+            result.append((name, data))
+        except Exception as e:
+            result.append((name, e))
+    return result
+
+
+def _pdf_text(text):
+    escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return escaped.encode("latin-1", errors="replace")
+
+
+def label_ops(code, width, height, symbology=None):
+    """PDF drawing operators for one ``width`` x ``height`` label at the origin."""
+    from .symbology import get_symbology
+
+    symbology = get_symbology(symbology)
+    rows = symbology.rows(code)
+    modules = len(rows[0])
+    bottom = height * 0.32
+    if symbology.linear:
+        module = min(1.5, width * 0.9 / modules)
+        row_height = height * 0.55
+    else:
+        module = row_height = min(width * 0.9, height * 0.62) / modules
+        bottom = height * 0.3
+    left = (width - module * modules) / 2
+    out = []
+    # Rows go top down, PDF y coordinates bottom up
+    for y, row in enumerate(reversed(rows)):
+        for run in _RUN_RE.finditer(row):
+            out.append(
+                b"%.2f %.2f %.2f %.2f re\n"
+                % (left + run.start() * module, bottom + y * row_height,
+                   (run.end() - run.start()) * module, row_height)
+            )
+    out.append(b"f\n")
+    # Courier is monospaced (0.6 em), so the text can be centered exactly
+    size = min(9.0, width * 0.9 / max(1, len(code)) / 0.6)
+    text_x = (width - len(code) * size * 0.6) / 2
+    out.append(b"BT /F1 %.1f Tf %.2f %.2f Td (" % (size, text_x, height * 0.12))
+    out.append(_pdf_text(code))
+    out.append(b") Tj ET\n")
+    return b"".join(out)
+
+
+def _labels_chunk(job):
+    """Worker entry point: ``[(code, operators or error)]`` for a chunk."""
+    items, width, height = job
+    result = []
+    for code, symbology in items:
+        try:
+            result.append((code, label_ops(code, width, height, symbology)))
+        except Exception as e:
+            result.append((code, e))
+    return result
+
+
+class PdfSheetWriter:
+    """Writes label sheets to a PDF one page at a time.
+
+    Only the byte offsets of the objects written so far are kept, so pages
+    are flushed to the file as soon as they are full.
+    """
+
+    def __init__(self, file, columns=3, rows=10, page_size=PAGE_SIZE, margin=28.0):
+        self.file = file
+        self.columns = columns
+        self.rows = rows
+        self.width, self.height = page_size
+        self.margin = margin
+        self.cell_width = (self.width - 2 * margin) / columns
+        self.cell_height = (self.height - 2 * margin) / rows
+        # Objects 1-3 (catalog, page tree, font) are written at the end
+        self.offsets = {}
+        self.next_id = 4
+        self.page_ids = []
+        self.labels = []
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, data):
+        self.file.write(data)
+
+    def _object(self, object_id, body):
+        self.offsets[object_id] = self.file.tell()
+        self._write(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+
+    def add(self, ops):
+        """Add a label drawn by ``label_ops`` for ``cell_width`` x ``cell_height``."""
+        self.labels.append(ops)
+        if len(self.labels) == self.columns * self.rows:
+            self._flush_page()
+
+    def _flush_page(self, force=False):
+        if not self.labels and not force:
+            return
+        out = []
+        for i, ops in enumerate(self.labels):
+            row, column = divmod(i, self.columns)
+            x = self.margin + column * self.cell_width
+            y = self.height - self.margin - (row + 1) * self.cell_height
+            out.append(b"q 1 0 0 1 %.2f %.2f cm\n" % (x, y))
+            out.append(ops)
+            out.append(b"Q\n")
+        self.labels = []
+        content = zlib.compress(b"".join(out), 1)
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self._object(
+            content_id,
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content)
+            + content
+            + b"\nendstream",
+        )
+        self._object(
+            page_id,
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.0f %.0f] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (self.width, self.height, content_id),
+        )
+        self.page_ids.append(page_id)
+
+    def close(self):
+        """Finish the last page and write the page tree, xref and trailer."""
+        # A PDF needs at least one page, even if it is blank
+        self._flush_page(force=not self.page_ids)
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        self._object(
+            2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_ids))
+        )
+        self._object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>")
+        xref = self.file.tell()
+        count = self.next_id
+        lines = [b"xref\n0 %d\n" % count, b"0000000000 65535 f \n"]
+        for object_id in range(1, count):
+            lines.append(b"%010d 00000 n \n" % self.offsets[object_id])
+        self._write(b"".join(lines))
+        self._write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, xref)
+        )
+
+
+def export(
+    storage,
+    path,
+    fmt=None,
+    codes=None,
+    folder=None,
+    workers=None,
+    buffer=None,
+    columns=3,
+    rows=10,
+    cancelled=None,
+    on_progress=None,
+    on_error=None,
+):
+    """Export the records (of ``codes`` if given) to ``path``. Returns the count.
+
+    ``fmt`` is one of ``csv``, ``jsonl``, ``zip`` (the images of ``folder``)
+    or ``pdf`` (label sheets of ``columns`` x ``rows``); by default it follows
+    the extension. ``on_progress(count)`` is called every few hundred
+    records; when ``cancelled()`` becomes true the export stops and the file
+    holds what was written so far. Records whose image cannot be read or
+    drawn are left out of ZIP and PDF exports and passed to
+    ``on_error(code or file name, exception)``.
+    """
+    fmt = fmt or format_for(path)
+    records = iter_records(storage, codes)
+
+    def watch(items):
+        for count, item in enumerate(items, 1):
+            if cancelled and cancelled():
+                return
+            if on_progress and count % 500 == 0:
+                on_progress(count)
+            yield item
+
+    if fmt in ("csv", "jsonl"):
+        writer = write_csv if fmt == "csv" else write_jsonl
+        with open(path, "w", encoding="utf-8", newline="") as out:
+            count = writer(watch(records), out)
+        if on_progress:
+            on_progress(count)
+        return count
+
+    import zipfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    buffer = buffer or workers * 2
+    count = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if fmt == "zip":
+            jobs = (
+                (
+                    folder,
+                    [
+                        (record["code"], record["filename"], record["symbology"])
+                        for record in chunk
+                    ],
+                )
+                for chunk in chunked(watch(records))
+            )
+            # PNGs are already compressed
+            with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+                for results in bounded_map(_png_chunk, jobs, pool, buffer):
+                    for name, data in results:
+                        if isinstance(data, Exception):
+                            if on_error:
+                                on_error(name, data)
+                            continue
+                        archive.writestr(name, data)
+                        count += 1
+        elif fmt == "pdf":
+            with open(path, "wb") as out:
+                sheet = PdfSheetWriter(out, columns, rows)
+                jobs = (
+                    (
+                        [(record["code"], record["symbology"]) for record in chunk],
+                        sheet.cell_width,
+                        sheet.cell_height,
+                    )
+                    for chunk in chunked(watch(records))
+                )
+                for results in bounded_map(_labels_chunk, jobs, pool, buffer):
+                    for code, ops in results:
+                        if isinstance(ops, Exception):
+                            if on_error:
+                                on_error(code, ops)
+                            continue
+                        sheet.add(ops)
+                        count += 1
+                sheet.close()
+        else:
+            raise ValueError(f"formato de exportación desconocido: {fmt}")
+    if on_progress:
+        on_progress(count)
+    return count
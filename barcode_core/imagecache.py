@@ -0,0 +1,124 @@
+"""Content-addressed, size-bounded cache of rendered barcode images.
+
+Images are stored under ``<codes folder>/.cache`` with a name derived from
+(code, symbology, writer options). A cache hit is hard-linked (or copied, on
+file systems without hard links) to the requested file name, so regenerating
+a known code skips Pillow entirely and costs no extra disk space. The least
+recently used entries are evicted once the cache exceeds ``max_bytes``.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+CACHE_DIRNAME = ".cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except (FileNotFoundError, FileExistsError):
+        raise
+    except OSError:
+        # No hard link support (e.g. FAT32 or a different volume)
+        shutil.copyfile(src, dst)
+
+
+class RenderCache:
+    def __init__(self, folder, max_bytes=DEFAULT_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(folder, exist_ok=True)
+        self.total_bytes = sum(entry.stat().st_size for entry in self._entries())
+
+    @staticmethod
+    def key(code, symbology="code128", options=None, extension=".png"):
+        payload = json.dumps([code, symbology, options or {}, extension], sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest() + extension
+
+    def _entries(self):
+        with os.scandir(self.folder) as entries:
+            return [entry for entry in entries if entry.is_file()]
+
+    def fetch(self, key, dest):
+        """Materialize cached ``key`` at ``dest``. Returns False on a miss."""
+        path = os.path.join(self.folder, key)
+        try:
+            link_or_copy(path, dest)
+        except FileNotFoundError:
+            with self.lock:
+                self.misses += 1
+            return False
+        except FileExistsError:
+            # Same code and file name generated within the same second
+            pass
+        # Refresh the entry's position in the LRU order
+        os.utime(path)
+        with self.lock:
+            self.hits += 1
+        return True
+
+    def store(self, key, src):
+        """Add the freshly rendered ``src`` under ``key``."""
+        path = os.path.join(self.folder, key)
+        try:
+            link_or_copy(src, path)
+        except FileExistsError:
+            # Rendered concurrently by another worker
+            return
+        with self.lock:
+            self.total_bytes += os.path.getsize(path)
+            over = self.total_bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def clear(self):
+        """Delete every cached image. Returns the number removed."""
+        with self.lock:
+            removed = 0
+            for entry in self._entries():
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+            self.total_bytes = 0
+        return removed
+
+    def evict(self):
+        """Delete least recently used entries until under ``max_bytes``."""
+        with self.lock:
+            entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+            total = sum(entry.stat().st_size for entry in entries)
+            # Leave some headroom so that every miss does not trigger a scan
+            target = self.max_bytes * 0.9
+            for entry in entries:
+                if total <= target:
+                    break
+                try:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+                total -= size
+            self.total_bytes = total
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_render_cache(codes_folder, max_bytes=DEFAULT_MAX_BYTES):
+    """Process-wide cache for ``codes_folder`` (created on first use)."""
+    folder = os.path.join(codes_folder, CACHE_DIRNAME)
+    with _caches_lock:
+        cache = _caches.get(folder)
+        if cache is None:
+            cache = _caches[folder] = RenderCache(folder, max_bytes)
+        return cache
@@ -0,0 +1,394 @@
+"""Where the PNG of each record lives inside the codes folder.
+
+Two layouts are supported:
+
+* flat - ``codes/<filename>.png``, the original layout;
+* sharded - ``codes/<xx>/<filename>.png``, where ``xx`` is one of 256
+  subfolders picked from a hash of the filename, so no directory grows
+  beyond a few thousand entries.
+
+The layout is recorded in ``codes/.layout`` (no file means flat). Every read
+and write goes through ``ImageStore``: writes use the current layout and
+reads fall back to the other one, so ``migrate`` can move files while the
+application keeps running.
+
+Old images can also be moved into ``codes/images.pack``, an uncompressed ZIP
+archive whose central directory serves as the index. A packed image is
+extracted again when it is opened. ``zipfile`` is only imported once a
+pack is used, to keep it off the application's startup path.
+
+The pack is never modified in place: additions and removals write a new
+archive next to it, fsync it and swap it in with ``os.replace``, so a crash
+leaves either the old or the new pack. A pack that cannot be read anyway is
+renamed to ``images.pack.corrupt-<date>`` and an empty one is started.
+"""
+
+import os
+import shutil
+import threading
+import time
+import zlib
+
+from .applog import fsync_directory
+
+LAYOUT_FILE = ".layout"
+PACK_FILE = "images.pack"
+FLAT = "flat"
+SHARDED = "sharded"
+LAYOUTS = (FLAT, SHARDED)
+SHARD_NAMES = [f"{i:02x}" for i in range(256)]
+
+
+def shard_of(filename):
+    return SHARD_NAMES[zlib.crc32(filename.encode("utf-8")) & 0xFF]
+
+
+class ImagePack:
+    """Many small PNGs in one indexed, uncompressed ZIP archive.
+
+    If the archive cannot be read it is moved aside (to ``quarantined``)
+    and the reason is kept in ``load_error``.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.names = set()
+        self.load_error = None
+        self.quarantined = None
+        self._reader = None
+        if os.path.exists(path):
+            import zipfile
+
+            try:
+                with zipfile.ZipFile(path) as archive:
+                    self.names = {name[:-4] for name in archive.namelist()}
+            except (zipfile.BadZipFile, OSError) as e:
+                self.load_error = e
+                self.quarantined = f"{path}.corrupt-{time.strftime('%Y%m%d_%H%M%S')}"
+                try:
+                    os.replace(path, self.quarantined)
+                except OSError:
+                    self.quarantined = None
+
+    def __contains__(self, filename):
+        return filename in self.names
+
+    def __len__(self):
+        return len(self.names)
+
+    def _close_reader(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def _swap(self, temp):
+        """Make the finished archive ``temp`` the pack, durably."""
+        with open(temp, "rb+") as file:
+            os.fsync(file.fileno())
+        os.replace(temp, self.path)
+        fsync_directory(self.path)
+
+    def read(self, filename):
+        """PNG bytes of packed ``filename``, or None if it is not packed."""
+        with self.lock:
+            if filename not in self.names:
+                return None
+            if self._reader is None:
+                import zipfile
+
+                self._reader = zipfile.ZipFile(self.path)
+            return self._reader.read(filename + ".png")
+
+    def extract(self, filename, dest):
+        """Write packed ``filename`` to ``dest``. Returns False if it is not packed."""
+        data = self.read(filename)
+        if data is None:
+            return False
+        temp = f"{dest}.{threading.get_ident()}.tmp"
+        with open(temp, "wb") as file:
+            file.write(data)
+        os.replace(temp, dest)
+        return True
+
+    def add_files(self, items, cancelled=None, on_progress=None):
+        """Add ``[(filename, path)]`` to the archive. Returns the names added.
+
+        The current pack is copied once and the new files are appended to
+        the copy, which then replaces it. ``cancelled`` stops early (the
+        files added so far are kept) and ``on_progress(done, total)`` is
+        called every 1000 files.
+        """
+        import zipfile
+
+        items = list(items)
+        added = []
+        with self.lock:
+            self._close_reader()
+            temp = self.path + ".tmp"
+            names = set(self.names)
+            try:
+                if os.path.exists(self.path):
+                    shutil.copyfile(self.path, temp)
+                    mode = "a"
+                else:
+                    mode = "w"
+                with zipfile.ZipFile(temp, mode, zipfile.ZIP_STORED) as archive:
+                    for done, (filename, path) in enumerate(items, 1):
+                        if cancelled and cancelled():
+                            break
+                        if filename not in names:
+                            try:
+                                archive.write(path, filename + ".png")
+                            except FileNotFoundError:
+                                continue
+                            names.add(filename)
+                        added.append(filename)
+                        if on_progress and done % 1000 == 0:
+                            on_progress(done, len(items))
+                self._swap(temp)
+            except BaseException:
+                if os.path.exists(temp):
+                    os.remove(temp)
+                raise
+            self.names = names
+        if on_progress:
+            on_progress(len(items), len(items))
+        return added
+
+    def remove(self, filenames):
+        """Rewrite the archive without ``filenames``. Returns bytes reclaimed."""
+        import zipfile
+
+        with self.lock:
+            doomed = self.names.intersection(filenames)
+            if not doomed:
+                return 0
+            self._close_reader()
+            before = os.path.getsize(self.path)
+            temp = self.path + ".tmp"
+            try:
+                with zipfile.ZipFile(self.path) as source, zipfile.ZipFile(
+                    temp, "w", zipfile.ZIP_STORED
+                ) as target:
+                    for info in source.infolist():
+                        if info.filename[:-4] not in doomed:
+                            target.writestr(info, source.read(info))
+                self._swap(temp)
+            except BaseException:
+                if os.path.exists(temp):
+                    os.remove(temp)
+                raise
+            self.names -= doomed
+            return max(0, before - os.path.getsize(self.path))
+
+    def clear(self):
+        with self.lock:
+            self._close_reader()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.names = set()
+
+
+class ImageStore:
+    """Path resolver for the images of one codes folder."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.layout = FLAT
+        try:
+            with open(os.path.join(folder, LAYOUT_FILE), encoding="utf-8") as file:
+                layout = file.read().strip()
+        except FileNotFoundError:
+            layout = FLAT
+        if layout in LAYOUTS:
+            self.layout = layout
+        self.pack = ImagePack(os.path.join(folder, PACK_FILE))
+
+    def _flat_path(self, filename):
+        return os.path.join(self.folder, filename + ".png")
+
+    def _sharded_path(self, filename):
+        return os.path.join(self.folder, shard_of(filename), filename + ".png")
+
+    def _candidates(self, filename):
+        if self.layout == SHARDED:
+            return self._sharded_path(filename), self._flat_path(filename)
+        return self._flat_path(filename), self._sharded_path(filename)
+
+    def path(self, filename):
+        """Where a new image for ``filename`` is written."""
+        if self.layout == SHARDED:
+            return self._sharded_path(filename)
+        return self._flat_path(filename)
+
+    def locate(self, filename):
+        """Path of the loose image for ``filename``, or None."""
+        for path in self._candidates(filename):
+            if os.path.exists(path):
+                return path
+        return None
+
+    def exists(self, filename):
+        return filename in self.pack or self.locate(filename) is not None
+
+    def materialize(self, filename):
+        """Loose path of ``filename``'s image, extracting it from the pack if
+        needed. Returns None if the image does not exist."""
+        path = self.locate(filename)
+        if path is None and filename in self.pack:
+            path = self.path(filename)
+            if not self.pack.extract(filename, path):
+                return None
+        return path
+
+    def remove(self, filename):
+        """Delete the image of ``filename``, loose or packed. Returns bytes freed (0 if absent)."""
+        return self.remove_many([filename])[1]
+
+    def remove_many(self, filenames):
+        """Delete the images of ``filenames``, loose or packed. Returns
+        ``(images, bytes)`` freed.
+
+        The packed ones are removed together, in one rewrite of the pack.
+        """
+        images = freed = 0
+        packed = []
+        for filename in dict.fromkeys(filenames):
+            found = filename in self.pack
+            if found:
+                packed.append(filename)
+            for path in self._candidates(filename):
+                try:
+                    size = os.path.getsize(path)
+                    os.remove(path)
+                    freed += size
+                    found = True
+                except FileNotFoundError:
+                    pass
+            images += found
+        if packed:
+            freed += self.pack.remove(packed)
+        return images, freed
+
+    def scan(self):
+        """``{filename: (path, size, mtime)}`` of every loose image.
+
+        Lists the folder and its shard subfolders once each with
+        ``os.scandir``; other subfolders (such as the render cache) are
+        skipped.
+        """
+        images = {}
+        shards = set(SHARD_NAMES)
+        folders = [self.folder]
+        while folders:
+            try:
+                with os.scandir(folders.pop()) as entries:
+                    for entry in entries:
+                        name = entry.name
+                        if name.endswith(".png"):
+                            if entry.is_file():
+                                stat = entry.stat()
+                                images[name[:-4]] = (entry.path, stat.st_size, stat.st_mtime)
+                        elif name in shards and entry.is_dir():
+                            folders.append(entry.path)
+            except FileNotFoundError:
+                pass
+        return images
+
+    def set_layout(self, layout):
+        if layout not in LAYOUTS:
+            raise ValueError(f"unknown layout: {layout}")
+        os.makedirs(self.folder, exist_ok=True)
+        if layout == SHARDED:
+            for name in SHARD_NAMES:
+                os.makedirs(os.path.join(self.folder, name), exist_ok=True)
+        marker = os.path.join(self.folder, LAYOUT_FILE)
+        with open(marker + ".tmp", "w", encoding="utf-8") as file:
+            file.write(layout + "\n")
+        os.replace(marker + ".tmp", marker)
+        self.layout = layout
+
+    def migrate(self, layout, cancelled=None, on_progress=None):
+        """Switch to ``layout`` and move the existing images. Returns files moved.
+
+        New images use the new layout at once; until every file has moved,
+        reads find the rest through the fallback, so the folder stays usable.
+        """
+        self.set_layout(layout)
+        images = self.scan()
+        total = len(images)
+        moved = 0
+        for done, (filename, (path, _, _)) in enumerate(images.items(), 1):
+            if cancelled and cancelled():
+                break
+            target = self.path(filename)
+            if path != target:
+                try:
+                    os.replace(path, target)
+                    moved += 1
+                except FileNotFoundError:
+                    pass
+            if on_progress and done % 1000 == 0:
+                on_progress(done, total)
+        if layout == FLAT and not (cancelled and cancelled()):
+            for name in SHARD_NAMES:
+                try:
+                    os.rmdir(os.path.join(self.folder, name))
+                except OSError:
+                    pass
+        if on_progress:
+            on_progress(total, total)
+        return moved
+
+    def pack_images(self, older_than_days=None, keep=(), cancelled=None, on_progress=None):
+        """Move loose images into the pack. Returns ``(files, bytes)`` packed.
+
+        ``older_than_days`` limits it to images not modified for that long;
+        filenames in ``keep`` (e.g. images being rendered) stay loose.
+        """
+        images = self.scan()
+        if older_than_days is not None:
+            cutoff = time.time() - older_than_days * 86400
+            images = {name: info for name, info in images.items() if info[2] < cutoff}
+        items = [(name, info) for name, info in images.items() if name not in keep]
+        files = freed = 0
+        if not items:
+            return files, freed
+        # One rewrite of the pack for the whole run
+        added = set(
+            self.pack.add_files(
+                ((name, info[0]) for name, info in items),
+                cancelled=cancelled,
+                on_progress=on_progress,
+            )
+        )
+        # Loose copies are only removed once the new archive is in place
+        for name, (path, size, _) in items:
+            if name in added:
+                try:
+                    os.remove(path)
+                    files += 1
+                    freed += size
+                except FileNotFoundError:
+                    pass
+        return files, freed
+
+    def clear(self):
+        """Delete the pack (loose images are removed from ``scan()``)."""
+        self.pack.clear()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_image_store(codes_folder):
+    """Process-wide ``ImageStore`` for ``codes_folder`` (created on first use)."""
+    folder = os.path.abspath(codes_folder)
+    with _stores_lock:
+        store = _stores.get(folder)
+        if store is None:
+            store = _stores[folder] = ImageStore(codes_folder)
+        return store
+
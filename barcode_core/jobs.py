@@ -0,0 +1,163 @@
+"""Background job queue for work that must not block the Tk mainloop.
+
+Jobs run on a small pool of worker threads. Workers never call back into the
+GUI directly: progress and results are queued and delivered by ``pump()``,
+which the GUI calls periodically from the Tk thread (``root.after``).
+"""
+
+import itertools
+import queue
+import threading
+
+
+class JobCancelled(Exception):
+    """Raised by ``Job.check_cancelled`` to stop a job early."""
+
+
+class Job:
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, job_id, name, func, args, kwargs, callbacks, events):
+        self.id = job_id
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_done, self.on_error, self.on_progress, self.on_cancel = callbacks
+        self.state = self.PENDING
+        self.progress = ""
+        self.cancel_event = threading.Event()
+        self._events = events
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    @property
+    def finished(self):
+        return self.state in (self.DONE, self.FAILED, self.CANCELLED)
+
+    def cancel(self):
+        """Request cancellation; pending jobs are skipped, running ones must
+        poll ``cancelled`` or call ``check_cancelled``."""
+        self.cancel_event.set()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def report(self, message):
+        """Publish a progress message (called from the worker thread)."""
+        self._events.put((self, "progress", message))
+
+
+class JobQueue:
+    """Runs jobs on ``workers`` threads; several jobs may be in flight."""
+
+    def __init__(self, workers=2):
+        self.pending = queue.Queue()
+        self.events = queue.Queue()
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(
+        self,
+        name,
+        func,
+        *args,
+        on_done=None,
+        on_error=None,
+        on_progress=None,
+        on_cancel=None,
+        **kwargs,
+    ):
+        """Queue ``func(job, *args, **kwargs)``; callbacks run inside ``pump()``."""
+        job = Job(
+            next(self._ids),
+            name,
+            func,
+            args,
+            kwargs,
+            (on_done, on_error, on_progress, on_cancel),
+            self.events,
+        )
+        self.jobs[job.id] = job
+        self.pending.put(job)
+        return job
+
+    def call_soon(self, func, *args):
+        """Run ``func(*args)`` on the thread that calls ``pump()``.
+
+        Safe to call from any thread, e.g. from print spooler callbacks.
+        """
+        self.events.put((None, "call", (func, args)))
+
+    def active(self):
+        """Jobs that are queued or running, oldest first."""
+        return [job for job in self.jobs.values() if not job.finished]
+
+    def cancel_all(self):
+        for job in self.active():
+            job.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        for _ in self._threads:
+            self.pending.put(None)
+
+    def _worker(self):
+        while True:
+            job = self.pending.get()
+            if job is None:
+                return
+            if job.cancelled:
+                self.events.put((job, Job.CANCELLED, None))
+                continue
+            self.events.put((job, Job.RUNNING, None))
+            try:
+                result = job.func(job, *job.args, **job.kwargs)
+            except JobCancelled:
+                self.events.put((job, Job.CANCELLED, None))
+            except Exception as e:
+                self.events.put((job, Job.FAILED, e))
+            else:
+                self.events.put((job, Job.DONE, result))
+
+    def pump(self):
+        """Deliver queued events on the calling thread. Returns events handled."""
+        handled = 0
+        while True:
+            try:
+                job, kind, payload = self.events.get_nowait()
+            except queue.Empty:
+                return handled
+            handled += 1
+            if kind == "call":
+                func, args = payload
+                func(*args)
+                continue
+            if kind == "progress":
+                job.progress = payload
+                if job.on_progress:
+                    job.on_progress(payload)
+                continue
+            job.state = kind
+            if kind == Job.RUNNING:
+                continue
+            self.jobs.pop(job.id, None)
+            if kind == Job.DONE and job.on_done:
+                job.on_done(payload)
+            elif kind == Job.FAILED and job.on_error:
+                job.on_error(payload)
+            elif kind == Job.CANCELLED and job.on_cancel:
+                job.on_cancel()
@@ -0,0 +1,102 @@
+"""Deferred PNG rendering.
+
+In lazy mode a code is stored right away with the name its image will have,
+and the PNG is only written when something needs it (``ensure``) or, in the
+background, once the station has been idle for a while.
+"""
+
+import collections
+import threading
+import time
+
+from .imagestore import get_image_store
+from .rendering import render_png
+
+
+def image_exists(folder, filename):
+    """True if ``filename``'s PNG exists, loose or packed."""
+    return get_image_store(folder).exists(filename)
+
+
+def ensure_image(code, folder, filename, symbology=None):
+    """Path of ``filename``'s PNG, extracting or rendering it if needed."""
+    store = get_image_store(folder)
+    path = store.materialize(filename)
+    if path is None:
+        render_png(code, folder, filename, symbology=symbology)
+        path = store.path(filename)
+    return path
+
+
+class PrerenderQueue:
+    """Renders queued images on a background thread while the user is idle.
+
+    ``touch()`` should be called on user activity; rendering pauses until
+    ``idle_delay`` seconds have passed since the last call.
+    """
+
+    def __init__(self, folder, idle_delay=2.0, on_rendered=None):
+        self.folder = folder
+        self.idle_delay = idle_delay
+        self.on_rendered = on_rendered
+        self.items = collections.OrderedDict()
+        self.condition = threading.Condition()
+        self.last_activity = time.monotonic()
+        self.closed = False
+        self._thread = threading.Thread(target=self._run, name="prerender", daemon=True)
+        self._thread.start()
+
+    def add(self, code, filename, symbology=None):
+        with self.condition:
+            self.items[filename] = (code, symbology)
+            self.condition.notify()
+
+    def add_many(self, records):
+        with self.condition:
+            for record in records:
+                if record["filename"]:
+                    self.items[record["filename"]] = (record["code"], record["symbology"])
+            self.condition.notify()
+
+    def is_pending(self, filename):
+        return filename in self.items
+
+    def pending_count(self):
+        return len(self.items)
+
+    def touch(self):
+        self.last_activity = time.monotonic()
+
+    def ensure(self, code, filename, symbology=None):
+        """Render ``filename`` now if needed (e.g. the user opened it)."""
+        with self.condition:
+            self.items.pop(filename, None)
+        return ensure_image(code, self.folder, filename, symbology)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.items and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+            idle = time.monotonic() - self.last_activity
+            if idle < self.idle_delay:
+                time.sleep(self.idle_delay - idle)
+                continue
+            with self.condition:
+                if not self.items:
+                    continue
+                filename, (code, symbology) = self.items.popitem(last=False)
+            try:
+                ensure_image(code, self.folder, filename, symbology)
+            except Exception:
+                # Rendered again on demand, where the error can be shown
+                continue
+            if self.on_rendered:
+                self.on_rendered(filename)
@@ -0,0 +1,193 @@
+"""Lightweight timings and counters for the hot paths.
+
+``metrics`` is the process-wide registry. ``metrics.timer(name)`` times a
+block in milliseconds into a histogram, ``metrics.observe(name, value)``
+records any other value (e.g. rows loaded) and ``metrics.incr(name)`` bumps a
+counter. Histograms use fixed log-spaced buckets, so recording is a bisect
+and an increment under a lock, cheap enough to leave on permanently, and
+percentiles are approximate (within one bucket, about 33%).
+
+``Profiler`` wraps an opt-in ``cProfile`` capture of the calling thread.
+"""
+
+import json
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+
+# Bucket upper bounds: 8 per decade from 0.01 to 10^6
+BUCKET_BOUNDS = [10 ** (exponent / 8) for exponent in range(-16, 49)]
+
+
+class Histogram:
+    def __init__(self, bounds=BUCKET_BOUNDS):
+        self.bounds = bounds
+        # The last bucket takes everything above the highest bound
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the ``fraction`` quantile."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                bound = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+            "buckets": {
+                f"{bound:.3g}": count
+                for bound, count in zip(self.bounds + [float("inf")], self.buckets)
+                if count
+            },
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, name, value):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def incr(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def timer(self, name):
+        """Record the duration of the ``with`` block in ``name`` (ms)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - started) * 1000)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "since": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+                "taken": datetime.now().isoformat(timespec="seconds"),
+                "counters": dict(self.counters),
+                "histograms": {
+                    name: histogram.snapshot()
+                    for name, histogram in sorted(self.histograms.items())
+                },
+            }
+
+    def dump(self, path):
+        """Write ``snapshot()`` as JSON to ``path``."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.snapshot(), file, indent=2)
+            file.write("\n")
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.histograms = {}
+            self.counters = {}
+
+
+metrics = Metrics()
+
+
+class Profiler:
+    """Start/stop ``cProfile`` on the calling thread and save the result.
+
+    Only that thread is profiled (for the GUI, the Tk thread: event handlers,
+    Treeview refreshes and job callbacks).
+    """
+
+    def __init__(self):
+        self.profile = None
+
+    @property
+    def running(self):
+        return self.profile is not None
+
+    def start(self):
+        import cProfile
+
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self, path=None, top=25):
+        """Stop, save the raw stats to ``path`` (for snakeviz/pstats) and
+        return a text summary of the ``top`` functions by cumulative time."""
+        import io
+        import pstats
+
+        profile, self.profile = self.profile, None
+        profile.disable()
+        if path:
+            profile.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(top)
+        return out.getvalue()
+
+
+class StartupTimer:
+    """Milestones of the application start, in ms since ``started``.
+
+    ``started`` is a ``time.perf_counter()`` taken as early as possible (before
+    the heavy imports); ``started_at`` is the same instant as a wall-clock
+    time, so a launcher can add the interpreter start-up it measured outside.
+    """
+
+    def __init__(self, started=None):
+        now = time.perf_counter()
+        self.started = now if started is None else started
+        self.started_at = time.time() - (now - self.started)
+        self.marks = {}
+
+    def mark(self, name):
+        self.marks[name] = (time.perf_counter() - self.started) * 1000
+
+    def report(self):
+        return {
+            "started_at": self.started_at,
+            "marks_ms": {name: round(ms, 1) for name, ms in self.marks.items()},
+            "modules": len(sys.modules),
+            "frozen": bool(getattr(sys, "frozen", False)),
+            "python": sys.version.split()[0],
+        }
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.report(), file, indent=2)
+            file.write("\n")
@@ -0,0 +1,153 @@
+"""Print plans: many (code, copies) entries packed into few ZPL formats.
+
+Every ``^XA..^XZ`` block prints one label row (one code per column) repeated
+with ``^PQ``. The planner chooses which codes share a row so that whole runs
+print with as few blocks as possible and blank columns only appear in the
+very last row. Codes are validated for the layout's symbology up front, so a
+bad code stops the plan before anything is sent to the printer.
+"""
+
+import heapq
+import re
+
+from .rendering import clean_code
+from .symbology import describe_errors, get_symbology
+from .templates import row_template
+from .zpl import DEFAULT_LAYOUT, build_row
+
+_QTY_RE = re.compile(r"^(.*?)(?:\s*[,;\t]\s*|\s+[xX*]\s*|\s+)(\d+)$")
+
+
+def parse_plan_lines(lines):
+    """Parse ``CODE``, ``CODE,N``, ``CODE x N`` or ``CODE N`` lines.
+
+    Codes are cleaned like typed ones (``clean_code``) and repeated codes are
+    merged, keeping first-seen order. Raises ``ValueError`` for a negative or
+    zero quantity.
+    """
+    copies = {}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        match = _QTY_RE.match(line)
+        if match and match.group(1):
+            code, qty = match.group(1).strip(), int(match.group(2))
+        else:
+            code, qty = line, 1
+        if qty < 1:
+            raise ValueError(f"Cantidad inválida para '{code}': {qty}")
+        code = clean_code(code)
+        if code:
+            copies[code] = copies.get(code, 0) + qty
+    return list(copies.items())
+
+
+def plan_rows(entries, columns):
+    """Pack ``(code, copies)`` entries into ``(row_codes, repeat)`` blocks.
+
+    Columns are apportioned to codes by the D'Hondt method (largest remaining
+    copies per assigned column), then the row is repeated as often as every
+    code in it still allows. Once fewer copies than columns remain, they go in
+    a final partially filled row.
+    """
+    remaining = {}
+    for code, copies in entries:
+        if copies > 0:
+            remaining[code] = remaining.get(code, 0) + copies
+    order = {code: i for i, code in enumerate(remaining)}
+    # Codes without a column in the current row, largest remaining first
+    heap = [(-copies, order[code], code) for code, copies in remaining.items()]
+    heapq.heapify(heap)
+    total = sum(remaining.values())
+    blocks = []
+    while total >= columns:
+        shares = {}
+        chosen = []  # (-copies per column if given one more, order, code)
+        for _ in range(columns):
+            if heap and (not chosen or heap[0] <= chosen[0]):
+                _, _, code = heapq.heappop(heap)
+            else:
+                _, _, code = heapq.heappop(chosen)
+            shares[code] = shares.get(code, 0) + 1
+            ratio = remaining[code] / (shares[code] + 1)
+            heapq.heappush(chosen, (-ratio, order[code], code))
+        repeat = min(remaining[code] // share for code, share in shares.items())
+        row = []
+        for code, share in sorted(shares.items(), key=lambda item: order[item[0]]):
+            row.extend([code] * share)
+            remaining[code] -= share * repeat
+            total -= share * repeat
+            if remaining[code]:
+                heapq.heappush(heap, (-remaining[code], order[code], code))
+            else:
+                del remaining[code]
+        blocks.append((tuple(row), repeat))
+    if remaining:
+        row = [code for code, copies in remaining.items() for _ in range(copies)]
+        row.extend([None] * (columns - len(row)))
+        blocks.append((tuple(row), 1))
+    return blocks
+
+
+class PrintPlan:
+    """A list of ``(code, copies)`` entries laid out with a ``LabelLayout``.
+
+    Codes are normalized for the layout's symbology (e.g. EAN-13 check
+    digits are added); raises ``ValueError`` listing the codes it rejects.
+    """
+
+    def __init__(self, entries, layout=DEFAULT_LAYOUT):
+        entries = list(entries)
+        symbology = get_symbology(layout.symbology)
+        codes, errors = symbology.validate_many(code for code, _ in entries)
+        if errors:
+            raise ValueError(
+                f"{len(errors)} código(s) no válidos para {symbology.label}:\n"
+                + describe_errors(errors)
+            )
+        self.entries = list(zip(codes, (copies for _, copies in entries)))
+        self.layout = layout
+        self.blocks = plan_rows(self.entries, layout.columns)
+
+    @property
+    def rows(self):
+        """Physical label rows fed through the printer."""
+        return sum(repeat for _, repeat in self.blocks)
+
+    @property
+    def labels(self):
+        return sum(copies for _, copies in self.entries)
+
+    @property
+    def blank_slots(self):
+        return sum(row.count(None) * repeat for row, repeat in self.blocks)
+
+    @property
+    def template(self):
+        return row_template(self.layout)
+
+    def to_zpl(self, stored=False):
+        """ZPL for the whole plan.
+
+        With ``stored`` full rows recall the layout's stored format instead of
+        repeating it; the format itself (``self.template.download()``) must
+        have been sent to the printer first, e.g. by the print spooler.
+        """
+        template = self.template
+        value = self.layout.field_value
+        formats = []
+        for row, repeat in self.blocks:
+            if None in row:
+                formats.append(build_row(row, repeat, self.layout))
+            elif stored:
+                formats.append(template.recall(list(map(value, row)), repeat))
+            else:
+                formats.append(template.render(list(map(value, row)), repeat))
+        return "\n".join(formats)
+
+    def summary(self):
+        return (
+            f"{self.labels} etiquetas en {self.rows} fila(s), "
+            f"{len(self.blocks)} bloque(s) ZPL, {self.blank_slots} espacio(s) vacío(s)"
+        )
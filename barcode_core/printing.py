@@ -0,0 +1,227 @@
+"""Printer transports for raw (ZPL) print jobs.
+
+A print target is either a Windows printer name, ``tcp://host[:port]`` for a
+network printer listening on the raw port (9100 by default) or
+``file://path`` to append jobs to a file. The TCP and file transports make it
+possible to test printing against a local stand-in, e.g. ``nc -lk 9100``.
+
+``printers`` caches the list of installed Windows printers, which
+``EnumPrinters`` can take seconds to produce when network printers are
+mapped, and ``check_target`` uses it to validate a target ahead of printing.
+"""
+
+import os
+import threading
+import time
+
+RAW_PORT = 9100
+# Installed printers are enumerated again after this many seconds
+PRINTER_CACHE_TTL = 300.0
+
+
+class Win32Transport:
+    """Windows spooler printer; the handle stays open between jobs."""
+
+    def __init__(self, printer_name, doc_name="ZPL Label"):
+        self.printer_name = printer_name
+        self.doc_name = doc_name
+        self.handle = None
+
+    def open(self):
+        # Imported here so that the module can be loaded on non-Windows machines
+        import win32print
+
+        self.win32print = win32print
+        self.handle = win32print.OpenPrinter(self.printer_name)
+
+    def write(self, data):
+        """Send ``data`` as one RAW document."""
+        self.write_parts([data])
+
+    def write_parts(self, parts, on_written=None):
+        """Send ``parts`` as one RAW document, calling ``on_written(index)``
+        after each part has been handed to the spooler."""
+        if self.handle is None:
+            self.open()
+        win32print = self.win32print
+        win32print.StartDocPrinter(self.handle, 1, (self.doc_name, None, "RAW"))
+        try:
+            win32print.StartPagePrinter(self.handle)
+            for index, part in enumerate(parts):
+                win32print.WritePrinter(self.handle, part)
+                if on_written:
+                    on_written(index)
+            win32print.EndPagePrinter(self.handle)
+        finally:
+            win32print.EndDocPrinter(self.handle)
+
+    def close(self):
+        if self.handle is not None:
+            try:
+                self.win32print.ClosePrinter(self.handle)
+            finally:
+                self.handle = None
+
+
+class TCPTransport:
+    """Network printer on the raw port; the connection is kept open."""
+
+    def __init__(self, host, port=RAW_PORT, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.sock = None
+
+    def open(self):
+        import socket
+
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+
+    def write(self, data):
+        self.write_parts([data])
+
+    def write_parts(self, parts, on_written=None):
+        if self.sock is None:
+            self.open()
+        for index, part in enumerate(parts):
+            self.sock.sendall(part)
+            if on_written:
+                on_written(index)
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            finally:
+                self.sock = None
+
+
+class FileTransport:
+    """Appends every job to a file (useful for tests and debugging)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def open(self):
+        self.file = open(self.path, "ab")
+
+    def write(self, data):
+        self.write_parts([data])
+
+    def write_parts(self, parts, on_written=None):
+        if self.file is None:
+            self.open()
+        for index, part in enumerate(parts):
+            self.file.write(part)
+            self.file.flush()
+            if on_written:
+                on_written(index)
+
+    def close(self):
+        if self.file is not None:
+            try:
+                self.file.close()
+            finally:
+                self.file = None
+
+
+def _tcp_address(target):
+    host, _, port = target[len("tcp://"):].rstrip("/").partition(":")
+    return host, int(port) if port else RAW_PORT
+
+
+def open_transport(target):
+    """Transport for a printer name, ``tcp://host[:port]`` or ``file://path``."""
+    if target.startswith("tcp://"):
+        return TCPTransport(*_tcp_address(target))
+    if target.startswith("file://"):
+        return FileTransport(target[len("file://"):])
+    return Win32Transport(target)
+
+
+def send_raw(target, data):
+    """Send ``data`` (str or bytes) to ``target`` as a single RAW job."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    transport = open_transport(target)
+    try:
+        transport.write(data)
+    finally:
+        transport.close()
+
+
+def enumerate_printers():
+    """Names of the local and connected Windows printers.
+
+    Returns None where win32print is not available.
+    """
+    try:
+        import win32print
+    except ImportError:
+        return None
+    flags = win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS
+    # Level 1 entries are (flags, description, name, comment)
+    return [info[2] for info in win32print.EnumPrinters(flags, None, 1)]
+
+
+class PrinterDirectory:
+    """Installed Windows printers, enumerated at most once per ``ttl`` seconds.
+
+    Concurrent callers wait for the lookup in progress instead of starting
+    another one. ``names()`` is None where win32print is not available.
+    """
+
+    def __init__(self, ttl=PRINTER_CACHE_TTL, lookup=enumerate_printers):
+        self.ttl = ttl
+        self.lookup = lookup
+        self.lock = threading.Lock()
+        self._names = None
+        self._expires = None
+
+    def names(self):
+        with self.lock:
+            if self._expires is None or time.monotonic() >= self._expires:
+                self._names = self.lookup()
+                self._expires = time.monotonic() + self.ttl
+            return None if self._names is None else list(self._names)
+
+    def refresh(self):
+        """Enumerate again now, ignoring the cached list."""
+        with self.lock:
+            self._expires = None
+        return self.names()
+
+
+printers = PrinterDirectory()
+
+
+def check_target(target, directory=printers):
+    """Raise ``ValueError`` if ``target`` clearly cannot be printed to.
+
+    Windows printers must be installed, ``tcp://`` hosts must resolve and
+    ``file://`` paths must be in an existing folder. Nothing is sent.
+    """
+    if not target:
+        raise ValueError("el nombre de la impresora está vacío")
+    if target.startswith("tcp://"):
+        import socket
+
+        try:
+            host, port = _tcp_address(target)
+            socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except (ValueError, OSError) as e:
+            raise ValueError(f"no se puede resolver '{target}': {e}") from None
+        return
+    if target.startswith("file://"):
+        folder = os.path.dirname(os.path.abspath(target[len("file://"):]))
+        if not os.path.isdir(folder):
+            raise ValueError(f"no existe la carpeta '{folder}'")
+        return
+    names = directory.names()
+    if names is None:
+        raise ValueError(
+            "las impresoras de Windows requieren pywin32; use tcp://host:9100 o file://ruta"
+        )
+    if target not in names:
+        raise ValueError(f"la impresora '{target}' no está instalada")
@@ -0,0 +1,55 @@
+"""Barcode image rendering through the built-in encoders and Pillow."""
+
+import re
+from datetime import datetime
+
+
+def clean_code(text):
+    """Normalize user or file input into a barcode value."""
+    return text.strip().replace(" ", "").replace("\n", "").replace("/", "")
+
+
+def sanitize_filename(text):
+    return re.sub(r'[\\/:*?"<>|]', "_", text)
+
+
+def make_filename(text, when=None):
+    """Image name (without extension) for ``text``, e.g. ``barcode_ABC_20240115_143025``."""
+    when = when or datetime.now()
+    return f"barcode_{sanitize_filename(text)}_{when.strftime('%Y%m%d_%H%M%S')}"
+
+
+# Geometry of generated PNGs in pixels, close to python-barcode's ImageWriter
+# defaults at 300 dpi (0.2 mm modules, 15 mm bars, 6.5 mm quiet zone).
+# Part of the render cache key.
+PNG_OPTIONS = {"module_width": 2, "height": 177, "quiet_zone": 38, "margin": 12}
+
+
+def render_png(text, folder, filename=None, use_cache=True, symbology=None):
+    """Render ``text`` as a PNG in ``folder`` and return its filename.
+
+    ``symbology`` is a name from the ``symbology`` registry (Code128 by
+    default) and ``text`` must already be normalized for it. Codes rendered
+    before are served from the render cache (see ``imagecache``) without
+    touching Pillow.
+    """
+    from .imagestore import get_image_store
+    from .symbology import get_symbology
+
+    symbology = get_symbology(symbology)
+
+    filename = filename or make_filename(text)
+    path = get_image_store(folder).path(filename)
+    cache = key = None
+    if use_cache:
+        from .imagecache import RenderCache, get_render_cache
+
+        cache = get_render_cache(folder)
+        key = RenderCache.key(text, symbology.name, symbology.png_options)
+        if cache.fetch(key, path):
+            return filename
+
+    symbology.to_png(text, path, **symbology.png_options)
+    if cache is not None:
+        cache.store(key, path)
+    return filename
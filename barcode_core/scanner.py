@@ -0,0 +1,46 @@
+"""Telling keyboard-wedge scanner input apart from typing.
+
+A USB scanner in keyboard-wedge mode types a whole code within a few
+milliseconds, usually followed by Enter. ``ScanBuffer`` records how fast the
+input grew, so the GUI can handle it as a single scan: when Enter arrives,
+or after a short idle gap if the characters came in faster than anyone can
+type. Slow (human) input is left alone until Enter.
+"""
+
+import time
+
+# Actions for a completed scan
+SCAN_VERIFY = "Solo verificar"
+SCAN_GENERATE = "Generar código"
+SCAN_PRINT = "Generar e imprimir"
+SCAN_ACTIONS = (SCAN_VERIFY, SCAN_GENERATE, SCAN_PRINT)
+
+
+class ScanBuffer:
+    def __init__(self, burst_interval=0.03, min_length=3):
+        # Average seconds per character below which input counts as a scan
+        self.burst_interval = burst_interval
+        self.min_length = min_length
+        self.reset()
+
+    def reset(self):
+        self.first = None
+        self.last = None
+        self.length = 0
+
+    def update(self, length, now=None):
+        """Record that the input is now ``length`` characters long."""
+        now = time.monotonic() if now is None else now
+        if length <= 0:
+            self.reset()
+            return
+        if self.first is None:
+            self.first = now
+        self.last = now
+        self.length = length
+
+    def is_burst(self):
+        if self.length < self.min_length:
+            return False
+        return (self.last - self.first) / (self.length - 1) <= self.burst_interval
+
@@ -0,0 +1,308 @@
+"""Incremental code search: prefix, substring and fuzzy matching.
+
+``CodeIndex`` keeps the distinct codes in a sorted array of upper-cased keys,
+so a prefix query is one ``bisect`` plus a slice, O(log n + k), well under a
+millisecond at a million codes. An n-gram index adds substring and fuzzy
+("typo tolerant") queries. Each distinct key gets an integer id and every
+4-gram of the key, padded with start and end marks, a posting ``array`` of
+ids: about 55 bytes per code, so it is built at any size (``ngrams=True`` or
+``build_ngrams()``). 4-grams rather than trigrams because codes are mostly
+digits: there are only a thousand digit trigrams, so each would list
+thousands of codes. The padding puts every trigram of a key at the start of
+one of its 4-grams, which is how three-character queries are answered.
+
+Every query does bounded work, so the cost does not grow with the history.
+A substring query checks the keys in the posting of its rarest 4-gram, at
+most ``SCAN_LIMIT`` of them. Ids are handed out in key order when the index
+is built, so the keys come out sorted and the scan stops at the first
+``limit`` matches; matches past the first ``SCAN_LIMIT`` candidates are
+missed, which only happens when they are plentiful anyway. A fuzzy query
+counts the 4-grams each key shares with the text over the query's rarest
+postings, as many as fit in ``SCAN_LIMIT`` ids. Queries shorter than three
+characters check the first ``SCAN_LIMIT`` keys.
+
+Matching ignores case. Results are the codes as stored.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import chain, groupby, islice, repeat
+from operator import itemgetter
+
+# Most candidates a substring query checks
+SCAN_LIMIT = 10_000
+# Removed keys left in the postings before they are rebuilt
+_DEAD_LIMIT = 10_000
+# Keys joined per str.find pass in _matching: the first pass is small
+# because most queries stop there
+_CHUNKS = (64, 256, 1024, 4096)
+
+
+def trigrams(key):
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+def grams(key):
+    """The 4-grams a key is indexed under (with start and end marks)."""
+    padded = f"\x02{key}\x03"
+    return {padded[i:i + 4] for i in range(len(padded) - 3)}
+
+
+def _inner_grams(key):
+    """The 4-grams of a query, which may sit anywhere in a key."""
+    return {key[i:i + 4] for i in range(len(key) - 3)}
+
+
+def _matching(keys, key, limit=None):
+    """Those of ``keys`` that contain ``key``, in order.
+
+    The keys are joined a chunk at a time and searched with ``str.find``,
+    which is much faster than testing them one by one.
+    """
+    found = []
+    keys = iter(keys)
+    sizes = chain(_CHUNKS, iter(lambda: _CHUNKS[-1], None))
+    while limit is None or len(found) < limit:
+        chunk = list(islice(keys, next(sizes)))
+        if not chunk:
+            break
+        block = "\n".join(chunk)
+        start = block.find(key)
+        while start >= 0 and (limit is None or len(found) < limit):
+            begin = block.rfind("\n", 0, start) + 1
+            end = block.find("\n", start)
+            if end < 0:
+                end = len(block)
+            found.append(block[begin:end])
+            start = block.find(key, end)
+    return found
+
+
+class CodeIndex:
+    def __init__(self, codes=(), ngrams=False):
+        codes = list(dict.fromkeys(codes))
+        keys = [code.upper() for code in codes]
+        # Most codes are already upper case: share the string instead of a copy
+        keys = [code if key == code else key for key, code in zip(keys, codes)]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys = list(map(keys.__getitem__, order))
+        self.codes = list(map(codes.__getitem__, order))
+        # N-gram index: id of each position's key, key of each id ("" once
+        # removed), 4-gram -> ids and trigram -> the 4-grams starting with it.
+        # Ids below ``ordered`` were given out in key order.
+        self.ids = None
+        self.id_keys = None
+        self.grams = None
+        self.extensions = None
+        self.ordered = 0
+        self.dead = 0
+        if ngrams:
+            self.build_ngrams()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, code):
+        return self._position(code) is not None
+
+    def _position(self, code):
+        key = code.upper()
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key:
+            if self.codes[i] == code:
+                return i
+            i += 1
+        return None
+
+    def build_ngrams(self):
+        ids = array("i")
+        id_keys = []
+        postings = {}
+        find = postings.get
+        previous = None
+        key_id = -1
+        for key in self.keys:
+            if key != previous:
+                # Case variants of a code share a key and its id
+                previous = key
+                key_id += 1
+                id_keys.append(key)
+                padded = f"\x02{key}\x03"
+                for i in range(len(padded) - 3):
+                    gram = padded[i:i + 4]
+                    posting = find(gram)
+                    if posting is None:
+                        postings[gram] = array("i", (key_id,))
+                    elif posting[-1] != key_id:
+                        posting.append(key_id)
+            ids.append(key_id)
+        extensions = {}
+        for gram in postings:
+            extensions.setdefault(gram[:3], []).append(gram)
+        self.ids = ids
+        self.id_keys = id_keys
+        self.grams = postings
+        self.extensions = extensions
+        self.ordered = len(id_keys)
+        self.dead = 0
+
+    def add(self, code):
+        if self._position(code) is not None:
+            return
+        key = code.upper()
+        if key == code:
+            key = code
+        i = bisect_left(self.keys, key)
+        if self.grams is not None:
+            if i < len(self.keys) and self.keys[i] == key:
+                key_id = self.ids[i]
+            else:
+                key_id = len(self.id_keys)
+                self.id_keys.append(key)
+                for gram in grams(key):
+                    posting = self.grams.get(gram)
+                    if posting is None:
+                        posting = self.grams[gram] = array("i")
+                        self.extensions.setdefault(gram[:3], []).append(gram)
+                    posting.append(key_id)
+            self.ids.insert(i, key_id)
+        self.keys.insert(i, key)
+        self.codes.insert(i, code)
+
+    def add_many(self, codes):
+        for code in codes:
+            self.add(code)
+
+    def remove(self, code):
+        i = self._position(code)
+        if i is None:
+            return
+        key = self.keys[i]
+        del self.keys[i]
+        del self.codes[i]
+        if self.grams is None:
+            return
+        key_id = self.ids.pop(i)
+        if self._live(key):
+            return
+        # Queries skip the dead id (an empty key matches nothing); a later
+        # add of the key gets a new one
+        self.id_keys[key_id] = ""
+        self.dead += 1
+        if self.dead > max(_DEAD_LIMIT, len(self.keys) // 4):
+            self.build_ngrams()
+
+    def _live(self, key):
+        i = bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+    def _codes_for(self, key):
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key:
+            yield self.codes[i]
+            i += 1
+
+    def _codes_of(self, keys, limit):
+        result = []
+        for key in keys:
+            result.extend(self._codes_for(key))
+            if len(result) >= limit:
+                break
+        return result[:limit]
+
+    def prefix(self, text, limit=20):
+        """Codes starting with ``text``, in sorted order."""
+        key = text.upper()
+        start = bisect_left(self.keys, key)
+        end = start
+        stop = min(len(self.keys), start + limit)
+        while end < stop and self.keys[end].startswith(key):
+            end += 1
+        return self.codes[start:end]
+
+    def count_prefix(self, text):
+        key = text.upper()
+        return bisect_left(self.keys, key + "\U0010ffff") - bisect_left(self.keys, key)
+
+    def _containing(self, key, limit):
+        """Sorted keys containing ``key`` (at most ``limit``), from at most
+        ``SCAN_LIMIT`` candidates."""
+        if self.grams is None or len(key) < 3:
+            found = _matching(islice(self.keys, SCAN_LIMIT), key, limit)
+            return list(dict.fromkeys(found))
+        if len(key) > 3:
+            postings = [min((self.grams.get(gram, ()) for gram in _inner_grams(key)), key=len)]
+        else:
+            postings = [self.grams[gram] for gram in self.extensions.get(key, ())]
+        # Ids from the last build are in key order: merge them (a key can be
+        # in two extensions of a trigram, hence groupby) and stop at ``limit``
+        # matches. Ids added since then are few and checked in full.
+        splits = [bisect_left(posting, self.ordered) for posting in postings]
+        ordered = map(islice, postings, splits)
+        if len(postings) == 1:
+            keys = map(self.id_keys.__getitem__, islice(next(ordered), SCAN_LIMIT))
+        else:
+            keys = map(self.id_keys.__getitem__, islice(heapq.merge(*ordered), SCAN_LIMIT))
+            keys = (key for key, _ in groupby(keys))
+        found = _matching(keys, key, limit)
+        newer = set(chain.from_iterable(map(islice, postings, splits, repeat(None))))
+        if newer:
+            newer = map(self.id_keys.__getitem__, islice(newer, SCAN_LIMIT))
+            found = sorted(set(found).union(_matching(newer, key)))
+        return found[:limit]
+
+    def contains(self, text, limit=20):
+        """Codes containing ``text`` anywhere, checking at most
+        ``SCAN_LIMIT`` candidates (see the module docstring)."""
+        return self._codes_of(self._containing(text.upper(), limit), limit)
+
+    def fuzzy(self, text, limit=20):
+        """Codes most similar to ``text`` (typo tolerant).
+
+        Keys are counted over the postings of the query's 4-grams, rarest
+        first, and the ones sharing the most are ranked by trigram overlap
+        with ``text``. Needs the n-gram index; returns ``[]`` without it or
+        for queries shorter than a 4-gram.
+        """
+        key = text.upper()
+        if self.grams is None or len(key) < 4:
+            return []
+        postings = sorted((self.grams.get(gram, ()) for gram in _inner_grams(key)), key=len)
+        hits = Counter()
+        budget = SCAN_LIMIT
+        used = 0
+        for posting in postings:
+            if len(posting) > budget:
+                break
+            hits.update(posting)
+            budget -= len(posting)
+            used += 1
+        # A typo spoils at most four 4-grams; keep keys sharing about half
+        needed = max(1, used // 2)
+        close = (item for item in hits.items() if item[1] >= needed)
+        close = heapq.nlargest(limit * 4, close, key=itemgetter(1))
+        query = trigrams(key)
+
+        def score(candidate):
+            grams = trigrams(candidate)
+            shared = len(query & grams)
+            return shared / (len(query) + len(grams) - shared)
+
+        candidates = [self.id_keys[key_id] for key_id, _ in close]
+        candidates = [candidate for candidate in candidates if candidate]
+        return self._codes_of(heapq.nlargest(limit, candidates, key=score), limit)
+
+    def search(self, text, limit=20):
+        """Prefix matches first, then substring matches; fuzzy ones only if
+        nothing matches exactly."""
+        result = self.prefix(text, limit)
+        if len(result) < limit:
+            seen = set(result)
+            result.extend(
+                code for code in self.contains(text, limit + len(result)) if code not in seen
+            )
+        if not result:
+            result = self.fuzzy(text, limit)
+        return result[:limit]
@@ -0,0 +1,236 @@
+"""Persisted settings and named printer profiles.
+
+``Settings`` is a small JSON file next to the database holding the printer
+profiles, the active one and GUI options that should survive a restart:
+
+    {"active": "Principal",
+     "profiles": {"Principal": {"target": "...", "dpi": 203, ...}},
+     "options": {"symbology": "code128", ...}}
+
+A profile describes a printer: where jobs go (a Windows printer name,
+``tcp://host:9100`` or ``file://path``), its resolution, the label width
+and number of columns, and optionally the darkness and speed to set on it.
+The label layout is derived from it, so nothing about the printer is
+hard-coded in the print paths.
+"""
+
+import json
+import os
+
+from . import DEFAULT_PRINTER, DEFAULT_SYMBOLOGY
+
+DEFAULT_PROFILE = "Principal"
+# Dots per millimetre of the usual print head resolutions
+DOTS_PER_MM = {152: 6, 203: 8, 300: 12, 600: 24}
+# The built-in label layout was designed for 203 dpi
+BASE_DPI = 203
+# ~SD darkness and ^PR print speed (inches per second) accepted by ZPL
+DARKNESS_RANGE = (0, 30)
+SPEED_RANGE = (1, 14)
+
+
+class PrinterProfile:
+    """A named printer and the geometry of its labels.
+
+    ``darkness`` and ``speed`` are None to keep the printer's own settings.
+    The defaults reproduce the original two-column label (900 dots wide at
+    203 dpi, one column every 450 dots).
+    """
+
+    FIELDS = ("target", "dpi", "label_width_mm", "columns", "darkness", "speed")
+
+    def __init__(
+        self,
+        name=DEFAULT_PROFILE,
+        target=DEFAULT_PRINTER,
+        dpi=BASE_DPI,
+        label_width_mm=112.5,
+        columns=2,
+        darkness=None,
+        speed=None,
+    ):
+        self.name = name
+        self.target = target
+        self.dpi = dpi
+        self.label_width_mm = label_width_mm
+        self.columns = columns
+        self.darkness = darkness
+        self.speed = speed
+
+    @classmethod
+    def from_dict(cls, name, data):
+        return cls(name, **{field: data[field] for field in cls.FIELDS if field in data})
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def problems(self):
+        """Reasons the profile's values are unusable (no printer lookup)."""
+        found = []
+        if not str(self.target).strip():
+            found.append("el nombre de la impresora está vacío")
+        if self.dpi not in DOTS_PER_MM:
+            found.append(
+                "resolución no soportada (use " + ", ".join(map(str, DOTS_PER_MM)) + " dpi)"
+            )
+        if not isinstance(self.columns, int) or self.columns < 1:
+            found.append("debe haber al menos una columna")
+        width = self.label_width_mm
+        if isinstance(width, bool) or not isinstance(width, (int, float)) or width <= 0:
+            found.append("el ancho de etiqueta debe ser positivo")
+        for value, (low, high), label in (
+            (self.darkness, DARKNESS_RANGE, "oscuridad"),
+            (self.speed, SPEED_RANGE, "velocidad"),
+        ):
+            if value is not None and not (isinstance(value, int) and low <= value <= high):
+                found.append(f"la {label} debe estar entre {low} y {high}")
+        return found
+
+    def validate(self, lookup=True):
+        """Raise ``ValueError`` listing every problem of the profile.
+
+        With ``lookup`` the target is also checked against the installed
+        printers (cached, see ``printing.printers``) or resolved.
+        """
+        found = self.problems()
+        if lookup and not found:
+            from .printing import check_target
+
+            try:
+                check_target(self.target)
+            except ValueError as e:
+                found.append(str(e))
+        if found:
+            raise ValueError(f"Perfil '{self.name}': " + "; ".join(found))
+
+    @property
+    def width_dots(self):
+        return round(self.label_width_mm * DOTS_PER_MM[self.dpi])
+
+    def layout(self, symbology=DEFAULT_SYMBOLOGY):
+        """``LabelLayout`` for this printer, scaled from the 203 dpi layout."""
+        from .zpl import DEFAULT_LAYOUT, LabelLayout
+
+        scale = DOTS_PER_MM[self.dpi] / DOTS_PER_MM[BASE_DPI]
+        return LabelLayout(
+            columns=self.columns,
+            origin_x=round(DEFAULT_LAYOUT.origin_x * scale),
+            origin_y=round(DEFAULT_LAYOUT.origin_y * scale),
+            column_pitch=self.width_dots // self.columns,
+            # ^BY takes whole dots
+            module_width=max(1, round(DEFAULT_LAYOUT.module_width * scale)),
+            ratio=DEFAULT_LAYOUT.ratio,
+            bar_height=round(DEFAULT_LAYOUT.bar_height * scale),
+            symbology=symbology,
+            matrix_module=round(DEFAULT_LAYOUT.matrix_module * scale),
+        )
+
+    def setup_zpl(self):
+        """Printer settings sent once per connection, before the first label."""
+        commands = [f"^PW{self.width_dots}"]
+        if self.speed is not None:
+            commands.append(f"^PR{self.speed}")
+        if self.darkness is not None:
+            commands.append(f"~SD{self.darkness:02d}")
+        return "^XA" + "".join(commands) + "^XZ"
+
+
+class Settings:
+    """Printer profiles and options stored in a JSON file.
+
+    A missing file gives a single default profile. A damaged one is ignored
+    (the reason is kept in ``load_error``) and replaced on the next ``save``.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.profiles = {}
+        self.active = DEFAULT_PROFILE
+        self.options = {}
+        self.load_error = None
+        self.load()
+
+    def load(self):
+        self.profiles = {}
+        self.options = {}
+        self.active = None
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as file:
+                    data = json.load(file)
+                profiles = {
+                    name: PrinterProfile.from_dict(name, values)
+                    for name, values in data.get("profiles", {}).items()
+                }
+                options = data.get("options", {})
+                if not isinstance(options, dict):
+                    raise TypeError("'options' debe ser un objeto")
+                active = data.get("active")
+                if active is not None and not isinstance(active, str):
+                    raise TypeError("'active' debe ser el nombre de un perfil")
+                self.profiles, self.options, self.active = profiles, dict(options), active
+            except (OSError, ValueError, TypeError, AttributeError) as e:
+                self.load_error = e
+        if not self.profiles:
+            self.profiles = {DEFAULT_PROFILE: PrinterProfile(DEFAULT_PROFILE)}
+        if self.active not in self.profiles:
+            self.active = next(iter(self.profiles))
+
+    def save(self):
+        """Write the file atomically."""
+        data = {
+            "active": self.active,
+            "profiles": {name: profile.as_dict() for name, profile in self.profiles.items()},
+            "options": self.options,
+        }
+        temp = self.path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2, ensure_ascii=False)
+            file.write("\n")
+        os.replace(temp, self.path)
+
+    @property
+    def profile(self):
+        """The active profile."""
+        return self.profiles[self.active]
+
+    def get(self, name, default=None):
+        return self.options.get(name, default)
+
+    def set(self, name, value):
+        self.options[name] = value
+
+    def put_profile(self, profile, activate=True):
+        """Add or replace ``profile`` (by name)."""
+        profile.validate(lookup=False)
+        self.profiles[profile.name] = profile
+        if activate:
+            self.active = profile.name
+
+    def remove_profile(self, name):
+        """Delete profile ``name``; the last profile cannot be removed."""
+        if len(self.profiles) <= 1:
+            raise ValueError("Debe quedar al menos un perfil de impresora")
+        del self.profiles[name]
+        if self.active == name:
+            self.active = next(iter(self.profiles))
+
+    def validate_all(self):
+        """``validate_profiles`` of every profile."""
+        return validate_profiles(list(self.profiles.values()))
+
+
+def validate_profiles(profiles):
+    """``{name: error message or None}`` for each of ``profiles``.
+
+    Meant to run once at startup on a worker thread: the printer enumeration
+    (then cached) and host lookups happen there instead of on the first print.
+    """
+    results = {}
+    for profile in profiles:
+        try:
+            profile.validate()
+            results[profile.name] = None
+        except (TypeError, ValueError) as e:
+            results[profile.name] = str(e)
+    return results
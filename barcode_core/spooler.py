@@ -0,0 +1,245 @@
+"""Print spooler that batches queued ZPL labels over a persistent connection.
+
+Labels submitted while the printer is busy (or within ``linger`` seconds of
+each other) are concatenated into one multi-label RAW job, so the per-job
+cost of opening the printer and starting a document is paid once per batch
+instead of once per label. Failed writes reopen the transport and are retried.
+
+Within a job every ZPL format (``^XA..^XZ``) is written separately and
+counted in ``SpoolItem.sent``, so a retry resends only the formats that were
+not written yet. Delivery is still at least once for the format being
+written when the connection broke (and for data the printer had received
+but not printed): such a label may print twice, never zero times.
+
+Items may name the stored-format templates (``^DF``) their ZPL recalls; each
+template is downloaded once per printer connection, right before the first
+job that needs it. Likewise ``setup`` (printer settings such as darkness
+and speed) is sent at the start of every new connection, and ``preconnect``
+opens the connection as soon as the spooler starts, so the first label does
+not wait for the printer lookup.
+"""
+
+import queue
+import re
+import threading
+import time
+
+from .metrics import metrics
+from .printing import open_transport
+
+# Splits ZPL after every format, dropping the newline that joins them
+_FORMAT_END = re.compile(rb"(?<=\^XZ)\r?\n?")
+
+
+class SpoolItem:
+    def __init__(self, data, labels, callback, templates=()):
+        self.data = data
+        self.labels = labels
+        self.callback = callback
+        self.templates = templates
+        self.formats = [part for part in _FORMAT_END.split(data) if part.strip()]
+        # Formats already written to the printer
+        self.sent = 0
+        self.error = None
+        self.done = threading.Event()
+        self.submitted = time.perf_counter()
+
+    @property
+    def complete(self):
+        return self.sent == len(self.formats)
+
+    def wait(self, timeout=None):
+        """Block until printed; raises the write error if printing failed."""
+        self.done.wait(timeout)
+        if self.error:
+            raise self.error
+
+
+class PrintSpooler:
+    def __init__(
+        self,
+        target,
+        max_batch_labels=100,
+        max_batch_bytes=256 * 1024,
+        linger=0.05,
+        retries=3,
+        retry_delay=0.5,
+        setup="",
+        preconnect=False,
+    ):
+        self.target = target
+        self.setup = setup.encode("utf-8") if isinstance(setup, str) else setup
+        self.preconnect = preconnect
+        self.max_batch_labels = max_batch_labels
+        self.max_batch_bytes = max_batch_bytes
+        self.linger = linger
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+        self.transport = open_transport(target)
+        # Stored formats already sent over the current connection
+        self.downloaded = set()
+        self.setup_sent = False
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.labels_printed = 0
+        self.jobs_sent = 0
+        self.bytes_sent = 0
+        self.retry_count = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="print-spooler", daemon=True)
+        self._thread.start()
+
+    def submit(self, zpl, labels=1, callback=None, templates=()):
+        """Queue a ZPL format; ``callback(item)`` runs on the spooler thread.
+
+        ``templates`` lists the ``LabelTemplate`` objects recalled by ``zpl``.
+        """
+        data = zpl.encode("utf-8") if isinstance(zpl, str) else zpl
+        item = SpoolItem(data, labels, callback, templates)
+        self.queue.put(item)
+        return item
+
+    def queue_depth(self):
+        return self.queue.qsize()
+
+    def stats(self):
+        with self.lock:
+            rate = self.labels_printed / self.busy_seconds if self.busy_seconds else 0.0
+            return {
+                "queue_depth": self.queue.qsize(),
+                "labels_printed": self.labels_printed,
+                "jobs_sent": self.jobs_sent,
+                "bytes_sent": self.bytes_sent,
+                "retries": self.retry_count,
+                "failures": self.failures,
+                "labels_per_second": rate,
+            }
+
+    def close(self, wait=True):
+        """Stop the spooler after the queued labels have been sent."""
+        self.queue.put(None)
+        if wait:
+            self._thread.join()
+
+    def _collect(self, first):
+        """Gather ``first`` and whatever else arrives within the linger time."""
+        batch = [first]
+        labels = first.labels
+        size = len(first.data)
+        deadline = time.monotonic() + self.linger
+        while labels < self.max_batch_labels and size < self.max_batch_bytes:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self.queue.get(timeout=remaining)
+                else:
+                    item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the stop marker back so the loop exits after this batch
+                self.queue.put(None)
+                break
+            batch.append(item)
+            labels += item.labels
+            size += len(item.data)
+        return batch
+
+    def _payload(self, batch):
+        """``[(bytes, item)]`` for the formats of ``batch`` not written yet,
+        preceded by the setup and any stored formats not yet sent over this
+        connection (``item`` is then None)."""
+        parts = [(self.setup, None)] if self.setup and not self.setup_sent else []
+        names = set()
+        for item in batch:
+            if item.complete:
+                continue
+            for template in item.templates:
+                if template.name not in self.downloaded and template.name not in names:
+                    parts.append((template.download().encode("utf-8"), None))
+                    names.add(template.name)
+            parts.extend((data, item) for data in item.formats[item.sent:])
+        return parts, names
+
+    def _write(self, batch):
+        """Send ``batch`` as one job, retrying on a fresh connection.
+
+        Returns bytes sent. Each written format is counted in ``item.sent``
+        right away, so after a failure only the rest is sent again.
+        """
+        sent = 0
+        for attempt in range(self.retries + 1):
+            parts, names = self._payload(batch)
+            data = [part if i == 0 else b"\n" + part for i, (part, _) in enumerate(parts)]
+
+            def written(index):
+                nonlocal sent
+                sent += len(data[index])
+                item = parts[index][1]
+                if item is not None:
+                    item.sent += 1
+
+            try:
+                self.transport.write_parts(data, written)
+                self.downloaded |= names
+                self.setup_sent = True
+                return sent
+            except Exception:
+                self.transport.close()
+                # A new connection may reach a printer that lost its formats
+                self.downloaded.clear()
+                self.setup_sent = False
+                if attempt == self.retries:
+                    raise
+                with self.lock:
+                    self.retry_count += 1
+                time.sleep(self.retry_delay * (attempt + 1))
+
+    def _run(self):
+        if self.preconnect:
+            try:
+                self.transport.open()
+            except Exception:
+                # The first write opens it again and reports the error
+                self.transport.close()
+        try:
+            while True:
+                first = self.queue.get()
+                if first is None:
+                    return
+                batch = self._collect(first)
+                started = time.perf_counter()
+                error = None
+                sent = 0
+                try:
+                    sent = self._write(batch)
+                except Exception as e:
+                    error = e
+                finished = time.perf_counter()
+                metrics.observe("spool_write_ms", (finished - started) * 1000)
+                # Items written in full before a failure still count as printed
+                labels = sum(item.labels for item in batch if item.complete)
+                with self.lock:
+                    self.busy_seconds += finished - started
+                    if error:
+                        self.failures += 1
+                    else:
+                        self.jobs_sent += 1
+                        self.bytes_sent += sent
+                    self.labels_printed += labels
+                if error:
+                    metrics.incr("print_errors")
+                if labels:
+                    metrics.incr("labels_printed", labels)
+                for item in batch:
+                    # Queue wait, batching and the write, as seen by the caller
+                    metrics.observe("spool_ms", (finished - item.submitted) * 1000)
+                    item.error = None if item.complete else error
+                    item.done.set()
+                    if item.callback:
+                        item.callback(item)
+        finally:
+            self.transport.close()
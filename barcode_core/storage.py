@@ -0,0 +1,920 @@
+"""Storage backends for the barcode database.
+
+Two interchangeable backends are provided:
+
+* ``TextFileStorage`` - the original pipe-delimited ``barcode_database.txt``
+  (``CODE|TIMESTAMP|FILENAME|CRC`` per line, with a ``SYMBOLOGY`` field
+  before the CRC for codes that are not Code128), a crash-safe append log
+  loaded into memory with a code index. It can stream the file in the
+  background so the first page shows at once.
+* ``SQLiteStorage`` - a SQLite database in WAL mode, indexed on code and
+  timestamp, which answers queries without holding the history in RAM.
+
+Records are ``Record`` objects read like dicts: ``record["code"]``, with
+``id``, ``code``, ``timestamp``, ``filename`` and ``symbology`` keys.
+"""
+
+import operator
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import zlib
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from itertools import compress, repeat
+
+from . import DEFAULT_SYMBOLOGY
+from .applog import (
+    DEFAULT_SYNC_EVERY,
+    DEFAULT_SYNC_INTERVAL,
+    AppendLog,
+    format_entry,
+    recover_tail,
+    split_entry,
+)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+# Bytes of the text database parsed per chunk by the streaming loader
+LOAD_CHUNK_BYTES = 1024 * 1024
+# Parsed before a background load returns: enough for the first screen
+FIRST_CHUNK_BYTES = 64 * 1024
+# First field of a deletion line; clean_code strips "/", so no code starts with it
+TOMBSTONE = "/DEL"
+# Compact the text log once this many lines, and this share of it, are garbage
+COMPACT_MIN_GARBAGE = 1000
+COMPACT_RATIO = 0.25
+
+
+def now_timestamp():
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+def parse_line(line):
+    """Parse one text database line into ``(code, timestamp, filename)``.
+
+    Returns ``None`` for blank or malformed lines.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    parts = line.split("|")
+    if len(parts) >= 3:
+        return parts[0], parts[1], parts[2]
+    if len(parts) >= 2:
+        return parts[0], parts[1], ""
+    return None
+
+
+def _timestamp_digits(text):
+    """``"2024-01-15 14:30:25"`` -> ``"20240115143025"``, or None if malformed."""
+    if len(text) == 19 and text[4] == "-" and text[13] == ":" and text[0] != "0":
+        digits = text.replace("-", "").replace(" ", "").replace(":", "")
+        if len(digits) == 14 and digits.isdigit():
+            return digits
+    return None
+
+
+def retention_cutoff(keep_days, now=None):
+    """Timestamp text before which records fall outside ``keep_days``."""
+    now = now or datetime.now()
+    return (now - timedelta(days=keep_days)).strftime(TIMESTAMP_FORMAT)
+
+
+def pack_timestamp(text):
+    """``"2024-01-15 14:30:25"`` -> ``20240115143025``; other text is kept as is."""
+    digits = _timestamp_digits(text)
+    return int(digits) if digits else text
+
+
+def format_timestamp(value):
+    if isinstance(value, int):
+        s = str(value)
+        return f"{s[0:4]}-{s[4:6]}-{s[6:8]} {s[8:10]}:{s[10:12]}:{s[12:14]}"
+    return value
+
+
+def default_filename(code, ts):
+    """Image name ``rendering.make_filename`` gives ``code`` at packed time ``ts``."""
+    s = str(ts)
+    return f"barcode_{code}_{s[0:8]}_{s[8:14]}"
+
+
+class Record:
+    """One database row, read like a dict (``record["code"]``).
+
+    Uses ``__slots__`` instead of a dict and keeps the timestamp packed into
+    an int; a ``None`` filename stands for ``default_filename`` and a
+    ``None`` symbology for ``DEFAULT_SYMBOLOGY``.
+    """
+
+    __slots__ = ("id", "code", "ts", "_filename", "_symbology")
+    KEYS = ("id", "code", "timestamp", "filename", "symbology")
+
+    def __init__(self, record_id, code, timestamp, filename, symbology=None):
+        self.id = record_id
+        self.code = code
+        self.ts = pack_timestamp(timestamp)
+        self._filename = filename
+        self._symbology = symbology
+
+    @classmethod
+    def packed(cls, record_id, code, ts, filename, symbology=None):
+        """Build from already packed fields, skipping the timestamp parsing."""
+        record = cls.__new__(cls)
+        record.id = record_id
+        record.code = code
+        record.ts = ts
+        record._filename = filename
+        record._symbology = symbology
+        return record
+
+    @property
+    def timestamp(self):
+        return format_timestamp(self.ts)
+
+    @property
+    def filename(self):
+        if self._filename is None:
+            return default_filename(self.code, self.ts)
+        return self._filename
+
+    @property
+    def symbology(self):
+        return self._symbology or DEFAULT_SYMBOLOGY
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self.KEYS else default
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.KEYS}
+
+    def __repr__(self):
+        return f"Record({self.as_dict()!r})"
+
+
+make_record = Record
+
+
+def format_record(code, timestamp, filename, symbology=None):
+    """Log line of a record. Code128 records leave the symbology field out,
+    so they keep the format older versions read."""
+    if symbology and symbology != DEFAULT_SYMBOLOGY:
+        return format_entry(code, timestamp, filename, symbology)
+    return format_entry(code, timestamp, filename)
+
+
+def _rows_to_write(rows):
+    """``(code, filename[, timestamp[, symbology]])`` rows as
+    ``(code, timestamp, filename, symbology)``, stamped now if needed."""
+    return [
+        (
+            row[0],
+            row[2] if len(row) > 2 and row[2] else now_timestamp(),
+            row[1],
+            row[3] if len(row) > 3 and row[3] else DEFAULT_SYMBOLOGY,
+        )
+        for row in rows
+    ]
+
+
+# "CODE|TIMESTAMP|FILENAME|crc32hex" -> "CODE|TIMESTAMP|FILENAME"
+_strip_checksum = operator.itemgetter(slice(None, -9))
+
+
+class TextFileStorage:
+    """Pipe-delimited log file held in memory as column arrays.
+
+    Each row costs two machine words: a reference to its code (repeats of a
+    code share one string) and its timestamp packed into an ``array`` of
+    64-bit ints. Filenames are only stored for the rows where they differ
+    from the default one derived from code and timestamp, and symbologies
+    for the rows that are not Code128. Records are only
+    built for the rows that are read; the id of row ``n`` is ``n + 1``.
+
+    The file is an append-only log (see ``applog``): every line carries a
+    checksum, writes use group commit, deleting a code appends a tombstone
+    and ``compact()`` rewrites the file as a snapshot of the live records.
+    Compaction runs in the background once enough of the file is garbage.
+    Lines written by older versions (no checksum) are still read.
+
+    ``load(background=True)`` parses the first chunk before returning and
+    indexes the rest on a thread; ``on_progress(count, finished)`` is called
+    from that thread after every chunk. Lookups that need the whole history
+    (a code that is not found yet, ``codes()``) and writes wait for the load
+    to finish.
+    """
+
+    def __init__(self, path, sync_every=DEFAULT_SYNC_EVERY, sync_interval=DEFAULT_SYNC_INTERVAL):
+        self.path = path
+        self.log = AppendLog(path, sync_every, sync_interval)
+        # Serializes writes, deletions and the compaction swap
+        self.lock = threading.RLock()
+        # One compaction at a time (background thread, prune, CLI compact)
+        self.compact_lock = threading.Lock()
+        self._reset()
+        self.loaded = threading.Event()
+        self.loaded.set()
+        self.load_error = None
+        self._loader = None
+        self._compactor = None
+
+    def _reset(self):
+        self.row_codes = []
+        self.stamps = array("q")
+        # Rows whose filename is not default_filename(code, stamp)
+        self.filenames = {}
+        # Rows whose timestamp is not in the standard format (stamp 0)
+        self.raw_stamps = {}
+        # Rows whose symbology is not DEFAULT_SYMBOLOGY
+        self.symbologies = {}
+        # code -> the shared string for that code, in first-seen order
+        self.index = {}
+        # code -> row count when its tombstone was read (rows before it are dead)
+        self.tombstones = {}
+        # Bumped whenever rows are removed, so compaction can detect races
+        self.generation = 0
+        # Lines compaction would drop: tombstones, deleted records, corrupt lines
+        self.garbage = 0
+        self.corrupt_lines = 0
+        self.torn_lines = 0
+
+    def load(self, background=False, on_progress=None):
+        self.wait_loaded()
+        self._reset()
+        self.load_error = None
+        if not os.path.exists(self.path):
+            if on_progress:
+                on_progress(0, True)
+            return
+        if recover_tail(self.path):
+            self.torn_lines = 1
+        file = open(self.path, "r", encoding="utf-8", errors="replace")
+        if not background:
+            with file:
+                self._parse_chunks(file)
+            self._finish_load()
+            if on_progress:
+                on_progress(self.count(), True)
+            return
+        # The first chunk is parsed here so the first page can be shown
+        try:
+            self._parse_chunk(self._read_chunk(file, FIRST_CHUNK_BYTES))
+        except BaseException:
+            file.close()
+            raise
+        self.loaded.clear()
+        self._loader = threading.Thread(
+            target=self._load_rest, args=(file, on_progress), name="db-loader", daemon=True
+        )
+        self._loader.start()
+
+    def _load_rest(self, file, on_progress):
+        try:
+            with file:
+                self._parse_chunks(file, on_progress)
+            self._finish_load()
+        except Exception as e:
+            self.load_error = e
+        finally:
+            self.loaded.set()
+        if on_progress:
+            on_progress(self.count(), True)
+
+    def _finish_load(self):
+        if self.tombstones:
+            self._drop(self.tombstones)
+            self.tombstones = {}
+        self._maybe_compact()
+
+    @staticmethod
+    def _read_chunk(file, size=LOAD_CHUNK_BYTES):
+        """About ``size`` bytes of text, ending at a line boundary."""
+        chunk = file.read(size)
+        if chunk and not chunk.endswith("\n"):
+            chunk += file.readline()
+        return chunk
+
+    def _parse_chunks(self, file, on_progress=None):
+        while True:
+            chunk = self._read_chunk(file)
+            if not chunk:
+                return
+            self._parse_chunk(chunk)
+            if on_progress:
+                on_progress(self.count(), False)
+
+    def _parse_chunk(self, chunk):
+        """Append the rows of ``chunk``.
+
+        Chunks of well-formed records are split into columns (and their
+        checksums verified) with whole-chunk string operations; anything
+        unusual (blank lines, tombstones, bad checksums, odd timestamps,
+        stray whitespace) is parsed line by line instead.
+        """
+        if not chunk.endswith("\n"):
+            chunk += "\n"
+        lines = chunk.count("\n")
+        fields = chunk.replace("\n", "|").split("|")
+        fields.pop()
+        if len(fields) == 4 * lines:
+            width = 4
+        elif len(fields) == 5 * lines:
+            width = 5
+        elif len(fields) == 3 * lines:
+            width = 3
+        else:
+            width = 0
+        if (
+            width
+            and " \n" not in chunk
+            and "\t" not in chunk
+            and not chunk.startswith(TOMBSTONE)
+            and "\n" + TOMBSTONE not in chunk
+        ):
+            codes = fields[0::width]
+            stamps = fields[1::width]
+            names = fields[2::width]
+            # "2024-01-15 14:30:25" -> "20240115_143025": int() accepts the
+            # underscore, and the pieces are those of the default filename
+            keys = "\n".join(stamps).replace("-", "").replace(":", "").replace(" ", "_")
+            keys = keys.split("\n")
+            valid = set(map(len, stamps)) == {19} and set(map(len, keys)) == {15}
+            if valid and width > 3:
+                lines = chunk.split("\n")
+                lines.pop()
+                payloads = map(_strip_checksum, lines)
+                crcs = map(zlib.crc32, map(str.encode, payloads))
+                checksums = fields[width - 1::width]
+                try:
+                    valid = not any(map(operator.ne, crcs, map(int, checksums, repeat(16))))
+                except ValueError:
+                    valid = False
+            if valid:
+                try:
+                    packed = array("q", map(int, keys))
+                except ValueError:
+                    packed = None
+                if packed is not None:
+                    first = self.count()
+                    codes = list(map(self.index.setdefault, codes, codes))
+                    defaults = map("barcode_{}_{}".format, codes, keys)
+                    custom = compress(range(len(names)), map(operator.ne, names, defaults))
+                    self.filenames.update((first + i, names[i]) for i in custom)
+                    if width == 5:
+                        symbologies = fields[3::5]
+                        other = compress(
+                            range(len(symbologies)),
+                            map(DEFAULT_SYMBOLOGY.__ne__, symbologies),
+                        )
+                        self.symbologies.update(
+                            (first + i, sys.intern(symbologies[i])) for i in other
+                        )
+                    self.stamps.extend(packed)
+                    self.row_codes.extend(codes)
+                    return
+        for line in chunk.splitlines():
+            self._parse_slow(line)
+
+    def _parse_slow(self, line):
+        line = line.strip()
+        if not line:
+            return
+        try:
+            parts = split_entry(line)
+        except ValueError:
+            self.corrupt_lines += 1
+            self.garbage += 1
+            return
+        if parts is None:
+            # Written by an older version, without a checksum
+            parsed = parse_line(line)
+            if parsed:
+                self._extend([parsed])
+        elif parts[0] == TOMBSTONE:
+            self.tombstones[parts[1]] = self.count()
+            self.garbage += 1
+        else:
+            self._extend([parts[:4]])
+
+    def _extend(self, rows):
+        """Append ``(code, timestamp, filename[, symbology])`` rows one at a time."""
+        for code, timestamp, filename, *symbology in rows:
+            row = self.count()
+            if symbology and symbology[0] and symbology[0] != DEFAULT_SYMBOLOGY:
+                self.symbologies[row] = sys.intern(symbology[0])
+            code = self.index.setdefault(code, code)
+            ts = pack_timestamp(timestamp)
+            if type(ts) is not int:
+                self.raw_stamps[row] = ts
+                ts = 0
+            if not ts or filename != default_filename(code, ts):
+                self.filenames[row] = filename
+            self.stamps.append(ts)
+            self.row_codes.append(code)
+
+    def _drop(self, boundaries):
+        """Remove the rows of each code in ``boundaries`` below its row limit.
+
+        Returns the removed records.
+        """
+        limits = list(map(boundaries.get, self.row_codes))
+        dead = [row for row in compress(range(len(limits)), limits) if row < limits[row]]
+        return self._remove_rows(dead)
+
+    def _remove_rows(self, dead):
+        """Remove the rows in the sorted list ``dead``. Returns their records."""
+        if not dead:
+            return []
+        removed = [self._record(row) for row in dead]
+        codes = []
+        stamps = array("q")
+        start = 0
+        for row in dead + [self.count()]:
+            codes.extend(self.row_codes[start:row])
+            stamps.extend(self.stamps[start:row])
+            start = row + 1
+        dead_set = set(dead)
+
+        def remap(column):
+            return {
+                row - bisect_left(dead, row): value
+                for row, value in column.items()
+                if row not in dead_set
+            }
+
+        # row_codes shrinks first, so readers on other threads never index
+        # past the end of the other columns
+        self.row_codes = codes
+        self.filenames = remap(self.filenames)
+        self.raw_stamps = remap(self.raw_stamps)
+        self.symbologies = remap(self.symbologies)
+        self.stamps = stamps
+        self.index = dict(zip(codes, codes))
+        self.generation += 1
+        self.garbage += len(dead)
+        return removed
+
+    def _record(self, row):
+        ts = self.stamps[row] or self.raw_stamps[row]
+        return Record.packed(
+            row + 1, self.row_codes[row], ts, self.filenames.get(row), self.symbologies.get(row)
+        )
+
+    def wait_loaded(self):
+        self.loaded.wait()
+
+    def count(self):
+        # row_codes is extended last, so every column has at least this many rows
+        return len(self.row_codes)
+
+    def exists(self, code):
+        if code in self.index and code not in self.tombstones:
+            return True
+        self.wait_loaded()
+        return code in self.index
+
+    def find(self, code):
+        self.wait_loaded()
+        code = self.index.get(code)
+        if code is None:
+            return []
+        # Repeats share the indexed string, so identity is enough
+        return [self._record(row) for row, c in enumerate(self.row_codes) if c is code]
+
+    def page(self, offset, limit):
+        offset = max(0, offset)
+        return [self._record(row) for row in range(offset, min(offset + limit, self.count()))]
+
+    def codes(self):
+        """Distinct codes in first-seen order."""
+        self.wait_loaded()
+        return list(self.index)
+
+    def filtered(self, codes):
+        """Row view (``count``/``page``) of the records of ``codes``."""
+        wanted = set(codes)
+        rows = list(compress(range(self.count()), map(wanted.__contains__, self.row_codes)))
+        return RecordSubset(rows, lambda rows: [self._record(row) for row in rows])
+
+    def __iter__(self):
+        self.wait_loaded()
+        return (self._record(row) for row in range(self.count()))
+
+    def add(self, code, filename, timestamp=None, symbology=None):
+        return self.add_many([(code, filename, timestamp, symbology)])[0]
+
+    def add_many(self, rows):
+        """Append ``(code, filename[, timestamp[, symbology]])`` rows with a single write."""
+        rows = _rows_to_write(rows)
+        if not rows:
+            return []
+        self.wait_loaded()
+        with self.lock:
+            self.log.append("".join(format_record(*row) for row in rows), len(rows))
+            first = self.count()
+            self._extend(rows)
+            return self.page(first, len(rows))
+
+    def delete(self, codes):
+        """Delete every record of ``codes`` by appending tombstones.
+
+        Returns the removed records (e.g. to delete their images).
+        """
+        self.wait_loaded()
+        with self.lock:
+            codes = [code for code in dict.fromkeys(codes) if code in self.index]
+            if not codes:
+                return []
+            stamp = now_timestamp()
+            self.log.append(
+                "".join(format_entry(TOMBSTONE, code, stamp) for code in codes), len(codes)
+            )
+            self.garbage += len(codes)
+            removed = self._drop(dict.fromkeys(codes, self.count()))
+        self._maybe_compact()
+        return removed
+
+    def prune(self, keep_days=None, keep_latest=False, now=None):
+        """Delete the records outside a retention policy. Returns them.
+
+        ``keep_days`` keeps the records of the last N days (records with an
+        unreadable timestamp are kept); ``keep_latest`` keeps only the newest
+        record of each code. Tombstones can only drop whole codes, so the
+        removal is made durable by compacting the log.
+        """
+        self.wait_loaded()
+        with self.lock:
+            rows = range(self.count())
+            dead = set()
+            if keep_days is not None:
+                cutoff = pack_timestamp(retention_cutoff(keep_days, now))
+                old = compress(rows, map(cutoff.__gt__, self.stamps))
+                dead.update(row for row in old if self.stamps[row])
+            if keep_latest:
+                latest = dict(zip(self.row_codes, rows))
+                newest = map(latest.__getitem__, self.row_codes)
+                dead.update(compress(rows, map(operator.ne, newest, rows)))
+            removed = self._remove_rows(sorted(dead))
+        # compact() waits for a background compaction started by delete()
+        # or the loader, so the rewrites never overlap
+        while removed and not self.compact():
+            # A concurrent deletion raced with the rewrite; the rows are
+            # already gone from memory, so just try again
+            pass
+        return removed
+
+    def sync(self):
+        """Force pending writes to disk now instead of at the next group commit."""
+        self.log.sync()
+
+    def _maybe_compact(self):
+        lines = self.count() + self.garbage
+        if self.garbage < COMPACT_MIN_GARBAGE or self.garbage < lines * COMPACT_RATIO:
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, name="db-compact", daemon=True)
+        self._compactor.start()
+
+    def compact(self):
+        """Rewrite the log as a snapshot of the live records.
+
+        The snapshot is written in batches, taking the lock only per batch so
+        scans can continue; records added meanwhile are copied at the end.
+        Returns False (and leaves the log as it was) if a deletion raced with
+        it. Concurrent calls wait for each other.
+        """
+        self.wait_loaded()
+        with self.compact_lock:
+            return self._compact()
+
+    def _compact(self):
+        folder, name = os.path.split(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix=name + ".", suffix=".compact", dir=folder)
+        if os.path.exists(self.path):
+            # mkstemp creates the file private; keep the database's mode
+            shutil.copymode(self.path, temp_path)
+        generation = self.generation
+        try:
+            with open(fd, "w", encoding="utf-8") as out:
+                written = 0
+                while True:
+                    with self.lock:
+                        if self.generation != generation:
+                            raise _CompactionRaced()
+                        end = min(self.count(), written + 10000)
+                        if end == written:
+                            break
+                        out.write(
+                            "".join(
+                                format_record(
+                                    record.code, record.timestamp, record.filename,
+                                    record._symbology,
+                                )
+                                for record in self.page(written, end - written)
+                            )
+                        )
+                        written = end
+                with self.lock:
+                    if self.generation != generation or self.count() != written:
+                        raise _CompactionRaced()
+                    out.flush()
+                    os.fsync(out.fileno())
+                    out.close()
+                    self.log.replace(temp_path)
+                    self.garbage = 0
+                    self.corrupt_lines = 0
+                    return True
+        except _CompactionRaced:
+            os.remove(temp_path)
+            return False
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def clear(self):
+        self.wait_loaded()
+        with self.lock:
+            self.log.release()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._reset()
+            self.generation += 1
+
+    def close(self):
+        if self._compactor is not None:
+            self._compactor.join()
+        self.log.close()
+
+
+class _CompactionRaced(Exception):
+    pass
+
+
+class RecordSubset:
+    """A fixed selection of rows with the ``count``/``page`` interface."""
+
+    def __init__(self, keys, fetch):
+        self.keys = keys
+        self.fetch = fetch
+
+    def count(self):
+        return len(self.keys)
+
+    def page(self, offset, limit):
+        offset = max(0, offset)
+        return self.fetch(self.keys[offset:offset + limit])
+
+
+class SQLiteStorage:
+    """SQLite database in WAL mode with batched, transactional inserts."""
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS barcodes ("
+        " id INTEGER PRIMARY KEY,"
+        " code TEXT NOT NULL,"
+        " timestamp TEXT NOT NULL,"
+        " filename TEXT NOT NULL DEFAULT '',"
+        f" symbology TEXT NOT NULL DEFAULT '{DEFAULT_SYMBOLOGY}')",
+        "CREATE INDEX IF NOT EXISTS idx_barcodes_code ON barcodes(code)",
+        "CREATE INDEX IF NOT EXISTS idx_barcodes_timestamp ON barcodes(timestamp)",
+    )
+    # Columns added after the first release: (name, definition)
+    MIGRATIONS = (
+        ("symbology", f"TEXT NOT NULL DEFAULT '{DEFAULT_SYMBOLOGY}'"),
+    )
+    COLUMNS = "id, code, timestamp, filename, symbology"
+
+    def __init__(self, path, batch_size=1000):
+        self.path = path
+        self.batch_size = batch_size
+        self.conn = None
+        self.lock = threading.Lock()
+        self._count = 0
+
+    def load(self, background=False, on_progress=None):
+        """Open the database. Rows are paged from disk, so there is nothing to
+        stream; ``background`` is accepted for API compatibility."""
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            with self.conn:
+                for statement in self.SCHEMA:
+                    self.conn.execute(statement)
+                columns = {row[1] for row in self.conn.execute("PRAGMA table_info(barcodes)")}
+                for name, definition in self.MIGRATIONS:
+                    if name not in columns:
+                        self.conn.execute(f"ALTER TABLE barcodes ADD COLUMN {name} {definition}")
+        with self.lock:
+            self._count = self.conn.execute("SELECT COUNT(*) FROM barcodes").fetchone()[0]
+        if on_progress:
+            on_progress(self._count, True)
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [make_record(*row) for row in rows]
+
+    def count(self):
+        return self._count
+
+    def exists(self, code):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM barcodes WHERE code = ? LIMIT 1", (code,)
+            ).fetchone()
+        return row is not None
+
+    def find(self, code):
+        return self._query(
+            f"SELECT {self.COLUMNS} FROM barcodes WHERE code = ? ORDER BY id", (code,)
+        )
+
+    def page(self, offset, limit):
+        return self._query(
+            f"SELECT {self.COLUMNS} FROM barcodes ORDER BY id LIMIT ? OFFSET ?",
+            (limit, offset),
+        )
+
+    def codes(self):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT code FROM barcodes GROUP BY code ORDER BY MIN(id)"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def filtered(self, codes):
+        """Row view (``count``/``page``) of the records of ``codes``."""
+        codes = list(dict.fromkeys(codes))
+        ids = []
+        with self.lock:
+            for start in range(0, len(codes), 500):
+                chunk = codes[start:start + 500]
+                marks = ", ".join("?" * len(chunk))
+                ids.extend(
+                    row[0]
+                    for row in self.conn.execute(
+                        f"SELECT id FROM barcodes WHERE code IN ({marks})", chunk
+                    )
+                )
+        ids.sort()
+
+        def fetch(ids):
+            if not ids:
+                return []
+            marks = ", ".join("?" * len(ids))
+            return self._query(
+                f"SELECT {self.COLUMNS} FROM barcodes WHERE id IN ({marks}) ORDER BY id", ids
+            )
+
+        return RecordSubset(ids, fetch)
+
+    def __iter__(self):
+        offset = 0
+        while True:
+            rows = self.page(offset, self.batch_size)
+            if not rows:
+                return
+            yield from rows
+            offset += len(rows)
+
+    def add(self, code, filename, timestamp=None, symbology=None):
+        return self.add_many([(code, filename, timestamp, symbology)])[0]
+
+    def add_many(self, rows):
+        """Insert ``(code, filename[, timestamp[, symbology]])`` rows in one transaction.
+
+        Rows are sent to SQLite in chunks of ``batch_size``.
+        """
+        rows = _rows_to_write(rows)
+        if not rows:
+            return []
+        with self.lock, self.conn:
+            cursor = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM barcodes")
+            first_id = cursor.fetchone()[0] + 1
+            for start in range(0, len(rows), self.batch_size):
+                self.conn.executemany(
+                    "INSERT INTO barcodes (code, timestamp, filename, symbology)"
+                    " VALUES (?, ?, ?, ?)",
+                    rows[start:start + self.batch_size],
+                )
+            self._count += len(rows)
+        return [make_record(first_id + i, *row) for i, row in enumerate(rows)]
+
+    def delete(self, codes):
+        """Delete every record of ``codes``. Returns the removed records."""
+        codes = list(dict.fromkeys(codes))
+        removed = []
+        with self.lock, self.conn:
+            for start in range(0, len(codes), 500):
+                chunk = codes[start:start + 500]
+                marks = ", ".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT {self.COLUMNS} FROM barcodes WHERE code IN ({marks}) ORDER BY id",
+                    chunk,
+                ).fetchall()
+                self.conn.execute(f"DELETE FROM barcodes WHERE code IN ({marks})", chunk)
+                removed.extend(make_record(*row) for row in rows)
+            self._count -= len(removed)
+        return removed
+
+    def prune(self, keep_days=None, keep_latest=False, now=None):
+        """Delete the records outside a retention policy. Returns them.
+
+        Same policies as ``TextFileStorage.prune``.
+        """
+        conditions = []
+        params = []
+        if keep_days is not None:
+            conditions.append("(timestamp LIKE '____-__-__ __:__:__' AND timestamp < ?)")
+            params.append(retention_cutoff(keep_days, now))
+        if keep_latest:
+            conditions.append("id NOT IN (SELECT MAX(id) FROM barcodes GROUP BY code)")
+        if not conditions:
+            return []
+        where = " OR ".join(conditions)
+        with self.lock, self.conn:
+            rows = self.conn.execute(
+                f"SELECT {self.COLUMNS} FROM barcodes WHERE {where} ORDER BY id", params
+            ).fetchall()
+            self.conn.execute(f"DELETE FROM barcodes WHERE {where}", params)
+            self._count -= len(rows)
+        return [make_record(*row) for row in rows]
+
+    def sync(self):
+        pass
+
+    def compact(self):
+        """Fold the WAL into the database file and reclaim free pages."""
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.execute("VACUUM")
+        return True
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM barcodes")
+            self._count = 0
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def migrate_text_to_sqlite(text_path, sqlite_path, batch_size=1000):
+    """One-shot import of a text database into SQLite. Returns rows copied."""
+    text = TextFileStorage(text_path)
+    text.load()
+    storage = SQLiteStorage(sqlite_path, batch_size=batch_size)
+    storage.load()
+    copied = 0
+    try:
+        batch = []
+        for record in text:
+            batch.append((record.code, record.filename, record.timestamp, record.symbology))
+            if len(batch) >= batch_size:
+                storage.add_many(batch)
+                copied += len(batch)
+                batch = []
+        if batch:
+            storage.add_many(batch)
+            copied += len(batch)
+    finally:
+        storage.close()
+        text.close()
+    return copied
+
+
+def open_storage(path, migrate_from=None, background=False, on_progress=None, **options):
+    """Open the backend matching ``path``'s extension and load it.
+
+    When ``path`` is a SQLite database that does not exist yet and
+    ``migrate_from`` names an existing text database, its rows are imported
+    first. ``background`` and ``on_progress`` are passed to ``load`` and
+    ``options`` (e.g. ``sync_every``) to the backend's constructor.
+    """
+    if path.lower().endswith(SQLITE_EXTENSIONS):
+        if (
+            migrate_from
+            and not os.path.exists(path)
+            and os.path.exists(migrate_from)
+        ):
+            migrate_text_to_sqlite(migrate_from, path)
+        storage = SQLiteStorage(path, **options)
+    else:
+        storage = TextFileStorage(path, **options)
+    storage.load(background=background, on_progress=on_progress)
+    return storage
@@ -0,0 +1,395 @@
+"""Registry of the barcode symbologies that can be generated and printed.
+
+A ``Symbology`` validates and normalizes its input (adding check digits),
+encodes it into modules for the built-in renderers (PNG, SVG, PBM, ZPL
+``^GF``) and writes its ZPL barcode command (``^BC``, ``^BE``, ``^BX``,
+``^BQ``...). Entries are looked up by the name stored with every database
+record; ``register`` adds new ones::
+
+    @register
+    class Code39(Symbology):
+        name = "code39"
+        label = "Code39"
+        ...
+
+``validate_many`` checks a whole batch with C-level passes (the input
+pattern mapped over every code, check digits position by position), so
+imports and print plans reject bad codes before anything is rendered or
+sent to the printer. The encoders are imported on first use.
+"""
+
+import operator
+import re
+from itertools import compress
+
+from . import DEFAULT_SYMBOLOGY
+from .rendering import PNG_OPTIONS
+
+SYMBOLOGIES = {}
+
+# Pixels of 2D symbols: 8 px modules and the quiet zone of the symbology
+MATRIX_PNG_OPTIONS = {"module_width": 8, "margin": 0}
+
+# Maps each byte to its complement; Pillow's mode "1" uses 1 for white
+_INVERT = bytes(255 - value for value in range(256))
+_RUN_RE = re.compile("1+")
+
+
+def register(cls):
+    """Class decorator adding an instance of ``cls`` to the registry."""
+    SYMBOLOGIES[cls.name] = cls()
+    return cls
+
+
+def get_symbology(name=None):
+    """Registered symbology ``name`` (the default one for None).
+
+    Raises ``ValueError`` for an unknown name.
+    """
+    if isinstance(name, Symbology):
+        return name
+    try:
+        return SYMBOLOGIES[name or DEFAULT_SYMBOLOGY]
+    except KeyError:
+        raise ValueError(f"Simbología desconocida: {name}") from None
+
+
+def symbology_names():
+    return list(SYMBOLOGIES)
+
+
+def describe_errors(errors, limit=10):
+    """Text listing the first ``limit`` rejected ``(code, reason)`` pairs."""
+    lines = [f"{code}: {reason}" for code, reason in errors[:limit]]
+    if len(errors) > limit:
+        lines.append(f"... y {len(errors) - limit} más")
+    return "\n".join(lines)
+
+
+class Symbology:
+    """Base class of the registry entries.
+
+    Subclasses set ``name``, ``label`` and ``pattern``, implement ``rows``
+    and ``zpl_command``, and override ``complete`` for checks beyond the
+    pattern. ``linear`` symbols are one row of modules stretched to the bar
+    height; 2D symbols are drawn with square modules.
+    """
+
+    name = None
+    label = None
+    linear = True
+    # Modules of quiet zone on each side
+    quiet_zone = 10
+    # Geometry of generated PNGs; part of the render cache key
+    png_options = PNG_OPTIONS
+    # Accepted input before ``complete``
+    pattern = re.compile(r".+", re.DOTALL)
+    pattern_error = "contiene caracteres no válidos"
+
+    def available(self):
+        """Whether images can be drawn here (optional packages installed)."""
+        return True
+
+    def complete(self, code):
+        """Checks of a code that matched ``pattern``; returns it normalized
+        (e.g. with its check digit) or raises ``ValueError``."""
+        return code
+
+    def normalize(self, code):
+        """``code`` as it is stored and encoded. Raises ``ValueError`` with
+        the reason when it cannot be encoded."""
+        if not self.pattern.fullmatch(code):
+            raise ValueError(self.pattern_error)
+        return self.complete(code)
+
+    def check_digit(self, code):
+        """Check digit ``normalize`` appends or verifies, or None if the
+        symbology has none of its own (Code128's is part of the encoding)."""
+        return None
+
+    def validate_many(self, codes):
+        """Normalize a batch. Returns ``(valid, errors)``: the normalized
+        codes in input order and ``(code, reason)`` for each rejected one."""
+        codes = list(codes)
+        matches = list(map(self.pattern.fullmatch, codes))
+        errors = [
+            (code, self.pattern_error) for code in compress(codes, map(operator.not_, matches))
+        ]
+        valid = list(compress(codes, matches))
+        if type(self).complete is not Symbology.complete:
+            checked = []
+            for code in valid:
+                try:
+                    checked.append(self.complete(code))
+                except ValueError as e:
+                    errors.append((code, str(e)))
+            valid = checked
+        return valid, errors
+
+    def rows(self, code):
+        """The symbol of the normalized ``code`` as rows of ``1`` (dark) and
+        ``0`` modules, without quiet zone."""
+        raise NotImplementedError
+
+    def field_value(self, code):
+        """``^FD`` data of ``code`` for ``zpl_command``."""
+        return code
+
+    def zpl_command(self, layout):
+        """ZPL barcode command for ``layout`` (a ``LabelLayout``), to go
+        between ``^FO`` and ``^FD``."""
+        raise NotImplementedError
+
+    def bitmap(self, code, module_width=2, height=80, quiet_zone=None):
+        """``(width, rows)``: the symbol as 1-bit rows packed MSB first
+        (1 = black), quiet zone included. 2D symbols ignore ``height``."""
+        quiet_zone = self.quiet_zone if quiet_zone is None else quiet_zone
+        blank = "0" * quiet_zone
+        packed = []
+        width = 0
+        for row in self.rows(code):
+            bits = "".join(bit * module_width for bit in blank + row + blank)
+            width = len(bits)
+            bits += "0" * (-width % 8)
+            packed.append(int(bits, 2).to_bytes(len(bits) // 8, "big"))
+        if self.linear:
+            return width, packed * height
+        margin = [bytes(len(packed[0]))] * (quiet_zone * module_width)
+        return width, margin + [row for row in packed for _ in range(module_width)] + margin
+
+    def to_png(self, code, path, module_width=2, height=80, quiet_zone=None, margin=0):
+        """Write a PNG via Pillow to a path or file object.
+
+        ``margin`` adds white rows above and below the symbol.
+        """
+        from PIL import Image
+
+        width, rows = self.bitmap(code, module_width, height, quiet_zone)
+        blank = b"\xff" * len(rows[0])
+        image = Image.frombytes(
+            "1",
+            (width, len(rows) + 2 * margin),
+            blank * margin + b"".join(rows).translate(_INVERT) + blank * margin,
+        )
+        image.save(path, format="PNG", optimize=False)
+
+    def to_pbm(self, code, module_width=2, height=80, quiet_zone=None):
+        """Binary PBM (P4) image; needs no imaging library."""
+        width, rows = self.bitmap(code, module_width, height, quiet_zone)
+        return f"P4\n{width} {len(rows)}\n".encode("ascii") + b"".join(rows)
+
+    def to_svg(self, code, module_width=2, height=80, quiet_zone=None):
+        """Standalone SVG document with one ``<rect>`` per run of dark modules."""
+        quiet_zone = self.quiet_zone if quiet_zone is None else quiet_zone
+        rows = self.rows(code)
+        rects = []
+        module_height = height if self.linear else module_width
+        offset = 0 if self.linear else quiet_zone * module_width
+        for y, row in enumerate(rows):
+            for run in _RUN_RE.finditer(row):
+                rects.append(
+                    f'<rect x="{(quiet_zone + run.start()) * module_width}" '
+                    f'y="{offset + y * module_height}" '
+                    f'width="{(run.end() - run.start()) * module_width}" '
+                    f'height="{module_height}"/>'
+                )
+        total = (len(rows[0]) + 2 * quiet_zone) * module_width
+        total_height = height if self.linear else total
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{total}" height="{total_height}" '
+            f'viewBox="0 0 {total} {total_height}">'
+            f'<rect width="100%" height="100%" fill="white"/><g fill="black">'
+            + "".join(rects)
+            + "</g></svg>"
+        )
+
+    def to_zpl_graphic(self, code, x=50, y=50, module_width=2, height=80):
+        """``^GF`` field drawing the symbol as a graphic.
+
+        A row equal to the one before it is sent as ZPL's ``:`` (repeat
+        previous row), so the rows of a linear barcode cost one byte each.
+        """
+        _, rows = self.bitmap(code, module_width, height, quiet_zone=0)
+        payload = []
+        previous = None
+        for row in rows:
+            payload.append(":" if row == previous else row.hex().upper())
+            previous = row
+        total = len(rows[0]) * len(rows)
+        return f"^FO{x},{y}^GFA,{total},{total},{len(rows[0])},{''.join(payload)}^FS"
+
+
+@register
+class Code128(Symbology):
+    name = "code128"
+    label = "Code128"
+    pattern = re.compile(r"[\x00-\x7f]+")
+    pattern_error = "Code128 solo admite caracteres ASCII"
+
+    def rows(self, code):
+        from . import code128
+
+        return [code128.modules(code)]
+
+    def zpl_command(self, layout):
+        return (
+            f"^BY{layout.module_width},{layout.ratio},{layout.bar_height}"
+            f"^BCN,{layout.bar_height},Y,N,N"
+        )
+
+
+@register
+class GS1128(Symbology):
+    """Code128 with FNC1, carrying GS1 ``(AI)value`` data (see ``gs1``)."""
+
+    name = "gs1_128"
+    label = "GS1-128"
+    pattern = re.compile(r"(?:\(\d{2,4}\)[^()]+)+")
+    pattern_error = "use el formato (AI)valor, p. ej. (01)09501101530003(10)LOTE1"
+
+    def complete(self, code):
+        from . import gs1
+
+        return gs1.normalize(code)
+
+    def rows(self, code):
+        from . import code128, gs1
+
+        return [code128.modules(gs1.element_string(code), gs1=True)]
+
+    def zpl_command(self, layout):
+        # Mode D: the printer adds FNC1 and strips the parentheses from the
+        # bars while printing them in the interpretation line
+        return (
+            f"^BY{layout.module_width},{layout.ratio},{layout.bar_height}"
+            f"^BCN,{layout.bar_height},Y,N,N,D"
+        )
+
+
+@register
+class EAN13(Symbology):
+    """EAN-13; 12 digits get their check digit, 13 must carry the right one."""
+
+    name = "ean13"
+    label = "EAN-13"
+    quiet_zone = 11
+    pattern = re.compile(r"[0-9]{12,13}")
+    pattern_error = "EAN-13 necesita 12 o 13 dígitos"
+
+    def check_digit(self, code):
+        from . import gs1
+
+        return gs1.check_digit(code[:12])
+
+    def complete(self, code):
+        digit = self.check_digit(code)
+        if len(code) == 13 and code[12] != digit:
+            raise ValueError(f"dígito de control incorrecto (debería ser {digit})")
+        return code[:12] + digit
+
+    def validate_many(self, codes):
+        from . import gs1
+
+        codes = list(codes)
+        matches = list(map(self.pattern.fullmatch, codes))
+        errors = [
+            (code, self.pattern_error) for code in compress(codes, map(operator.not_, matches))
+        ]
+        codes = list(compress(codes, matches))
+        bodies = list(map(operator.itemgetter(slice(0, 12)), codes))
+        given = list(map(operator.itemgetter(slice(12, 13)), codes))
+        digits = gs1.check_digits(bodies)
+        # "" (no check digit given) is contained in any digit
+        good = list(map(operator.contains, digits, given))
+        valid = list(map(operator.add, compress(bodies, good), compress(digits, good)))
+        errors.extend(
+            (code, f"dígito de control incorrecto (debería ser {digit})")
+            for code, digit, ok in zip(codes, digits, good)
+            if not ok
+        )
+        return valid, errors
+
+    def rows(self, code):
+        from . import ean13
+
+        return [ean13.modules(code)]
+
+    def field_value(self, code):
+        # ^BE takes the 12 data digits and prints the check digit itself
+        return code[:12]
+
+    def zpl_command(self, layout):
+        return (
+            f"^BY{layout.module_width},{layout.ratio},{layout.bar_height}"
+            f"^BEN,{layout.bar_height},Y,N"
+        )
+
+
+@register
+class DataMatrix(Symbology):
+    name = "datamatrix"
+    label = "DataMatrix"
+    linear = False
+    quiet_zone = 2
+    png_options = MATRIX_PNG_OPTIONS
+    pattern = re.compile(r"[\x00-\xff]+")
+    pattern_error = "DataMatrix solo admite caracteres Latin-1"
+
+    def complete(self, code):
+        from . import datamatrix
+
+        datamatrix.symbol_size(len(datamatrix.encode_ascii(code)))
+        return code
+
+    def rows(self, code):
+        from . import datamatrix
+
+        return datamatrix.matrix(code)
+
+    def zpl_command(self, layout):
+        return f"^BXN,{layout.matrix_module},200"
+
+
+@register
+class QR(Symbology):
+    """QR code. Printing needs nothing extra (the printer draws it from
+    ``^BQ``); images are drawn with the optional ``qrcode`` package."""
+
+    name = "qr"
+    label = "QR"
+    linear = False
+    quiet_zone = 4
+    png_options = MATRIX_PNG_OPTIONS
+    # Bytes of a version 40 symbol at error correction level M
+    MAX_BYTES = 2331
+
+    def available(self):
+        # Looked up without importing it, so startup stays fast
+        from importlib.util import find_spec
+
+        return find_spec("qrcode") is not None
+
+    def complete(self, code):
+        if len(code.encode("utf-8")) > self.MAX_BYTES:
+            raise ValueError(f"QR admite hasta {self.MAX_BYTES} bytes")
+        return code
+
+    def rows(self, code):
+        try:
+            import qrcode
+        except ImportError:
+            raise RuntimeError(
+                "Las imágenes QR requieren el paquete 'qrcode' (pip install qrcode); "
+                "la impresión ZPL no lo necesita"
+            ) from None
+        symbol = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, border=0)
+        symbol.add_data(code.encode("utf-8"))
+        symbol.make(fit=True)
+        return ["".join("1" if dark else "0" for dark in row) for row in symbol.get_matrix()]
+
+    def field_value(self, code):
+        # Error correction M, automatic data mode
+        return f"MA,{code}"
+
+    def zpl_command(self, layout):
+        return f"^BQN,2,{min(10, layout.matrix_module)}"
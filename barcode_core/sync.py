@@ -0,0 +1,473 @@
+"""Shared duplicate detection for several stations through a sync service.
+
+The service (``SyncServer``, run with ``barcode-app sync-server``) keeps one
+append-only log of the records of every station in SQLite, numbered by a
+sequence. Stations talk to it over TCP with one JSON request and one JSON
+response per line:
+
+    {"op": "push", "station": "A", "batch": "<id>", "records": [[code, timestamp, filename], ...]}
+    -> {"ok": true, "cursor": 1234}
+    {"op": "pull", "since": 1200, "limit": 5000}
+    -> {"ok": true, "log": "<id>", "records": [[seq, code, timestamp, station], ...],
+        "cursor": 1234, "more": false}
+
+A station (``SyncClient``) never waits on the network for a lookup. New local
+records go to an outbox file that a background thread pushes in batches, and
+the records of every station are pulled after the last cursor into a local
+cache (``RemoteCodes``), which is what ``exists`` reads. Both files live next
+to the station's database, so records created while the service is down are
+pushed once it is back. A batch id derived from its contents makes a push
+retried after a lost response count once. Deletions are not shared.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+import uuid
+
+from . import DEFAULT_SYNC_PORT
+from .metrics import metrics
+
+DEFAULT_PORT = DEFAULT_SYNC_PORT
+DEFAULT_LOG_FILE = "sync_server.sqlite3"
+CACHE_FILE = "barcode_sync_cache.jsonl"
+OUTBOX_FILE = "barcode_sync_outbox.jsonl"
+PUSH_BATCH = 500
+PULL_LIMIT = 5000
+
+
+def parse_address(address, default_port=DEFAULT_PORT):
+    """``(host, port)`` from ``host[:port]``."""
+    address = address.strip()
+    if not address:
+        raise ValueError("dirección del servidor vacía")
+    host, _, port = address.rpartition(":")
+    if not host:
+        return address, default_port
+    if not port.isdigit():
+        raise ValueError(f"puerto no válido: {address}")
+    return host, int(port)
+
+
+# --- Service -----------------------------------------------------------------
+
+
+class SyncLog:
+    """The shared log of the service: every pushed record, in arrival order."""
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS records ("
+        " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " code TEXT NOT NULL,"
+        " timestamp TEXT NOT NULL,"
+        " filename TEXT,"
+        " station TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS batches (id TEXT PRIMARY KEY)",
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    ]
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            for statement in self.SCHEMA:
+                self.conn.execute(statement)
+            # Identifies this log, so stations notice a new or different one
+            self.conn.execute(
+                "INSERT OR IGNORE INTO meta VALUES ('log_id', ?)", (uuid.uuid4().hex,)
+            )
+        self.log_id = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'log_id'"
+        ).fetchone()[0]
+
+    def cursor(self):
+        return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM records").fetchone()[0]
+
+    def push(self, station, batch, records):
+        """Append ``[(code, timestamp, filename)]``; a repeated ``batch`` is ignored."""
+        with self.lock, self.conn:
+            if batch:
+                seen = self.conn.execute(
+                    "INSERT OR IGNORE INTO batches VALUES (?)", (batch,)
+                ).rowcount == 0
+                if seen:
+                    return self.cursor()
+            self.conn.executemany(
+                "INSERT INTO records (code, timestamp, filename, station) VALUES (?, ?, ?, ?)",
+                [(code, timestamp, filename, station) for code, timestamp, filename in records],
+            )
+            return self.cursor()
+
+    def pull(self, since, limit=PULL_LIMIT):
+        """``([(seq, code, timestamp, station)], cursor, more)`` after ``since``."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT seq, code, timestamp, station FROM records"
+                " WHERE seq > ? ORDER BY seq LIMIT ?",
+                (since, limit + 1),
+            ).fetchall()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        return rows, rows[-1][0] if rows else since, more
+
+    def close(self):
+        self.conn.close()
+
+
+class SyncHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.dispatch(json.loads(line))
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class SyncServer(socketserver.ThreadingTCPServer):
+    """The sync service: one thread per connected station."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, log, host="127.0.0.1", port=DEFAULT_PORT):
+        self.log = log
+        super().__init__((host, port), SyncHandler)
+
+    def dispatch(self, request):
+        op = request.get("op")
+        if op == "push":
+            cursor = self.log.push(
+                str(request["station"]), request.get("batch"), request["records"]
+            )
+            return {"ok": True, "cursor": cursor}
+        if op == "pull":
+            limit = min(int(request.get("limit", PULL_LIMIT)), PULL_LIMIT)
+            rows, cursor, more = self.log.pull(int(request.get("since", 0)), limit)
+            return {
+                "ok": True,
+                "log": self.log.log_id,
+                "records": rows,
+                "cursor": cursor,
+                "more": more,
+            }
+        if op == "status":
+            return {"ok": True, "log": self.log.log_id, "cursor": self.log.cursor()}
+        raise ValueError(f"operación desconocida: {op}")
+
+
+# --- Station -----------------------------------------------------------------
+
+
+class RemoteCodes:
+    """The codes of the shared log, cached in a JSON Lines file.
+
+    The first line records which log the cache was pulled from; the rest are
+    ``[seq, code, timestamp, station]`` rows, appended as they are pulled.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.log_id = None
+        self.cursor = 0
+        self.stations = {}
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        stations = {}
+        cursor = 0
+        with open(self.path, "rb") as file:
+            try:
+                log_id = json.loads(file.readline())["log"]
+            except (ValueError, KeyError, TypeError):
+                return
+            good = file.tell()
+            for line in file:
+                try:
+                    seq, code, _, station = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                stations.setdefault(code, station)
+                cursor = seq
+                good += len(line)
+        if good < os.path.getsize(self.path):
+            # Torn last line: drop it so later rows are appended after a
+            # whole line; it is pulled again
+            with open(self.path, "rb+") as file:
+                file.truncate(good)
+        with self.lock:
+            self.log_id = log_id
+            self.stations = stations
+            self.cursor = cursor
+
+    def reset(self, log_id):
+        """Start over for another (or a recreated) shared log."""
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write(json.dumps({"log": log_id}) + "\n")
+        with self.lock:
+            self.log_id = log_id
+            self.cursor = 0
+            self.stations = {}
+
+    def add(self, rows):
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        with self.lock:
+            for seq, code, _, station in rows:
+                self.stations.setdefault(code, station)
+            if rows:
+                self.cursor = rows[-1][0]
+
+    def __len__(self):
+        return len(self.stations)
+
+    def station_of(self, code):
+        """Station that registered ``code`` first, or None if unknown."""
+        # One dict lookup: safe without the lock
+        return self.stations.get(code)
+
+
+class Outbox:
+    """Local records not yet accepted by the service, kept in a JSON Lines file.
+
+    Records are ``[code, timestamp, filename]`` lines. An acknowledged batch
+    only appends an ``{"ack": count}`` line, so pushing a large outbox stays
+    linear; ``compact`` rewrites the file without the acknowledged records
+    once a push round is over.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.items = []
+        # Items at the front of ``items`` already stored by the service
+        self.acked = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                content = file.read()
+            lines = content.splitlines()
+            valid = 0
+            for line in lines:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    # Torn line from a crash; keep the others
+                    continue
+                valid += 1
+                if isinstance(item, dict):
+                    self.acked += item.get("ack", 0)
+                else:
+                    self.items.append(item)
+            if valid < len(lines) or (content and not content.endswith("\n")):
+                self.compact(force=True)
+            else:
+                self.compact()
+
+    def __len__(self):
+        return len(self.items) - self.acked
+
+    def add(self, items):
+        items = [list(item) for item in items]
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.writelines(json.dumps(item, ensure_ascii=False) + "\n" for item in items)
+            self.items.extend(items)
+
+    def peek(self, limit):
+        with self.lock:
+            return self.items[self.acked:self.acked + limit]
+
+    def remove(self, count):
+        """Mark the first ``count`` items as stored by the service."""
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(json.dumps({"ack": count}) + "\n")
+            self.acked += count
+
+    def compact(self, force=False):
+        """Rewrite the file with only the items not yet acknowledged."""
+        with self.lock:
+            if not self.acked and not force:
+                return
+            del self.items[:self.acked]
+            self.acked = 0
+            temp = self.path + ".tmp"
+            with open(temp, "w", encoding="utf-8") as file:
+                file.writelines(json.dumps(item, ensure_ascii=False) + "\n" for item in self.items)
+            os.replace(temp, self.path)
+
+
+class SyncClient:
+    """A station's connection to the sync service.
+
+    ``push(records)`` only writes to the outbox; ``start()`` runs a thread
+    that pushes the outbox and pulls the shared log every ``interval``
+    seconds (at once after a push).
+    """
+
+    def __init__(self, address, station=None, folder=".", interval=1.0, timeout=5.0):
+        self.host, self.port = parse_address(address)
+        self.station = station or socket.gethostname()
+        self.interval = interval
+        self.timeout = timeout
+        cache_path = os.path.join(folder, CACHE_FILE)
+        outbox_path = os.path.join(folder, OUTBOX_FILE)
+        # Nothing shared from this folder yet
+        self.first_run = not os.path.exists(cache_path) and not os.path.exists(outbox_path)
+        self.remote = RemoteCodes(cache_path)
+        self.outbox = Outbox(outbox_path)
+        self.connected = False
+        self.error = None
+        self.last_sync = None
+        self._sock = None
+        self._reader = None
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sync", daemon=True)
+        self._thread.start()
+
+    def station_of(self, code):
+        """Station that registered ``code`` according to the local cache."""
+        return self.remote.station_of(code)
+
+    def exists(self, code):
+        return self.remote.station_of(code) is not None
+
+    def push(self, records):
+        """Queue records (``record["code"]`` etc.) to be shared."""
+        self.outbox.add(
+            (record["code"], record["timestamp"], record["filename"]) for record in records
+        )
+        self._wake.set()
+
+    def status(self):
+        return {
+            "connected": self.connected,
+            "pending": len(self.outbox),
+            "remote_codes": len(self.remote),
+            "cursor": self.remote.cursor,
+            "last_sync": self.last_sync,
+            "error": self.error,
+        }
+
+    def close(self, wait=True):
+        """Stop syncing; with ``wait`` until a round in progress has ended."""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is None:
+            self._disconnect()
+        elif wait:
+            # The thread closes the connection on its way out
+            self._thread.join(self.timeout)
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile("rb")
+
+    def _disconnect(self):
+        for resource in (self._reader, self._sock):
+            if resource is not None:
+                try:
+                    resource.close()
+                except OSError:
+                    pass
+        self._sock = self._reader = None
+
+    def _request(self, payload):
+        if self._sock is None:
+            self._connect()
+        try:
+            self._sock.sendall(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+            line = self._reader.readline()
+        except OSError:
+            self._disconnect()
+            raise
+        if not line:
+            self._disconnect()
+            raise ConnectionError("el servidor cerró la conexión")
+        response = json.loads(line)
+        if not isinstance(response, dict):
+            raise RuntimeError("respuesta no válida del servidor")
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error", "error del servidor"))
+        return response
+
+    @staticmethod
+    def _check_pull(response):
+        """Raise ``RuntimeError`` unless ``response`` is a well-formed pull reply."""
+        for key, kind in (("log", str), ("records", list), ("more", bool)):
+            if not isinstance(response.get(key), kind):
+                raise RuntimeError(f"respuesta no válida del servidor: '{key}'")
+        for row in response["records"]:
+            if not (isinstance(row, list) and len(row) == 4 and isinstance(row[0], int)):
+                raise RuntimeError("respuesta no válida del servidor: registro mal formado")
+
+    def sync_once(self):
+        """Push the whole outbox, then pull everything new. Returns rows pulled."""
+        started = time.perf_counter()
+        try:
+            while True:
+                items = self.outbox.peek(PUSH_BATCH)
+                if not items:
+                    break
+                batch = hashlib.sha1(
+                    json.dumps([self.station, items], ensure_ascii=False).encode("utf-8")
+                ).hexdigest()
+                self._request(
+                    {"op": "push", "station": self.station, "batch": batch, "records": items}
+                )
+                self.outbox.remove(len(items))
+        finally:
+            self.outbox.compact()
+        pulled = 0
+        while True:
+            response = self._request(
+                {"op": "pull", "since": self.remote.cursor, "limit": PULL_LIMIT}
+            )
+            self._check_pull(response)
+            if response["log"] != self.remote.log_id:
+                self.remote.reset(response["log"])
+                continue
+            self.remote.add(response["records"])
+            pulled += len(response["records"])
+            if not response["more"]:
+                break
+        metrics.observe("sync_ms", (time.perf_counter() - started) * 1000)
+        self.last_sync = time.time()
+        return pulled
+
+    def _run(self):
+        self.remote.load()
+        delay = self.interval
+        while not self._stopped:
+            self._wake.clear()
+            try:
+                self.sync_once()
+            except (OSError, ValueError, RuntimeError) as e:
+                self.connected = False
+                self.error = str(e)
+                metrics.incr("sync_errors")
+                # Back off while the service is unreachable
+                delay = min(delay * 2, 30.0)
+            else:
+                self.connected = True
+                self.error = None
+                delay = self.interval
+            self._wake.wait(delay)
+        self._disconnect()
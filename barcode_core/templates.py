@@ -0,0 +1,96 @@
+"""Compiled ZPL label templates with printer-side stored formats.
+
+A template is a label body (the commands between ``^XA`` and ``^XZ``) whose
+variable data is written as ``^FD{name}^FS``. It is parsed once into a
+``str.format`` pattern, so rendering a label is a single C-level format call
+with the field values escaped by ``field_data``.
+
+Templates can also be downloaded to the printer as a stored format
+(``^DF``). Each job then only recalls the format (``^XF``) and sends the
+field values, which cuts the bytes per label on long runs.
+"""
+
+import re
+import zlib
+from functools import lru_cache
+
+from .zpl import field_data
+
+_FIELD_RE = re.compile(r"\^FD\{(\w+)\}")
+
+
+class LabelTemplate:
+    def __init__(self, name, body):
+        self.name = name
+        self.body = body
+        self.fields = []
+        pattern = []
+        stored = []
+        position = 0
+        for match in _FIELD_RE.finditer(body):
+            literal = body[position:match.start()]
+            pattern.append(literal.replace("{", "{{").replace("}", "}}"))
+            stored.append(literal)
+            self.fields.append(match.group(1))
+            number = len(self.fields)
+            pattern.append(f"{{{number - 1}}}")
+            stored.append(f"^FN{number}")
+            position = match.end()
+        tail = body[position:]
+        pattern.append(tail.replace("{", "{{").replace("}", "}}"))
+        stored.append(tail)
+        self._pattern = "^XA\n" + "".join(pattern) + "^PQ{qty}\n^XZ"
+        self._download = f"^XA\n^DFR:{name}.ZPL^FS\n" + "".join(stored) + "^XZ"
+        self._recall_head = f"^XA\n^XFR:{name}.ZPL^FS\n"
+
+    def _values(self, values):
+        if isinstance(values, dict):
+            values = [values[field] for field in self.fields]
+        if len(values) != len(self.fields):
+            raise ValueError(
+                f"La plantilla {self.name} espera {len(self.fields)} campos, "
+                f"se recibieron {len(values)}"
+            )
+        return values
+
+    def render(self, values, qty=1):
+        """Complete inline format; ``values`` is a dict or a sequence in field order."""
+        return self._pattern.format(
+            *[field_data(value) for value in self._values(values)], qty=int(qty)
+        )
+
+    def download(self):
+        """``^DF`` format that stores the layout on the printer."""
+        return self._download
+
+    def recall(self, values, qty=1):
+        """``^XF`` format that reuses the stored layout with new field values."""
+        fields = "".join(
+            f"^FN{number}{field_data(value)}^FS\n"
+            for number, value in enumerate(self._values(values), 1)
+        )
+        return f"{self._recall_head}{fields}^PQ{int(qty)}\n^XZ"
+
+
+@lru_cache(maxsize=64)
+def compile_template(body, name=None):
+    """Parse ``body`` once; repeated calls return the cached template.
+
+    Without a ``name`` one is derived from the body, so different layouts
+    never overwrite each other's stored format on the printer.
+    """
+    if name is None:
+        name = f"T{zlib.crc32(body.encode('utf-8')) & 0xFFFFFFF:07X}"
+    return LabelTemplate(name, body)
+
+
+def row_template(layout):
+    """Template with one barcode field per column of ``layout`` (``c0``, ``c1``...).
+
+    Values must go through ``layout.field_value`` first.
+    """
+    body = "".join(
+        f"{layout.barcode_field(column)}^FD{{c{column}}}^FS\n"
+        for column in range(layout.columns)
+    )
+    return compile_template(body)
@@ -0,0 +1,103 @@
+"""ZPL label building."""
+
+from . import DEFAULT_SYMBOLOGY
+
+# Characters that would be read as ZPL commands inside field data
+_SPECIAL = ("^", "~")
+
+
+def field_data(value):
+    """``^FD`` command for ``value``, hex-escaped via ``^FH`` when needed.
+
+    A ``^`` or ``~`` in the data would otherwise start a new command.
+    """
+    value = str(value)
+    if not any(char in value for char in _SPECIAL):
+        return f"^FD{value}"
+    escaped = value.replace("_", "_5F").replace("^", "_5E").replace("~", "_7E")
+    return f"^FH_^FD{escaped}"
+
+
+class LabelLayout:
+    """Geometry of a label row with ``columns`` barcodes side by side.
+
+    Positions are in printer dots. The defaults reproduce the original
+    two-column layout (``^FO50,50`` and ``^FO500,50``). ``symbology`` names
+    the barcode printed in every column (see ``symbology``); 2D symbols use
+    ``matrix_module`` dots per module.
+    """
+
+    def __init__(
+        self,
+        columns=2,
+        origin_x=50,
+        origin_y=50,
+        column_pitch=450,
+        module_width=2.5,
+        ratio=2,
+        bar_height=80,
+        symbology=DEFAULT_SYMBOLOGY,
+        matrix_module=6,
+    ):
+        if columns < 1:
+            raise ValueError("columns must be at least 1")
+        self.columns = columns
+        self.origin_x = origin_x
+        self.origin_y = origin_y
+        self.column_pitch = column_pitch
+        self.module_width = module_width
+        self.ratio = ratio
+        self.bar_height = bar_height
+        self.symbology = symbology
+        self.matrix_module = matrix_module
+
+    def field_origin(self, column):
+        return self.origin_x + column * self.column_pitch, self.origin_y
+
+    def barcode_field(self, column, symbology=None):
+        """Position and barcode commands for ``column``, up to ``^FD``.
+
+        ``symbology`` overrides the layout's for this column.
+        """
+        from .symbology import get_symbology
+
+        x, y = self.field_origin(column)
+        return f"^FO{x},{y}{get_symbology(symbology or self.symbology).zpl_command(self)}"
+
+    def field_value(self, code, symbology=None):
+        """``^FD`` data of ``code`` (e.g. QR prefixes its options)."""
+        from .symbology import get_symbology
+
+        return get_symbology(symbology or self.symbology).field_value(code)
+
+
+DEFAULT_LAYOUT = LabelLayout()
+
+
+def build_row(codes, qty=1, layout=DEFAULT_LAYOUT, symbologies=None):
+    """One ``^XA..^XZ`` format printing ``codes`` across the columns ``qty`` times.
+
+    ``codes`` has one entry per column; ``None`` leaves that column blank.
+    ``symbologies`` optionally gives the symbology of each column.
+    """
+    layout = layout or DEFAULT_LAYOUT
+    zpl = "^XA\n"
+    for column, code in enumerate(codes):
+        if code:
+            symbology = symbologies[column] if symbologies else None
+            zpl += (
+                f"{layout.barcode_field(column, symbology)}"
+                f"{field_data(layout.field_value(code, symbology))}^FS\n"
+            )
+    zpl += f"^PQ{qty}\n"
+    zpl += "^XZ"
+    return zpl
+
+
+def build_label(left_text=None, right_text=None, qty=1, symbologies=None, layout=None):
+    """ZPL for one label row with up to two barcodes, printed ``qty`` times.
+
+    ``symbologies`` is an optional ``(left, right)`` pair; Code128 by default.
+    ``layout`` defaults to ``DEFAULT_LAYOUT`` (see ``settings.PrinterProfile``).
+    """
+    return build_row([left_text, right_text], qty, layout, symbologies=symbologies)
@@ -0,0 +1,73 @@
+"""Compare the built-in Code128 encoder with the python-barcode/Pillow path.
+
+    python benchmarks/bench_code128.py [-n 500]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from barcode_core import code128  # noqa: E402
+from barcode_core.rendering import PNG_OPTIONS  # noqa: E402
+from barcode_core.symbology import get_symbology  # noqa: E402
+
+CODE128 = get_symbology("code128")
+
+
+def python_barcode_png(code):
+    import barcode
+    from barcode.writer import ImageWriter
+
+    out = io.BytesIO()
+    barcode.get("code128", code, writer=ImageWriter()).write(out, options={"write_text": False})
+    return out
+
+
+def builtin_png(code):
+    out = io.BytesIO()
+    CODE128.to_png(code, out, **PNG_OPTIONS)
+    return out
+
+
+CASES = [
+    ("python-barcode -> PNG", python_barcode_png),
+    ("built-in -> PNG", builtin_png),
+    ("built-in -> SVG", CODE128.to_svg),
+    ("built-in -> ZPL ^GF", CODE128.to_zpl_graphic),
+    ("built-in -> bitmap", CODE128.bitmap),
+    ("built-in encode", code128.encode),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=500, help="codes per case")
+    args = parser.parse_args()
+
+    codes = [f"SKU-{i:06d}-AB{i % 97}" for i in range(args.n)]
+    baseline = None
+    print(f"{'case':<24}{'codes/s':>12}{'ms/code':>10}{'speedup':>10}")
+    for name, func in CASES:
+        try:
+            func(codes[0])
+        except ImportError as e:
+            print(f"{name:<24}{'skipped (' + str(e) + ')':>32}")
+            continue
+        started = time.perf_counter()
+        for code in codes:
+            func(code)
+        elapsed = time.perf_counter() - started
+        if baseline is None:
+            baseline = elapsed
+        print(
+            f"{name:<24}{args.n / elapsed:>12.0f}{elapsed / args.n * 1000:>10.3f}"
+            f"{baseline / elapsed:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
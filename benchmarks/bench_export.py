@@ -0,0 +1,60 @@
+"""Throughput and peak memory of the streaming exporter.
+
+    python benchmarks/bench_export.py [--rows 10000 100000] [--formats csv jsonl pdf zip]
+
+Peak memory is measured with ``tracemalloc`` in the exporting process only
+(render workers are separate processes), and should not grow with ``--rows``.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from barcode_core.export import export  # noqa: E402
+from barcode_core.storage import TextFileStorage  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_loader import write_database  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--formats", nargs="+", default=["csv", "jsonl", "pdf", "zip"])
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9}  {'format':<8}{'seconds':>9}{'rows/s':>10}{'peak MB':>9}{'file MB':>9}")
+    with tempfile.TemporaryDirectory() as folder:
+        for rows in args.rows:
+            db = os.path.join(folder, f"db_{rows}.txt")
+            write_database(db, rows)
+            storage = TextFileStorage(db)
+            storage.load()
+            codes = os.path.join(folder, "codes")
+            for fmt in args.formats:
+                out = os.path.join(folder, f"export.{fmt}")
+                started = time.perf_counter()
+                count = export(storage, out, fmt, folder=codes, workers=args.workers)
+                elapsed = time.perf_counter() - started
+                # tracemalloc slows Python down, so memory is measured in a second run
+                tracemalloc.start()
+                export(storage, out, fmt, folder=codes, workers=args.workers)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(
+                    f"{rows:>9}  {fmt:<8}{elapsed:>9.2f}{count / elapsed:>10.0f}"
+                    f"{peak / 1e6:>9.1f}{os.path.getsize(out) / 1e6:>9.1f}"
+                )
+                os.remove(out)
+            storage.close()
+
+
+if __name__ == "__main__":
+    main()
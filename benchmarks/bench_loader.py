@@ -0,0 +1,119 @@
+"""Startup time and memory of the text database loader.
+
+    python benchmarks/bench_loader.py [--rows 10000 100000 1000000]
+
+Compares the original loader (a list of dicts with a ``full_line`` copy) with
+``TextFileStorage``: a full load, and a background load where only the time
+until the first page can be shown matters.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from barcode_core.applog import format_entry  # noqa: E402
+from barcode_core.storage import TextFileStorage  # noqa: E402
+
+
+def write_database(path, rows):
+    """A history like a busy station's: one code every few seconds, some repeats."""
+    start = datetime(2023, 1, 2, 8, 0, 0)
+    with open(path, "w", encoding="utf-8") as file:
+        for i in range(rows):
+            code = f"SKU{(i * 7919) % max(1, rows * 3 // 4):07d}"
+            when = start + timedelta(seconds=i * 7)
+            stamp = when.strftime("%Y-%m-%d %H:%M:%S")
+            file.write(format_entry(code, stamp, f"barcode_{code}_{when:%Y%m%d_%H%M%S}"))
+
+
+def legacy_load(path):
+    barcode_list = []
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                parts = line.split("|")
+                if len(parts) >= 3:
+                    barcode_list.append(
+                        {
+                            "code": parts[0],
+                            "timestamp": parts[1],
+                            "filename": parts[2],
+                            "full_line": line,
+                        }
+                    )
+    return barcode_list
+
+
+def storage_load(path):
+    storage = TextFileStorage(path)
+    storage.load()
+    return storage
+
+
+def storage_first_page(path):
+    storage = TextFileStorage(path)
+    storage.load(background=True)
+    storage.page(0, 100)
+    return storage
+
+
+def measure(func, path):
+    """Seconds for ``func(path)`` and bytes still allocated by its result."""
+    gc.collect()
+    started = time.perf_counter()
+    result = func(path)
+    elapsed = time.perf_counter() - started
+    if isinstance(result, TextFileStorage):
+        result.wait_loaded()
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = func(path)
+    if isinstance(result, TextFileStorage):
+        result.wait_loaded()
+    gc.collect()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return elapsed, memory
+
+
+CASES = [
+    ("original (dicts)", legacy_load),
+    ("TextFileStorage", storage_load),
+    ("first page (background)", storage_first_page),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    args = parser.parse_args()
+
+    print(f"{'rows':>9}  {'case':<26}{'seconds':>9}{'MB':>9}{'bytes/row':>11}")
+    with tempfile.TemporaryDirectory() as folder:
+        for rows in args.rows:
+            path = os.path.join(folder, f"db_{rows}.txt")
+            write_database(path, rows)
+            for name, func in CASES:
+                elapsed, memory = measure(func, path)
+                print(
+                    f"{rows:>9}  {name:<26}{elapsed:>9.3f}{memory / 1e6:>9.1f}"
+                    f"{memory / rows:>11.0f}"
+                )
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Latency of the code search index at large histories.
+
+    python benchmarks/bench_search.py [--codes 1000000] [--queries 1000]
+
+The index is built the way the GUI builds it (with the n-gram index) and
+``search()``, what every keystroke runs, is timed on prefixes, fragments,
+typos and codes that are not in the history, which fall through to the
+substring and fuzzy lookups. Exits with status 1 if the slowest kind of
+query averages more than ``--budget`` milliseconds.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from barcode_core.search import CodeIndex  # noqa: E402
+
+
+def make_codes(count, seed=1):
+    rng = random.Random(seed)
+    prefixes = ["SKU", "PAL", "LOT", "ab"]
+    return [f"{rng.choice(prefixes)}{rng.randrange(10 ** 8):08d}" for _ in range(count)]
+
+
+def typo(code, rng):
+    i = rng.randrange(3, len(code))
+    return code[:i] + "X" + code[i + 1:]
+
+
+def timed(label, func, queries):
+    started = time.perf_counter()
+    worst = 0.0
+    for query in queries:
+        begun = time.perf_counter()
+        func(query)
+        worst = max(worst, time.perf_counter() - begun)
+    elapsed = (time.perf_counter() - started) / len(queries)
+    print(f"{label:<22}{elapsed * 1e6:>10.1f} µs/query{worst * 1e6:>10.1f} µs max")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--codes", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("-k", type=int, default=10, help="results per query")
+    parser.add_argument("--budget", type=float, default=1.0, help="ms per search()")
+    args = parser.parse_args()
+
+    rng = random.Random(2)
+    codes = make_codes(args.codes)
+    sample = rng.sample(codes, args.queries)
+    prefixes = [code[:rng.randint(2, 8)] for code in sample]
+    fragments = [code[3:8] for code in sample]
+    typos = [typo(code, rng) for code in sample]
+    known = set(codes)
+    missing = [code for code in make_codes(args.queries * 2, seed=3) if code not in known]
+    missing = missing[:args.queries]
+
+    started = time.perf_counter()
+    index = CodeIndex(codes, ngrams=True)
+    print(f"{'build (GUI index)':<22}{time.perf_counter() - started:>10.2f} s")
+    timed("prefix top-k", lambda q: index.prefix(q, args.k), prefixes)
+    timed("substring", lambda q: index.contains(q, args.k), fragments)
+    timed("fuzzy", lambda q: index.fuzzy(q, args.k), typos)
+    search = lambda q: index.search(q, args.k)  # noqa: E731
+    worst = max(
+        timed("search: prefix", search, prefixes),
+        timed("search: fragment", search, fragments),
+        timed("search: typo", search, typos),
+        timed("search: new code", search, missing),
+    )
+    print(f"\nsearch() más lento: {worst * 1000:.2f} ms (objetivo {args.budget:.2f} ms)")
+    return 1 if worst * 1000 > args.budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Cold start of the GUI: imports, time to first paint and database load.
+
+    python benchmarks/bench_startup.py [--runs 5] [--exe dist/BarcodeGenerator/BarcodeGenerator.exe]
+                                       [--budget 1.0] [--imports 15]
+
+Each run launches the application (the script by default, or the frozen
+``--exe``) with ``--startup-time FILE``: it writes its own milestones and
+closes once the database has loaded. Launch to first paint is measured from
+just before the process is spawned, so it includes interpreter or frozen
+bootstrap time. ``--imports`` also lists the slowest imports of
+``barcode_app`` from ``python -X importtime``. Exits with status 1 if the
+median launch to first paint exceeds ``--budget`` seconds.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def launch(command, cwd):
+    """Run the application once; returns its startup report with
+    ``launch_ms`` (spawn to first paint) added."""
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "startup.json")
+        spawned = time.time()
+        result = subprocess.run(
+            command + ["--startup-time", path], cwd=cwd, capture_output=True, text=True
+        )
+        if result.returncode or not os.path.exists(path):
+            lines = result.stderr.strip().splitlines() or [f"status {result.returncode}"]
+            raise RuntimeError(lines[-1])
+        with open(path, encoding="utf-8") as file:
+            report = json.load(file)
+    marks = report["marks_ms"]
+    report["launch_ms"] = (report["started_at"] - spawned) * 1000 + marks["first_paint"]
+    return report
+
+
+def slowest_imports(limit):
+    """``[(cumulative µs, module)]`` of the slowest imports of barcode_app."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import barcode_app"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports.append((int(cumulative), name.rstrip()))
+    return sorted(imports, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--exe", help="frozen executable to launch instead of the script")
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds to first paint")
+    parser.add_argument("--imports", type=int, default=0, metavar="N",
+                        help="also list the N slowest imports")
+    args = parser.parse_args()
+
+    if args.imports:
+        print(f"{'cumulative ms':>14}  module")
+        for cumulative, name in slowest_imports(args.imports):
+            print(f"{cumulative / 1000:>14.1f}  {name}")
+        print()
+
+    if args.exe:
+        command, cwd = [os.path.abspath(args.exe)], os.path.dirname(os.path.abspath(args.exe))
+    else:
+        command, cwd = [sys.executable, os.path.join(ROOT, "barcode_app.py")], ROOT
+    columns = ("imports", "tk", "window", "first_paint", "database_loaded")
+    print(f"{'run':>4}{'launch':>10}" + "".join(f"{name:>17}" for name in columns))
+    launches = []
+    for run in range(1, args.runs + 1):
+        try:
+            report = launch(command, cwd)
+        except RuntimeError as e:
+            print(f"No se pudo iniciar la aplicación (¿sin pantalla?): {e}")
+            return 2
+        launches.append(report["launch_ms"])
+        marks = report["marks_ms"]
+        print(
+            f"{run:>4}{report['launch_ms']:>10.0f}"
+            + "".join(f"{marks.get(name, float('nan')):>17.0f}" for name in columns)
+        )
+    median = statistics.median(launches) / 1000
+    print(f"\nmediana hasta la primera pintura: {median:.2f} s (objetivo {args.budget:.2f} s)")
+    return 1 if median > args.budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+"""Benchmark suite for the application's hot paths, with JSON output.
+
+    python benchmarks/suite.py [--quick] [--rows 100000] [-o results.json]
+                               [--compare baseline.json] [--threshold 0.25]
+
+Every case runs the same code as the GUI handler it is named after, through
+the GUI-free core, so the suite runs headless on Linux or a CI machine:
+
+* ``render.*``    - ``generate_barcode``: clean_code, make_filename, render_png
+* ``load.*``      - ``load_database`` at ``--rows`` records
+* ``lookup.*``    - ``on_input_change``: the per-keystroke existence check
+* ``treeview.*``  - ``update_treeview``: one page of records turned into rows
+* ``print.*``     - ``print_barcode``: ZPL assembly and the spooler, writing to
+  a stubbed ``win32print``
+
+When a display is available (e.g. under ``xvfb-run``) ``treeview.refresh_tk``
+also measures the real ``VirtualTreeview`` refresh; otherwise it is reported
+as skipped. Results are written as JSON (timings in microseconds per call)
+together with the machine, Python version and git commit. ``--compare``
+prints the change against an earlier results file and exits with status 1 if
+any case got slower than ``--threshold``.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from barcode_core.rendering import clean_code, make_filename, render_png  # noqa: E402
+from barcode_core.storage import TextFileStorage, migrate_text_to_sqlite  # noqa: E402
+from barcode_core.zpl import build_label  # noqa: E402
+from bench_loader import write_database  # noqa: E402
+
+
+class Suite:
+    def __init__(self, quick=False):
+        self.quick = quick
+        self.results = []
+
+    def measure(self, name, func, number=1, repeat=5, **params):
+        """Time ``func()`` ``number`` times per sample, ``repeat`` samples,
+        after one untimed warm-up call (imports, caches)."""
+        if self.quick:
+            repeat = min(repeat, 3)
+        func()
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            samples.append((time.perf_counter() - started) / number * 1e6)
+        return self.record(name, samples, number * repeat, **params)
+
+    def record(self, name, samples, calls=None, **params):
+        """Add a case from samples in microseconds per call."""
+        samples = sorted(samples)
+        result = {
+            "name": name,
+            "params": params,
+            "calls": calls or len(samples),
+            "mean_us": statistics.fmean(samples),
+            "median_us": statistics.median(samples),
+            "min_us": samples[0],
+            "max_us": samples[-1],
+            "stdev_us": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        }
+        self.results.append(result)
+        print(f"{name:<28}{result['median_us']:>14.1f} µs{format_params(params):>30}")
+        return result
+
+    def skip(self, name, reason):
+        self.results.append({"name": name, "skipped": reason})
+        print(f"{name:<28}{'skipped: ' + reason:>46}")
+
+
+def format_params(params):
+    return " ".join(f"{key}={value}" for key, value in params.items())
+
+
+class FakeWin32Print(types.ModuleType):
+    """Stand-in for pywin32's ``win32print`` that just counts the bytes sent."""
+
+    def __init__(self):
+        super().__init__("win32print")
+        self.written = 0
+        self.documents = 0
+
+    def OpenPrinter(self, name):
+        return name
+
+    def ClosePrinter(self, handle):
+        pass
+
+    def StartDocPrinter(self, handle, level, info):
+        self.documents += 1
+
+    def StartPagePrinter(self, handle):
+        pass
+
+    def WritePrinter(self, handle, data):
+        self.written += len(data)
+        return len(data)
+
+    def EndPagePrinter(self, handle):
+        pass
+
+    def EndDocPrinter(self, handle):
+        pass
+
+
+def bench_render(suite, folder):
+    counter = iter(range(10 ** 9))
+
+    def generate():
+        text = clean_code(f" SKU-{next(counter):07d} ")
+        render_png(text, folder, make_filename(text), use_cache=False)
+
+    suite.measure("render.png", generate, number=20 if suite.quick else 100)
+    render_png("CACHED-CODE", folder)
+    suite.measure(
+        "render.png_cached",
+        lambda: render_png("CACHED-CODE", folder, make_filename(f"C{next(counter)}")),
+        number=100,
+    )
+
+
+def bench_load(suite, folder, rows):
+    text_path = os.path.join(folder, "barcode_database.txt")
+    write_database(text_path, rows)
+
+    def load():
+        storage = TextFileStorage(text_path)
+        storage.load()
+
+    suite.measure("load.text", load, repeat=3, rows=rows)
+
+    def first_page():
+        storage = TextFileStorage(text_path)
+        started = time.perf_counter()
+        storage.load(background=True)
+        storage.page(0, 100)
+        elapsed = time.perf_counter() - started
+        storage.wait_loaded()
+        return elapsed * 1e6
+
+    # Only the time until the first page can be shown counts here
+    suite.record("load.text_first_page", [first_page() for _ in range(3)], rows=rows)
+
+    sqlite_path = os.path.join(folder, "barcode_database.sqlite3")
+    migrate_text_to_sqlite(text_path, sqlite_path)
+    return text_path, sqlite_path
+
+
+def bench_lookup(suite, storages):
+    for backend, storage in storages.items():
+        codes = storage.page(0, 1000)
+        hits = [record["code"] for record in codes]
+        misses = [f"NUEVO{i:07d}" for i in range(len(hits))]
+        for kind, inputs in (("hit", hits), ("miss", misses)):
+            keys = itertools.cycle(inputs)
+
+            def on_input_change():
+                current_input = next(keys).strip()
+                if storage.exists(current_input):
+                    return f"El código '{current_input}' ya existe en la base de datos"
+                return f"El código '{current_input}' es nuevo"
+
+            suite.measure(
+                f"lookup.{backend}_{kind}", on_input_change, number=1000, backend=backend
+            )
+
+
+def row_values(item):
+    return (item["code"], item["timestamp"], "Existe", "Sí" if item["filename"] else "No")
+
+
+def bench_treeview(suite, storages, rows):
+    rng = random.Random(1)
+    for backend, storage in storages.items():
+
+        def update_treeview():
+            offset = rng.randrange(max(1, storage.count() - 150))
+            return [row_values(record) for record in storage.page(offset, 150)]
+
+        suite.measure(f"treeview.page_{backend}", update_treeview, number=200, rows=rows)
+
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+
+        root = tk.Tk()
+    except Exception as e:
+        suite.skip("treeview.refresh_tk", f"no display ({type(e).__name__})")
+        return
+    from virtual_treeview import VirtualTreeview
+
+    storage = storages["text"]
+    tree = ttk.Treeview(root, columns=("code", "timestamp", "status", "image"), height=25)
+    scrollbar = ttk.Scrollbar(root)
+    view = VirtualTreeview(tree, scrollbar, storage.count, storage.page, row_values)
+
+    def refresh():
+        view.top = rng.randrange(max(1, storage.count() - 150))
+        view.refresh()
+        root.update_idletasks()
+
+    suite.measure("treeview.refresh_tk", refresh, number=20, rows=rows)
+    root.destroy()
+
+
+def bench_print(suite):
+    from barcode_core.spooler import PrintSpooler
+
+    fake = FakeWin32Print()
+    sys.modules["win32print"] = fake
+    suite.measure(
+        "print.build_label", lambda: build_label("ABC-123456", "XYZ-987654", 2), number=1000
+    )
+
+    labels = 50 if suite.quick else 200
+    spooler = PrintSpooler("SAT TT448-2 USE (ZPL)", linger=0.0)
+    done = threading.Semaphore(0)
+
+    def print_run():
+        for i in range(labels):
+            zpl = build_label(f"L{i:06d}", f"R{i:06d}", 1)
+            spooler.submit(zpl, labels=1, callback=lambda item: done.release())
+        for _ in range(labels):
+            done.acquire()
+
+    result = suite.measure("print.spool_batch", print_run, repeat=3, labels=labels)
+    result["labels_per_second"] = labels / (result["median_us"] / 1e6)
+    result["bytes_written"] = fake.written
+    spooler.close()
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """Print the change of every case against ``baseline_path``. Returns regressions."""
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = {
+            result["name"]: result
+            for result in json.load(file)["results"]
+            if "median_us" in result
+        }
+    regressions = []
+    print(f"\n{'case':<28}{'baseline µs':>14}{'now µs':>14}{'change':>10}")
+    for result in results:
+        old = baseline.get(result["name"])
+        if old is None or "median_us" not in result:
+            continue
+        change = result["median_us"] / old["median_us"] - 1
+        flag = "  <-- más lento" if change > threshold else ""
+        print(
+            f"{result['name']:<28}{old['median_us']:>14.1f}{result['median_us']:>14.1f}"
+            f"{change:>+10.0%}{flag}"
+        )
+        if change > threshold:
+            regressions.append(result["name"])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="database size")
+    parser.add_argument("--quick", action="store_true", help="fewer rows and samples")
+    parser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", metavar="JSON", help="earlier results to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="slowdown counted as a regression"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rows = min(args.rows, 20_000) if args.quick else args.rows
+    random.seed(args.seed)
+
+    suite = Suite(quick=args.quick)
+    print(f"{'case':<28}{'median':>17}{'':>30}")
+    with tempfile.TemporaryDirectory() as folder:
+        codes = os.path.join(folder, "codes")
+        os.makedirs(codes)
+        bench_render(suite, codes)
+        text_path, sqlite_path = bench_load(suite, folder, rows)
+        text = TextFileStorage(text_path)
+        text.load()
+        from barcode_core.storage import SQLiteStorage
+
+        sqlite = SQLiteStorage(sqlite_path)
+        sqlite.load()
+        storages = {"text": text, "sqlite": sqlite}
+        try:
+            bench_lookup(suite, storages)
+            bench_treeview(suite, storages, rows)
+        finally:
+            text.close()
+            sqlite.close()
+        bench_print(suite)
+
+    report = {
+        "suite": "barcode-app",
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "rows": rows,
+        "quick": args.quick,
+        "results": suite.results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+            file.write("\n")
+    status = 0
+    if args.compare:
+        regressions = compare(suite.results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} caso(s) más lentos que el umbral: {', '.join(regressions)}")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
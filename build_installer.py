@@ -12,12 +12,13 @@ from pathlib import Path
 
 def check_dependencies():
     """Check if required packages are installed"""
-    required_packages = ['cx_Freeze', 'python-barcode', 'Pillow']
+    # pip name -> module name; python-barcode is no longer bundled
+    required_packages = {'cx_Freeze': 'cx_Freeze', 'Pillow': 'PIL'}
     missing_packages = []
     
-    for package in required_packages:
+    for package, module in required_packages.items():
         try:
-            __import__(package.replace('-', '_'))
+            __import__(module)
         except ImportError:
             missing_packages.append(package)
     
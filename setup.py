@@ -5,18 +5,28 @@ from cx_Freeze import setup, Executable
 # Dependencies are automatically detected, but it might need fine tuning.
 build_exe_options = {
     "packages": [
-        "tkinter", 
-        "os", 
-        "datetime", 
-        "barcode", 
-        "subprocess", 
-        "platform",
-        "PIL",
-        "PIL._tkinter_finder"
+        "tkinter",
+        "sqlite3",
+        "barcode_core"
     ],
+    # Only the parts of Pillow used to write PNGs, and qrcode for QR images;
+    # barcode_core imports them lazily, so they are listed here.
+    # python-barcode is not used by the app.
+    "includes": [
+        "virtual_treeview",
+        "PIL.Image",
+        "PIL.PngImagePlugin",
+        "qrcode"
+    ],
+    # pickle, traceback and warnings are needed by the batch import process pool;
+    # cProfile, profile, pstats and inspect by the profiler in the Rendimiento tab
     "excludes": [
         "unittest",
         "test",
+        "tkinter.test",
+        "lib2to3",
+        "pydoc_data",
+        "asyncio",
         "distutils",
         "setuptools",
         "email",
@@ -25,16 +35,14 @@ build_exe_options = {
         "xml",
         "pydoc",
         "doctest",
-        "argparse",
         "difflib",
-        "inspect",
         "pdb",
-        "pickle",
-        "profile",
-        "pstats",
         "shelve",
-        "traceback",
-        "warnings"
+        "barcode",
+        "numpy",
+        "PIL.ImageQt",
+        "PIL.ImageTk",
+        "PIL.ImageShow"
     ],
     "include_files": [
         ("README.md", "README.md"),
@@ -72,6 +80,12 @@ setup(
             shortcut_name=app_name,
             shortcut_dir="DesktopFolder",
             copyright="Copyright (c) 2024 Barcode Generator Team"
+        ),
+        # Console entry point for scripted use: barcode-app generate|import|...
+        Executable(
+            "barcode_cli.py",
+            base=None,
+            target_name="barcode-app.exe",
         )
     ]
 )
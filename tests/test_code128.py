@@ -0,0 +1,62 @@
+"""Built-in Code128 encoder, checked by decoding its modules back."""
+
+import pytest
+
+from barcode_core import code128
+
+
+def decode_code128(modules):
+    """Text of a Code128 module string; checks start, checksum and stop."""
+    widths = []
+    for bar in modules.replace("10", "1 0").replace("01", "0 1").split():
+        widths.append(str(len(bar)))
+    symbols = ["".join(widths[i:i + 6]) for i in range(0, len(widths) - 7, 6)]
+    assert "".join(widths[-7:]) == code128.PATTERNS[code128.STOP]
+    values = [code128.PATTERNS.index(symbol) for symbol in symbols]
+    *values, check = values
+    assert check == (values[0] + sum(i * value for i, value in enumerate(values[1:], 1))) % 103
+    sets = {value: name for name, value in code128.START.items()}
+    current = sets[values[0]]
+    text = []
+    for value in values[1:]:
+        if value == code128.FNC1:
+            text.append(code128.GS)
+        elif current != "C" and value in (99, 100, 101):
+            current = {99: "C", 100: "B", 101: "A"}[value]
+        elif current == "C" and value in (100, 101):
+            current = {100: "B", 101: "A"}[value]
+        elif current == "C":
+            text.append(f"{value:02d}")
+        elif current == "A" and value >= 64:
+            text.append(chr(value - 64))
+        else:
+            text.append(chr(value + 32))
+    return "".join(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["Hello-123456", "ABC", "0123456789", "12345a", "a1b2c3", "lower\x01CTRL", "X" * 40, "~^_|{}"],
+)
+def test_code128_round_trip(text):
+    assert decode_code128(code128.modules(text)) == text
+
+
+def test_code128_prefers_digit_pairs():
+    # Start C and three pairs beat six set B characters
+    assert code128.encode("123456")[:4] == [code128.START["C"], 12, 34, 56]
+
+
+def test_code128_rejects_non_ascii():
+    with pytest.raises(ValueError):
+        code128.encode("ñ")
+
+
+def test_never_longer_than_python_barcode():
+    barcode = pytest.importorskip("barcode")
+    for text in ("Hello-123456", "ABC", "0123456789", "12345a"):
+        assert code128.modules(text) == barcode.get("code128", text).build()[0]
+    # python-barcode switches to set C late here; the shortest encoding wins
+    text = "SKU-0001234"
+    assert len(code128.modules(text)) < len(barcode.get("code128", text).build()[0])
+    assert decode_code128(code128.modules(text)) == text
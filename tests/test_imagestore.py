@@ -0,0 +1,29 @@
+"""Image store: removing loose and packed images."""
+
+import os
+
+from barcode_core.imagestore import ImageStore
+
+
+def write_png(store, filename):
+    path = store.path(filename)
+    with open(path, "wb") as file:
+        file.write(b"\x89PNG" + filename.encode())
+    return path
+
+
+def test_remove_many_drops_loose_and_packed_images(tmp_path):
+    store = ImageStore(str(tmp_path))
+    for name in ["a", "b", "c"]:
+        write_png(store, name)
+    assert store.pack_images() == (3, 3 * 5)
+    write_png(store, "d")
+
+    assert store.remove_many(["a", "b", "d", "missing"])[0] == 3
+    assert not store.exists("a") and not store.exists("b") and not store.exists("d")
+    assert store.exists("c")
+    assert not os.path.exists(store.pack.path + ".tmp")
+
+    reopened = ImageStore(str(tmp_path))
+    assert reopened.pack.names == {"c"}
+    assert reopened.pack.read("c") == b"\x89PNGc"
@@ -0,0 +1,71 @@
+"""Print plans: parsing and packing of codes into label rows."""
+
+import pytest
+
+from barcode_core.plans import PrintPlan, parse_plan_lines, plan_rows
+from barcode_core.zpl import LabelLayout
+
+
+def printed(blocks):
+    copies = {}
+    for row, repeat in blocks:
+        for code in row:
+            if code is not None:
+                copies[code] = copies.get(code, 0) + repeat
+    return copies
+
+
+def test_parse_plan_lines():
+    lines = ["A,2", "B x 3", "", "A 1", "C", "D;4", "E\t5"]
+    assert parse_plan_lines(lines) == [("A", 3), ("B", 3), ("C", 1), ("D", 4), ("E", 5)]
+
+
+def test_parse_plan_lines_cleans_codes():
+    lines = ["AB C,2", "ABC", " A/B x 3", "/ 4"]
+    assert parse_plan_lines(lines) == [("ABC", 3), ("AB", 3)]
+
+
+def test_parse_plan_lines_rejects_zero():
+    with pytest.raises(ValueError):
+        parse_plan_lines(["A,0"])
+
+
+@pytest.mark.parametrize(
+    "entries, columns, expected",
+    [
+        ([("A", 4), ("B", 4)], 2, [(("A", "B"), 4)]),
+        ([("A", 5), ("B", 3)], 2, [(("A", "B"), 3), (("A", "A"), 1)]),
+        ([("A", 6), ("B", 2)], 2, [(("A", "A"), 3), (("B", "B"), 1)]),
+        ([("A", 1)], 3, [(("A", None, None), 1)]),
+        ([("A", 0)], 2, []),
+    ],
+)
+def test_plan_rows_examples(entries, columns, expected):
+    assert plan_rows(entries, columns) == expected
+
+
+@pytest.mark.parametrize("columns", [1, 2, 3, 4])
+def test_plan_rows_prints_every_copy_once(columns):
+    entries = [(f"C{i}", copies) for i, copies in enumerate([1, 7, 2, 30, 5, 5, 13, 2])]
+    blocks = plan_rows(entries, columns)
+    assert printed(blocks) == dict(entries)
+    assert all(len(row) == columns for row, _ in blocks)
+    # Blank columns only in a single, final row
+    for row, repeat in blocks[:-1]:
+        assert None not in row
+    if None in blocks[-1][0]:
+        assert blocks[-1][1] == 1
+    # Far fewer ZPL blocks than labels
+    assert len(blocks) < sum(copies for _, copies in entries) // columns
+
+
+def test_plan_rows_merges_repeated_codes():
+    assert printed(plan_rows([("A", 2), ("B", 1), ("A", 3)], 2)) == {"A": 5, "B": 1}
+
+
+def test_print_plan_counts():
+    plan = PrintPlan([("A", 5), ("B", 3)], LabelLayout(columns=2))
+    assert plan.labels == 8
+    assert plan.rows == 4
+    assert plan.blank_slots == 0
+    assert plan.to_zpl().count("^XA") == len(plan.blocks)
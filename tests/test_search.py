@@ -0,0 +1,75 @@
+"""Code search index: prefix, substring and fuzzy queries, incremental updates."""
+
+from barcode_core import search
+from barcode_core.search import CodeIndex
+
+CODES = ["SKU00012345", "SKU00012346", "PAL98765432", "lot55512345", "LOT55512345", "X1"]
+
+
+def brute_contains(codes, text):
+    return sorted((code for code in codes if text.upper() in code.upper()), key=str.upper)
+
+
+def test_prefix_ignores_case():
+    index = CodeIndex(CODES, ngrams=True)
+    assert index.prefix("sku0001") == ["SKU00012345", "SKU00012346"]
+    assert sorted(index.prefix("lot")) == ["LOT55512345", "lot55512345"]
+    assert index.count_prefix("SKU") == 2
+
+
+def test_contains_matches_a_full_scan():
+    index = CodeIndex(CODES, ngrams=True)
+    for text in ["12345", "234", "555", "987", "1", "X1", "ZZZZ"]:
+        assert sorted(index.contains(text), key=str.upper) == brute_contains(CODES, text)
+
+
+def test_fuzzy_finds_a_typo():
+    index = CodeIndex(CODES, ngrams=True)
+    assert index.fuzzy("PAL98X65432")[0] == "PAL98765432"
+    assert index.search("SKU0001234X")[:2] == ["SKU00012345", "SKU00012346"]
+
+
+def test_remove_then_add_does_not_duplicate():
+    index = CodeIndex(CODES, ngrams=True)
+    for _ in range(3):
+        index.remove("PAL98765432")
+        assert index.contains("98765") == []
+        index.add("PAL98765432")
+    assert index.contains("98765") == ["PAL98765432"]
+    assert index.fuzzy("PAL98X65432") == ["PAL98765432"]
+
+
+def test_case_variants_share_a_key():
+    index = CodeIndex(CODES, ngrams=True)
+    index.remove("lot55512345")
+    assert index.contains("555") == ["LOT55512345"]
+    index.remove("LOT55512345")
+    assert index.contains("555") == []
+
+
+def test_added_codes_are_found():
+    index = CodeIndex(CODES, ngrams=True)
+    index.add_many(["AAA12345", "ZZZ12345"])
+    assert index.contains("12345") == brute_contains(CODES + ["AAA12345", "ZZZ12345"], "12345")
+
+
+def test_dead_keys_trigger_a_rebuild(monkeypatch):
+    monkeypatch.setattr(search, "_DEAD_LIMIT", 2)
+    codes = [f"SKU{n:05d}" for n in range(8)]
+    index = CodeIndex(codes, ngrams=True)
+    for code in codes[:3]:
+        index.remove(code)
+    assert index.dead == 0
+    assert len(index.id_keys) == 5
+    assert index.contains("SKU") == codes[3:]
+
+
+def test_queries_are_bounded(monkeypatch):
+    monkeypatch.setattr(search, "SCAN_LIMIT", 50)
+    codes = [f"SKU{n:05d}" for n in range(1000)]
+    index = CodeIndex(codes, ngrams=True)
+    # Plenty of matches: the first ones in sorted order
+    assert index.contains("SKU", 10) == codes[:10]
+    assert index.contains("KU0", 10) == codes[:10]
+    # Short queries only look at the first SCAN_LIMIT keys
+    assert index.contains("9", 1000) == [code for code in codes[:50] if "9" in code]
@@ -0,0 +1,37 @@
+"""Settings file: damaged content falls back to the defaults."""
+
+import json
+
+import pytest
+
+from barcode_core.settings import DEFAULT_PROFILE, Settings
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"options": 5},
+        {"options": [["a", 1]]},
+        {"active": []},
+        {"active": {"name": "x"}},
+        {"profiles": []},
+        [],
+    ],
+)
+def test_damaged_file_uses_defaults(tmp_path, data):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    settings = Settings(str(path))
+    assert settings.load_error is not None
+    assert list(settings.profiles) == [DEFAULT_PROFILE]
+    assert settings.active == DEFAULT_PROFILE
+    assert settings.options == {}
+
+
+def test_unknown_active_profile_falls_back(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"active": "gone", "options": {"a": 1}}), encoding="utf-8")
+    settings = Settings(str(path))
+    assert settings.load_error is None
+    assert settings.active == DEFAULT_PROFILE
+    assert settings.get("a") == 1
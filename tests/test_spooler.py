@@ -0,0 +1,78 @@
+"""Print spooler retries against a transport that fails on chosen writes."""
+
+from barcode_core import spooler
+from barcode_core.spooler import PrintSpooler
+
+
+class FlakyTransport:
+    """Records written parts; raises on the writes numbered in ``fail_at``."""
+
+    def __init__(self, fail_at=()):
+        self.fail_at = set(fail_at)
+        self.writes = 0
+        self.received = []
+
+    def open(self):
+        pass
+
+    def close(self):
+        self.received.append(None)
+
+    def write(self, data):
+        self.write_parts([data])
+
+    def write_parts(self, parts, on_written=None):
+        for index, part in enumerate(parts):
+            self.writes += 1
+            if self.writes in self.fail_at:
+                raise OSError("conexión perdida")
+            self.received.append(part.strip())
+            if on_written:
+                on_written(index)
+
+
+def make_spooler(monkeypatch, transport, **options):
+    monkeypatch.setattr(spooler, "open_transport", lambda target: transport)
+    return PrintSpooler("tcp://printer", retry_delay=0, **options)
+
+
+def test_batch_is_one_job(monkeypatch):
+    transport = FlakyTransport()
+    printer = make_spooler(monkeypatch, transport, setup="^XA^PW900^XZ", linger=0.2)
+    items = [printer.submit(f"^XA^FD{i}^XZ") for i in range(3)]
+    for item in items:
+        item.wait(5)
+    printer.close()
+    assert transport.received == [
+        b"^XA^PW900^XZ", b"^XA^FD0^XZ", b"^XA^FD1^XZ", b"^XA^FD2^XZ", None,
+    ]
+    assert printer.stats()["labels_printed"] == 3
+
+
+def test_retry_resends_only_unwritten_formats(monkeypatch):
+    transport = FlakyTransport(fail_at={3})
+    printer = make_spooler(monkeypatch, transport, setup="^XA^PW900^XZ")
+    item = printer.submit("^XA^FDa^XZ\n^XA^FDb^XZ\n^XA^FDc^XZ", labels=3)
+    item.wait(5)
+    printer.close()
+    # The setup is sent again on the new connection, "a" is not
+    assert transport.received == [
+        b"^XA^PW900^XZ", b"^XA^FDa^XZ", None,
+        b"^XA^PW900^XZ", b"^XA^FDb^XZ", b"^XA^FDc^XZ", None,
+    ]
+    assert item.sent == 3 and item.error is None
+    assert printer.stats()["retries"] == 1
+
+
+def test_final_failure_reports_partial_progress(monkeypatch):
+    transport = FlakyTransport(fail_at=range(3, 100))
+    printer = make_spooler(monkeypatch, transport, retries=1)
+    first = printer.submit("^XA^FDa^XZ\n^XA^FDb^XZ")
+    second = printer.submit("^XA^FDc^XZ")
+    first.done.wait(5)
+    second.done.wait(5)
+    printer.close()
+    assert first.complete and first.error is None
+    assert second.sent == 0 and isinstance(second.error, OSError)
+    assert printer.stats()["labels_printed"] == 1
+    assert printer.stats()["failures"] == 1
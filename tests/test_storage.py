@@ -0,0 +1,135 @@
+"""Storage backends: round-trip and deletion, crash recovery of the text log."""
+
+import pytest
+
+from barcode_core.storage import TextFileStorage, open_storage
+
+
+@pytest.fixture(params=["barcodes.txt", "barcodes.sqlite3"])
+def path(request, tmp_path):
+    return str(tmp_path / request.param)
+
+
+def snapshot(storage):
+    return [(record["code"], record["timestamp"], record["filename"]) for record in storage]
+
+
+def test_round_trip(path):
+    storage = open_storage(path)
+    storage.add("ABC123", "barcode_ABC123_20240115_143025", "2024-01-15 14:30:25")
+    storage.add_many(
+        [
+            ("DEF456", "custom_name", "2024-01-15 14:30:26"),
+            ("ABC123", "second_copy", "2024-01-15 14:30:27"),
+        ]
+    )
+    before = snapshot(storage)
+    storage.close()
+
+    storage = open_storage(path)
+    assert snapshot(storage) == before
+    assert before[1] == ("DEF456", "2024-01-15 14:30:26", "custom_name")
+    assert storage.count() == 3
+    assert storage.exists("ABC123")
+    assert not storage.exists("ABC")
+    found = storage.find("ABC123")
+    assert [record["filename"] for record in found] == [
+        "barcode_ABC123_20240115_143025", "second_copy",
+    ]
+    assert storage.codes() == ["ABC123", "DEF456"]
+    storage.close()
+
+
+def test_delete_survives_reopen(path):
+    storage = open_storage(path)
+    storage.add_many([(f"C{i}", f"img{i}") for i in range(5)])
+    storage.add("C1", "img1_again")
+    removed = storage.delete(["C1", "missing"])
+    assert sorted(record["filename"] for record in removed) == ["img1", "img1_again"]
+    assert not storage.exists("C1")
+    assert storage.count() == 4
+    storage.close()
+
+    storage = open_storage(path)
+    assert [record["code"] for record in storage] == ["C0", "C2", "C3", "C4"]
+    storage.close()
+
+
+# --- Append log (text backend) -----------------------------------------------
+
+
+def open_log(tmp_path):
+    storage = TextFileStorage(str(tmp_path / "barcodes.txt"))
+    storage.load()
+    return storage
+
+
+def test_compact_drops_garbage(tmp_path):
+    storage = open_log(tmp_path)
+    storage.add_many([(f"C{i}", f"img{i}") for i in range(10)])
+    storage.delete([f"C{i}" for i in range(0, 10, 2)])
+    live = snapshot(storage)
+    assert storage.garbage > 0
+    assert storage.compact()
+    assert storage.garbage == 0
+    assert snapshot(storage) == live
+    storage.add("NEW", "img_new")
+    storage.close()
+
+    with open(storage.path, encoding="utf-8") as file:
+        assert len(file.read().splitlines()) == len(live) + 1
+    storage = open_log(tmp_path)
+    assert snapshot(storage)[:-1] == live
+    assert storage.exists("NEW")
+    storage.close()
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    storage = open_log(tmp_path)
+    storage.add_many([("A", "img_a"), ("B", "img_b")])
+    storage.close()
+    # A crash in the middle of writing the next line
+    with open(storage.path, "a", encoding="utf-8", newline="") as file:
+        file.write("C|2024-01-15 14:3")
+
+    storage = open_log(tmp_path)
+    assert storage.torn_lines == 1
+    assert [record["code"] for record in storage] == ["A", "B"]
+    storage.add("D", "img_d")
+    storage.close()
+
+    storage = open_log(tmp_path)
+    assert storage.torn_lines == 0
+    assert storage.corrupt_lines == 0
+    assert [record["code"] for record in storage] == ["A", "B", "D"]
+    storage.close()
+
+
+def test_complete_tail_without_newline_is_kept(tmp_path):
+    storage = open_log(tmp_path)
+    storage.add("A", "img_a")
+    storage.close()
+    with open(storage.path, "rb+") as file:
+        file.seek(-1, 2)
+        file.truncate()
+
+    storage = open_log(tmp_path)
+    assert storage.torn_lines == 0
+    assert [record["code"] for record in storage] == ["A"]
+    storage.close()
+
+
+def test_damaged_line_is_skipped(tmp_path):
+    storage = open_log(tmp_path)
+    storage.add_many([("A", "img_a"), ("B", "img_b"), ("C", "img_c")])
+    storage.close()
+    with open(storage.path, encoding="utf-8", newline="") as file:
+        lines = file.readlines()
+    lines[1] = lines[1].replace("B", "X", 1)
+    with open(storage.path, "w", encoding="utf-8", newline="") as file:
+        file.writelines(lines)
+
+    storage = open_log(tmp_path)
+    assert storage.corrupt_lines == 1
+    assert [record["code"] for record in storage] == ["A", "C"]
+    storage.close()
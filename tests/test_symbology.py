@@ -0,0 +1,126 @@
+"""Symbology registry and its encoders: GS1 check digits, EAN-13, GS1-128
+and DataMatrix."""
+
+import pytest
+
+from barcode_core import code128, datamatrix, ean13, gs1
+from barcode_core.plans import PrintPlan
+from barcode_core.storage import open_storage
+from barcode_core.symbology import get_symbology
+from barcode_core.zpl import LabelLayout
+
+
+def decode_ean13(modules):
+    assert len(modules) == 95
+    assert modules[:3] == modules[-3:] == "101" and modules[45:50] == "01010"
+    left = [modules[3 + 7 * i:10 + 7 * i] for i in range(6)]
+    right = [modules[50 + 7 * i:57 + 7 * i] for i in range(6)]
+    digits, parity = [], ""
+    for pattern in left:
+        if pattern in ean13.L_CODES:
+            digits.append(ean13.L_CODES.index(pattern))
+            parity += "L"
+        else:
+            digits.append(ean13.G_CODES.index(pattern))
+            parity += "G"
+    digits += [ean13.R_CODES.index(pattern) for pattern in right]
+    return str(ean13.PARITY.index(parity)) + "".join(map(str, digits))
+
+
+@pytest.mark.parametrize(
+    "body, digit",
+    [
+        ("400638133393", "1"),
+        ("501234567890", "0"),
+        ("0001234567890", "5"),
+        ("9501101530003", "8"),
+        ("1234567", "0"),
+        ("00000000000", "0"),
+    ],
+)
+def test_gs1_check_digit(body, digit):
+    assert gs1.check_digit(body) == digit
+
+
+def test_gs1_check_digits_batch_matches_single():
+    bodies = [f"{i:012d}" for i in range(0, 10 ** 12, 10 ** 12 // 997)][:500]
+    assert gs1.check_digits(bodies) == [gs1.check_digit(body) for body in bodies]
+
+
+def test_ean13_validation():
+    codes, errors = get_symbology("ean13").validate_many(
+        ["400638133393", "4006381333931", "4006381333932", "abc"]
+    )
+    assert codes == ["4006381333931", "4006381333931"]
+    assert sorted(code for code, _ in errors) == ["4006381333932", "abc"]
+
+
+@pytest.mark.parametrize(
+    "code", ["4006381333931", "5012345678900", "0000000000000", "9780201379624"]
+)
+def test_ean13_round_trip(code):
+    assert decode_ean13(ean13.modules(code)) == code
+
+
+def test_ean13_matches_python_barcode():
+    barcode = pytest.importorskip("barcode")
+    for code in ("4006381333931", "5012345678900", "9780201379624"):
+        assert barcode.get("ean13", code[:12]).build() == [ean13.modules(code)]
+
+
+def test_gs1_128_separators_become_fnc1():
+    text = "0112345678901231" + code128.GS + "10ABC"
+    values = code128.encode(text, gs1=True)
+    assert values[1] == code128.FNC1
+    # The leading FNC1 and the one replacing the separator
+    assert values.count(code128.FNC1) == 2
+
+
+def test_datamatrix_reed_solomon_reference():
+    # Worked example of ISO/IEC 16022 annex O: "123456" in a 10x10 symbol
+    size, words = datamatrix.codewords("123456")
+    assert size[0] == 10
+    assert words == [142, 164, 186, 114, 25, 5, 88, 102]
+    assert datamatrix.reed_solomon([142, 164, 186], 5) == [114, 25, 5, 88, 102]
+
+
+@pytest.mark.parametrize("text", ["A", "123456", "Hello, World!", "x" * 60, "ÁÉÍ 0099"])
+def test_datamatrix_data_codewords_round_trip(text):
+    (_, _, capacity, _, _), words = datamatrix.codewords(text)
+    decoded, data = [], iter(words[:capacity])
+    for word in data:
+        if word == datamatrix.PAD:
+            break
+        if word == datamatrix.UPPER_SHIFT:
+            decoded.append(chr(next(data) + 127))
+        elif word >= 130:
+            decoded.append(f"{word - 130:02d}")
+        else:
+            decoded.append(chr(word - 1))
+    assert "".join(decoded) == text
+
+
+def test_datamatrix_matrix_shape():
+    rows = datamatrix.matrix("123456")
+    assert len(rows) == 10 and all(len(row) == 10 for row in rows)
+    # Finder pattern: solid left column and bottom row
+    assert all(row[0] == "1" for row in rows)
+    assert rows[-1] == "1" * 10
+
+
+def test_plan_rejects_codes_the_symbology_cannot_encode():
+    with pytest.raises(ValueError):
+        PrintPlan([("123", 1)], LabelLayout(symbology="ean13"))
+    plan = PrintPlan([("400638133393", 2)], LabelLayout(symbology="ean13"))
+    assert plan.entries == [("4006381333931", 2)]
+
+
+@pytest.mark.parametrize("name", ["barcodes.txt", "barcodes.sqlite3"])
+def test_storage_keeps_the_symbology(tmp_path, name):
+    path = str(tmp_path / name)
+    storage = open_storage(path)
+    storage.add_many([("4006381333931", "ean", None, "ean13"), ("ABC", "abc")])
+    storage.close()
+    storage = open_storage(path)
+    assert [record["symbology"] for record in storage] == ["ean13", "code128"]
+    storage.close()
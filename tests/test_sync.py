@@ -0,0 +1,128 @@
+"""Sync service and stations over a real socket on localhost."""
+
+import threading
+
+import pytest
+
+from barcode_core.sync import Outbox, SyncClient, SyncLog, SyncServer
+
+
+def record(code):
+    return {"code": code, "timestamp": "2024-01-15 14:30:25", "filename": f"img_{code}"}
+
+
+@pytest.fixture
+def server(tmp_path):
+    log = SyncLog(str(tmp_path / "server.sqlite3"))
+    server = SyncServer(log, port=0)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    log.close()
+
+
+def station(server, tmp_path, name):
+    folder = tmp_path / name
+    folder.mkdir(exist_ok=True)
+    host, port = server.server_address
+    return SyncClient(f"{host}:{port}", station=name, folder=str(folder))
+
+
+def test_push_then_pull_between_stations(server, tmp_path):
+    a = station(server, tmp_path, "A")
+    b = station(server, tmp_path, "B")
+    a.push([record("X1"), record("X2")])
+    assert len(a.outbox) == 2
+    assert a.sync_once() == 2
+    assert len(a.outbox) == 0
+    assert a.exists("X1")
+
+    assert not b.exists("X1")
+    assert b.sync_once() == 2
+    assert b.station_of("X1") == "A"
+    assert b.remote.cursor == server.log.cursor()
+    # Nothing new on the next round
+    assert b.sync_once() == 0
+    for client in (a, b):
+        client.close()
+
+
+def test_repeated_batch_counts_once(server):
+    request = {"op": "push", "station": "A", "batch": "b1", "records": [["X", "t", "f"]]}
+    first = server.dispatch(request)
+    second = server.dispatch(request)
+    assert first == second == {"ok": True, "cursor": 1}
+
+
+def test_pull_pages_through_the_log(server):
+    server.log.push("A", None, [(f"C{i}", "t", "f") for i in range(5)])
+    reply = server.dispatch({"op": "pull", "since": 0, "limit": 2})
+    assert [row[1] for row in reply["records"]] == ["C0", "C1"]
+    assert reply["more"] and reply["cursor"] == 2
+    reply = server.dispatch({"op": "pull", "since": 4, "limit": 2})
+    assert [row[1] for row in reply["records"]] == ["C4"]
+    assert not reply["more"]
+
+
+def test_outbox_survives_restart(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.jsonl"))
+    outbox.add([["A", "t", "f"], ["B", "t", "f"], ["C", "t", "f"]])
+    outbox.remove(2)
+    outbox = Outbox(str(tmp_path / "outbox.jsonl"))
+    assert len(outbox) == 1
+    assert outbox.peek(10) == [["C", "t", "f"]]
+
+
+def test_records_queued_offline_are_pushed_later(server, tmp_path):
+    host, port = server.server_address
+    folder = tmp_path / "A"
+    folder.mkdir()
+    offline = SyncClient(f"{host}:1", station="A", folder=str(folder), timeout=0.5)
+    offline.push([record("LATE")])
+    with pytest.raises(OSError):
+        offline.sync_once()
+    assert len(offline.outbox) == 1
+    offline.close()
+
+    client = SyncClient(f"{host}:{port}", station="A", folder=str(folder))
+    client.sync_once()
+    assert len(client.outbox) == 0
+    assert client.station_of("LATE") == "A"
+    client.close()
+
+
+def test_new_server_log_resets_the_cache(server, tmp_path):
+    client = station(server, tmp_path, "A")
+    server.log.push("B", None, [("OLD", "t", "f")])
+    client.sync_once()
+    assert client.exists("OLD")
+
+    # The service starts over with an empty log of its own
+    fresh = SyncLog(str(tmp_path / "fresh.sqlite3"))
+    server.log = fresh
+    fresh.push("B", None, [("NEW", "t", "f")])
+    client.sync_once()
+    assert client.exists("NEW")
+    assert not client.exists("OLD")
+    client.close()
+    fresh.close()
+
+
+def test_malformed_pull_reply_is_rejected(server, tmp_path, monkeypatch):
+    client = station(server, tmp_path, "A")
+    original = server.dispatch
+
+    def broken(request):
+        reply = original(request)
+        if request.get("op") == "pull":
+            reply["records"] = [["not", "a", "row"]]
+        return reply
+
+    monkeypatch.setattr(server, "dispatch", broken)
+    with pytest.raises(RuntimeError):
+        client.sync_once()
+    client.close()
@@ -0,0 +1,43 @@
+"""ZPL field data escaping and label rows."""
+
+from barcode_core.zpl import LabelLayout, build_row, field_data
+
+
+def test_plain_data_is_not_escaped():
+    assert field_data("ABC-123_4") == "^FDABC-123_4"
+    assert field_data(42) == "^FD42"
+
+
+def test_caret_and_tilde_are_hex_escaped():
+    assert field_data("A^B") == "^FH_^FDA_5EB"
+    assert field_data("A~B") == "^FH_^FDA_7EB"
+
+
+def test_escape_character_itself_is_escaped():
+    # Once ^FH is on, a literal "_" would start a hex escape
+    assert field_data("A_^B_~") == "^FH_^FDA_5F_5EB_5F_7E"
+
+
+def test_escaped_data_decodes_back():
+    value = "x^FS~JA_5E^XZ"
+    escaped = field_data(value)
+    assert escaped.startswith("^FH_^FD")
+    data = escaped[len("^FH_^FD"):]
+    assert "^" not in data and "~" not in data
+    decoded, i = [], 0
+    while i < len(data):
+        if data[i] == "_":
+            decoded.append(chr(int(data[i + 1:i + 3], 16)))
+            i += 3
+        else:
+            decoded.append(data[i])
+            i += 1
+    assert "".join(decoded) == value
+
+
+def test_build_row_escapes_every_column():
+    zpl = build_row(["A^1", "B"], qty=3, layout=LabelLayout(columns=2))
+    assert zpl.startswith("^XA") and zpl.endswith("^XZ")
+    assert "^FH_^FDA_5E1" in zpl
+    assert "^FDB" in zpl
+    assert "^PQ3" in zpl
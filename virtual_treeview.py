@@ -0,0 +1,173 @@
+def _same_record(a, b):
+    return a["code"] == b["code"] and a["timestamp"] == b["timestamp"]
+
+
+class VirtualTreeview:
+    """Keeps only a window of rows from a large data source in a ttk.Treeview.
+
+    ``count()`` returns the number of rows and ``fetch(offset, limit)`` a list
+    of records (dicts with an ``id`` key). Only the visible rows plus
+    ``buffer`` rows on each side live in the widget; scrolling near the edge
+    of that window fetches the next one. The scrollbar is driven by the
+    absolute position in the data source, not by the widget contents.
+    """
+
+    def __init__(self, tree, scrollbar, count, fetch, row_values, buffer=50):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.count = count
+        self.fetch = fetch
+        self.row_values = row_values
+        self.buffer = buffer
+
+        self.total = 0
+        self.top = 0
+        self.window_start = 0
+        self.window_rows = []
+        self.records = {}
+        self._windowing = False
+
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
+        self.scrollbar.configure(command=self.yview)
+
+    def visible_rows(self):
+        first, last = self.tree.yview()
+        if self.window_rows and last > first:
+            return max(1, round((last - first) * len(self.window_rows)))
+        return int(self.tree.cget("height"))
+
+    def record_for(self, iid):
+        return self.records.get(iid)
+
+    def set_source(self, count, fetch):
+        """Show another data source (e.g. search results) from the top."""
+        self.count = count
+        self.fetch = fetch
+        self.top = 0
+        self.refresh()
+
+    def refresh(self):
+        """Re-read the row count and reload the current window."""
+        self.total = self.count()
+        self.scroll_to(self.top)
+
+    def grow(self):
+        """Pick up rows appended to the data source, e.g. while it loads.
+
+        Cheaper than ``refresh``: the window is only reloaded if it reached
+        the old end of the data, otherwise just the scrollbar moves.
+        """
+        total = self.count()
+        if total == self.total:
+            return
+        at_end = self.window_start + len(self.window_rows) >= self.total
+        self.total = total
+        if at_end:
+            self.scroll_to(self.top)
+        else:
+            self._update_scrollbar(self.visible_rows())
+
+    def scroll_to(self, top):
+        visible = self.visible_rows()
+        top = max(0, min(top, self.total - visible))
+        start = max(0, top - self.buffer)
+        rows = self.fetch(start, visible + 2 * self.buffer) if self.total else []
+
+        selected = self.tree.selection()
+        previous = self.records
+        self._windowing = True
+        try:
+            self.tree.delete(*self.tree.get_children())
+            self.records = {}
+            for record in rows:
+                self._insert(record)
+            self.window_start = start
+            self.window_rows = rows
+            self.top = top
+            if rows:
+                self.tree.yview_moveto((top - start) / len(rows))
+            # Ids can be row numbers (text storage), which shift when rows are
+            # deleted: keep a selected row only if it still shows the same record
+            keep = [
+                iid
+                for iid in selected
+                if iid in self.records and _same_record(previous[iid], self.records[iid])
+            ]
+            if keep:
+                self.tree.selection_set(keep)
+        finally:
+            self._windowing = False
+        self._update_scrollbar(visible)
+
+    def _insert(self, record):
+        iid = str(record["id"])
+        self.records[iid] = record
+        self.tree.insert("", "end", iid=iid, values=self.row_values(record))
+
+    def redraw(self):
+        """Recompute the values of the rows currently in the widget."""
+        for iid, record in self.records.items():
+            self.tree.item(iid, values=self.row_values(record))
+
+    def append(self, records):
+        """Account for rows added at the end of the data source."""
+        old_total = self.total
+        self.total += len(records)
+        window_end = self.window_start + len(self.window_rows)
+        max_window = self.visible_rows() + 3 * self.buffer
+        if window_end == old_total and len(self.window_rows) < max_window:
+            self._windowing = True
+            try:
+                for record in records:
+                    self._insert(record)
+                    self.window_rows.append(record)
+            finally:
+                self._windowing = False
+        self._update_scrollbar(self.visible_rows())
+
+    def yview(self, *args):
+        """Scrollbar command: map the absolute position onto a window."""
+        if not args:
+            return
+        visible = self.visible_rows()
+        if args[0] == "moveto":
+            top = int(float(args[1]) * self.total)
+        elif args[0] == "scroll":
+            step = int(args[1])
+            top = self.top + (step * visible if args[2] == "pages" else step)
+        else:
+            return
+        if self.window_start <= top and top + visible <= self.window_start + len(
+            self.window_rows
+        ):
+            self.top = top
+            self.tree.yview_moveto((top - self.window_start) / len(self.window_rows))
+            self._update_scrollbar(visible)
+        else:
+            self.scroll_to(top)
+
+    def _on_tree_scroll(self, first, last):
+        """Treeview yscrollcommand: track position and slide the window."""
+        count = len(self.window_rows)
+        if self._windowing or not count:
+            self._update_scrollbar(self.visible_rows())
+            return
+        first, last = float(first), float(last)
+        self.top = self.window_start + round(first * count)
+        visible = max(1, round((last - first) * count))
+        self._update_scrollbar(visible)
+
+        margin = self.buffer // 2
+        near_start = first * count < margin and self.window_start > 0
+        near_end = (
+            count - last * count < margin
+            and self.window_start + count < self.total
+        )
+        if near_start or near_end:
+            self.tree.after_idle(self.scroll_to, self.top)
+
+    def _update_scrollbar(self, visible):
+        if self.total <= 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        self.scrollbar.set(self.top / self.total, min(1.0, (self.top + visible) / self.total))